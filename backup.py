@@ -0,0 +1,342 @@
+"""
+Back up a ClickUp workspace: spaces -> folders -> lists -> tasks -> comments.
+
+Rows are streamed straight into gzip-compressed CSV (or JSONL) files. Tasks
+and comments are written per list into a temporary part file that is renamed
+when the list is complete, so an interrupted backup resumes from the first
+unfinished list:
+
+    python backup.py --out backup/            # full backup (resumes if the last one was interrupted)
+    python backup.py --out backup/ --format jsonl --workers 8
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from clickup_client import ClickUpError, get_client, iter_pages, set_rate_priority
+from credentials import get_clickup_api_key
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_BACKUP_DIR = "backup"
+LIST_WORKERS = 4
+COMMENT_WORKERS = 8
+COMMENTS_PAGE_SIZE = 25   # ClickUp returns at most 25 comments per request
+
+SPACE_COLUMNS = ["team_id", "id", "name", "private", "archived"]
+FOLDER_COLUMNS = ["space_id", "id", "name", "hidden", "archived", "task_count"]
+LIST_COLUMNS = ["space_id", "folder_id", "id", "name", "archived", "task_count"]
+TASK_COLUMNS = [
+    "list_id", "id", "custom_id", "name", "status", "parent", "date_created", "date_updated", "date_closed",
+    "due_date", "creator", "assignees", "tags", "url", "text_content", "custom_fields",
+]
+COMMENT_COLUMNS = ["task_id", "id", "date", "user", "comment_text"]
+
+# ------------------------------
+# STREAMING WRITERS
+# ------------------------------
+
+class RowWriter:
+    """
+    Append rows to a gzip-compressed CSV or JSONL file as they are produced.
+
+    Rows go to `<path>.part` first; commit() renames it to `path`, so a file
+    that exists under its final name is always complete. Thread-safe.
+    """
+
+    def __init__(self, path, columns, fmt="csv"):
+        self.path = path
+        self.columns = columns
+        self.fmt = fmt
+        self.rows = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = io.TextIOWrapper(gzip.open(path + ".part", "wb"), encoding="utf-8", newline="")
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row):
+        with self._lock:
+            if self.fmt == "csv":
+                self._csv.writerow({key: _cell(row.get(key)) for key in self.columns})
+            else:
+                self._file.write(json.dumps({key: row.get(key) for key in self.columns}) + "\n")
+            self.rows += 1
+
+    def commit(self):
+        self._file.close()
+        os.replace(self.path + ".part", self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self.path + ".part")
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return "" if value is None else value
+
+def output_path(out_dir, name, fmt):
+    return os.path.join(out_dir, f"{name}.{'csv' if fmt == 'csv' else 'jsonl'}.gz")
+
+# ------------------------------
+# CHECKPOINT
+# ------------------------------
+
+class Checkpoint:
+    """
+    Progress of one backup directory: the crawled lists and the ones already backed up.
+    """
+
+    def __init__(self, out_dir):
+        self.path = os.path.join(out_dir, "checkpoint.json")
+        self.lists = None     # list of {"id", "name", "space_id", "folder_id"} once the hierarchy is crawled
+        self.done = set()
+        self.format = None
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.lists = data.get("lists")
+            self.done = set(data.get("done", []))
+            self.format = data.get("format")
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"format": self.format, "lists": self.lists, "done": sorted(self.done)}, f)
+            os.replace(tmp_path, self.path)
+
+    def mark_done(self, list_id):
+        with self._lock:
+            self.done.add(list_id)
+        self.save()
+
+    @property
+    def complete(self):
+        return self.lists is not None and all(lst["id"] in self.done for lst in self.lists)
+
+    def clear(self):
+        """
+        Forget a finished backup, so the next run starts a fresh one.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.lists = None
+            self.done = set()
+
+# ------------------------------
+# API HELPERS
+# ------------------------------
+
+def get_json(client, path, params=None):
+    response = client.get(path, params=params)
+    if response.status_code != 200:
+        raise ClickUpError(f"Failed to retrieve {path}: {response.status_code} {response.text}")
+    return response.json()
+
+def iter_task_comments(client, task_id, stop_at=None, stop_id=None):
+    """
+    Yield a task's comments newest first, paging back with start/start_id.
+    Paging stops at comment stop_id or at the first comment older than stop_at.
+    """
+    params = {}
+    while True:
+        comments = get_json(client, f"task/{task_id}/comment", params).get("comments", [])
+        for comment in comments:
+            if stop_id is not None and comment.get("id") == stop_id:
+                return
+            if stop_at is not None and int(comment.get("date") or 0) < stop_at:
+                return
+            yield comment
+        if len(comments) < COMMENTS_PAGE_SIZE:
+            return
+        oldest = comments[-1]
+        params = {"start": oldest.get("date"), "start_id": oldest.get("id")}
+
+def task_row(task, list_id):
+    return {
+        "list_id": list_id,
+        "id": task.get("id"),
+        "custom_id": task.get("custom_id"),
+        "name": task.get("name"),
+        "status": (task.get("status") or {}).get("status"),
+        "parent": task.get("parent"),
+        "date_created": task.get("date_created"),
+        "date_updated": task.get("date_updated"),
+        "date_closed": task.get("date_closed"),
+        "due_date": task.get("due_date"),
+        "creator": (task.get("creator") or {}).get("username"),
+        "assignees": [a.get("username") for a in task.get("assignees") or []],
+        "tags": [t.get("name") for t in task.get("tags") or []],
+        "url": task.get("url"),
+        "text_content": task.get("text_content"),
+        "custom_fields": [{"id": f.get("id"), "name": f.get("name"), "value": f.get("value")}
+                          for f in task.get("custom_fields") or [] if f.get("value") is not None],
+    }
+
+def comment_row(comment, task_id):
+    return {
+        "task_id": task_id,
+        "id": comment.get("id"),
+        "date": comment.get("date"),
+        "user": (comment.get("user") or {}).get("username"),
+        "comment_text": comment.get("comment_text"),
+    }
+
+# ------------------------------
+# HIERARCHY CRAWL
+# ------------------------------
+
+def walk_hierarchy(client, workers=LIST_WORKERS):
+    """
+    Return (spaces, folders, lists) rows for every workspace. Spaces are crawled concurrently.
+    """
+    spaces = []
+    for team in get_json(client, "team").get("teams", []):
+        for space in get_json(client, f"team/{team['id']}/space", {"archived": "false"}).get("spaces", []):
+            spaces.append({**space, "team_id": team["id"]})
+
+    def crawl_space(space):
+        folders, lists = [], []
+        for folder in get_json(client, f"space/{space['id']}/folder", {"archived": "false"}).get("folders", []):
+            folders.append({**folder, "space_id": space["id"]})
+            for lst in folder.get("lists", []):
+                lists.append({**lst, "space_id": space["id"], "folder_id": folder["id"]})
+        for lst in get_json(client, f"space/{space['id']}/list", {"archived": "false"}).get("lists", []):
+            lists.append({**lst, "space_id": space["id"], "folder_id": None})
+        return folders, lists
+
+    folders, lists = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for space_folders, space_lists in pool.map(crawl_space, spaces):
+            folders.extend(space_folders)
+            lists.extend(space_lists)
+    return spaces, folders, lists
+
+def crawl_hierarchy(client, out_dir, fmt="csv", workers=LIST_WORKERS):
+    """
+    Write spaces, folders and lists for every workspace and return the lists to back up.
+    """
+    spaces, folders, lists = walk_hierarchy(client, workers)
+    for name, columns, rows in (("spaces", SPACE_COLUMNS, spaces), ("folders", FOLDER_COLUMNS, folders),
+                                ("lists", LIST_COLUMNS, lists)):
+        writer = RowWriter(output_path(out_dir, name, fmt), columns, fmt)
+        for row in rows:
+            writer.write(row)
+        writer.commit()
+    print(f"Crawled {len(spaces)} spaces and {len(lists)} lists.")
+    return [{"id": lst["id"], "name": lst.get("name"), "space_id": lst["space_id"], "folder_id": lst["folder_id"]}
+            for lst in lists]
+
+# ------------------------------
+# LIST BACKUP
+# ------------------------------
+
+def backup_list(client, lst, out_dir, fmt, comment_pool):
+    """
+    Stream one list's tasks and their comments into per-list part files.
+    """
+    list_id = lst["id"]
+    tasks_out = RowWriter(output_path(os.path.join(out_dir, "tasks"), list_id, fmt), TASK_COLUMNS, fmt)
+    comments_out = RowWriter(output_path(os.path.join(out_dir, "comments"), list_id, fmt), COMMENT_COLUMNS, fmt)
+
+    def backup_comments(task_id):
+        for comment in iter_task_comments(client, task_id):
+            comments_out.write(comment_row(comment, task_id))
+
+    params = {"include_closed": "true", "subtasks": "true", "include_custom_fields": "true"}
+    try:
+        pending = []
+        for page_tasks in iter_pages(client, f"list/{list_id}/task", params=params):
+            for task in page_tasks:
+                tasks_out.write(task_row(task, list_id))
+                pending.append(comment_pool.submit(backup_comments, task["id"]))
+        for future in pending:
+            future.result()
+    except Exception:
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        tasks_out.abort()
+        comments_out.abort()
+        raise
+    tasks_out.commit()
+    comments_out.commit()
+    return tasks_out.rows, comments_out.rows
+
+def run_backup(access_token, out_dir=DEFAULT_BACKUP_DIR, fmt="csv", workers=LIST_WORKERS,
+               comment_workers=COMMENT_WORKERS, restart=False):
+    """
+    Back up the whole workspace into out_dir. An interrupted backup (or one with failed lists)
+    is resumed from its checkpoint unless restart is set; the checkpoint is cleared once every
+    list is backed up, so the next run is a fresh backup.
+    Returns {"lists": n, "tasks": n, "comments": n, "failed": [list ids]}.
+    """
+    client = get_client(access_token)
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(out_dir)
+    if restart or checkpoint.lists is None or checkpoint.complete:
+        checkpoint.lists = crawl_hierarchy(client, out_dir, fmt, workers)
+        checkpoint.done = set()
+        checkpoint.format = fmt
+        checkpoint.save()
+    else:
+        # Keep the format the interrupted backup started with.
+        fmt = checkpoint.format or fmt
+        print(f"Resuming backup: {len(checkpoint.done)} of {len(checkpoint.lists)} lists already done.")
+
+    todo = [lst for lst in checkpoint.lists if lst["id"] not in checkpoint.done]
+    totals = {"lists": 0, "tasks": 0, "comments": 0, "failed": []}
+
+    def run(lst):
+        try:
+            tasks, comments = backup_list(client, lst, out_dir, fmt, comment_pool)
+        except Exception as e:
+            print(f"Failed to back up list {lst['id']} ({lst.get('name')}): {e}")
+            return lst, None
+        checkpoint.mark_done(lst["id"])
+        print(f"Backed up list {lst.get('name')} ({lst['id']}): {tasks} tasks, {comments} comments.")
+        return lst, (tasks, comments)
+
+    with ThreadPoolExecutor(max_workers=comment_workers) as comment_pool, \
+            ThreadPoolExecutor(max_workers=workers) as list_pool:
+        for lst, counts in list_pool.map(run, todo):
+            if counts is None:
+                totals["failed"].append(lst["id"])
+                continue
+            totals["lists"] += 1
+            totals["tasks"] += counts[0]
+            totals["comments"] += counts[1]
+    if checkpoint.complete:
+        checkpoint.clear()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up a ClickUp workspace to compressed CSV or JSONL files.")
+    parser.add_argument("--out", default=DEFAULT_BACKUP_DIR, help="Backup directory (holds the resume checkpoint).")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--workers", type=int, default=LIST_WORKERS, help="Lists backed up in parallel.")
+    parser.add_argument("--comment-workers", type=int, default=COMMENT_WORKERS,
+                        help="Task comment requests in flight across all lists.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start a fresh backup.")
+    args = parser.parse_args()
+    set_rate_priority("low")
+
+    totals = run_backup(get_clickup_api_key(), args.out, args.format, args.workers, args.comment_workers, args.restart)
+    print(f"Backup finished: {totals['lists']} lists, {totals['tasks']} tasks, {totals['comments']} comments.")
+    if totals["failed"]:
+        print(f"{len(totals['failed'])} lists failed and will be retried on the next run: {', '.join(totals['failed'])}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
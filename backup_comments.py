@@ -0,0 +1,191 @@
+"""
+Incremental backup of task comments.
+
+Keeps a per-task high-water mark (the newest comment already backed up and the
+task's date_updated at that time). Each run only lists tasks ClickUp reports
+as updated since the previous run, and for those pages through comments
+newest first with start/start_id until it reaches the mark. New comments are
+written to one gzip file per run under <out>/comments/incremental/, so the
+cost follows daily activity rather than total history:
+
+    python backup_comments.py --out backup/
+    python backup_comments.py --out backup/ --full     # forget the marks and fetch everything again
+
+Edited or deleted comments are not picked up; run backup.py for a full copy.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backup import (
+    COMMENT_COLUMNS, COMMENT_WORKERS, DEFAULT_BACKUP_DIR, LIST_WORKERS, RowWriter, comment_row,
+    iter_task_comments, output_path, walk_hierarchy,
+)
+from clickup_client import get_client, iter_pages, set_rate_priority
+from credentials import get_clickup_api_key
+from snapshot_store import SYNC_OVERLAP_MS, now_ms
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+CURSOR_FILE = "comment_cursors.json"
+
+# ------------------------------
+# CURSORS
+# ------------------------------
+
+class CommentCursors:
+    """
+    High-water marks for one backup directory:
+
+      - lists: list id -> time (ms) of the last run that covered every changed task in it
+      - tasks: task id -> {"date_updated", "comment_id", "comment_date"} of the newest backed-up comment
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lists = {}
+        self.tasks = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.lists = data.get("lists", {})
+            self.tasks = data.get("tasks", {})
+
+    def set_task(self, task_id, cursor):
+        with self._lock:
+            self.tasks[task_id] = cursor
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"lists": self.lists, "tasks": self.tasks}, f)
+        os.replace(tmp_path, self.path)
+
+def task_changed(task, cursor):
+    if cursor is None:
+        return True
+    return int(task.get("date_updated") or 0) > int(cursor.get("date_updated") or 0)
+
+# ------------------------------
+# BACKUP
+# ------------------------------
+
+def changed_tasks(client, list_id, since=None):
+    """
+    Yield the list's tasks updated after `since` (ms), or every task if since is None.
+    """
+    params = {"include_closed": "true", "subtasks": "true"}
+    if since is not None:
+        params["date_updated_gt"] = since - SYNC_OVERLAP_MS
+    for page_tasks in iter_pages(client, f"list/{list_id}/task", params=params):
+        yield from page_tasks
+
+def backup_new_comments(client, task, cursor, writer):
+    """
+    Write the task's comments newer than its cursor and return the advanced cursor.
+    """
+    task_id = task["id"]
+    stop_id = cursor.get("comment_id") if cursor else None
+    stop_at = int(cursor["comment_date"]) if cursor and cursor.get("comment_date") else None
+    newest = None
+    for comment in iter_task_comments(client, task_id, stop_at=stop_at, stop_id=stop_id):
+        if newest is None:
+            newest = comment
+        writer.write(comment_row(comment, task_id))
+    advanced = dict(cursor or {})
+    advanced["date_updated"] = task.get("date_updated")
+    if newest is not None:
+        advanced["comment_id"] = newest.get("id")
+        advanced["comment_date"] = newest.get("date")
+    return advanced
+
+def run_comment_backup(access_token, out_dir=DEFAULT_BACKUP_DIR, fmt="csv", workers=LIST_WORKERS,
+                       comment_workers=COMMENT_WORKERS, full=False):
+    """
+    Back up comments added since the previous run. Returns
+    {"tasks": tasks checked, "comments": new comments, "failed": [list ids]}.
+    """
+    client = get_client(access_token)
+    os.makedirs(out_dir, exist_ok=True)
+    cursors = CommentCursors(os.path.join(out_dir, CURSOR_FILE))
+    if full:
+        cursors.lists, cursors.tasks = {}, {}
+
+    started = now_ms()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started / 1000))
+    writer = RowWriter(output_path(os.path.join(out_dir, "comments", "incremental"), f"comments-{stamp}", fmt),
+                       COMMENT_COLUMNS, fmt)
+    totals = {"tasks": 0, "comments": 0, "failed": []}
+    _, _, lists = walk_hierarchy(client, workers)
+
+    def backup_list(lst, comment_pool):
+        list_id = lst["id"]
+        futures = []
+        for task in changed_tasks(client, list_id, cursors.lists.get(list_id)):
+            cursor = cursors.tasks.get(task["id"])
+            if task_changed(task, cursor):
+                futures.append((task["id"], comment_pool.submit(backup_new_comments, client, task, cursor, writer)))
+        failed = 0
+        for task_id, future in futures:
+            try:
+                cursors.set_task(task_id, future.result())
+            except Exception as e:
+                failed += 1
+                print(f"Failed to back up comments for task {task_id}: {e}")
+        return len(futures), failed
+
+    try:
+        with ThreadPoolExecutor(max_workers=comment_workers) as comment_pool, \
+                ThreadPoolExecutor(max_workers=workers) as list_pool:
+            futures = [(lst, list_pool.submit(backup_list, lst, comment_pool)) for lst in lists]
+            for lst, future in futures:
+                try:
+                    checked, failed = future.result()
+                except Exception as e:
+                    print(f"Failed to list changed tasks in {lst['id']} ({lst.get('name')}): {e}")
+                    totals["failed"].append(lst["id"])
+                    continue
+                totals["tasks"] += checked
+                if failed:
+                    # Leave the list's mark alone so the failed tasks are listed again next run.
+                    totals["failed"].append(lst["id"])
+                else:
+                    cursors.lists[lst["id"]] = started
+    except BaseException:
+        writer.abort()
+        raise
+
+    totals["comments"] = writer.rows
+    if writer.rows:
+        writer.commit()
+    else:
+        writer.abort()
+    cursors.save()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up ClickUp task comments added since the previous run.")
+    parser.add_argument("--out", default=DEFAULT_BACKUP_DIR, help="Backup directory (holds the comment cursors).")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--workers", type=int, default=LIST_WORKERS, help="Lists scanned in parallel.")
+    parser.add_argument("--comment-workers", type=int, default=COMMENT_WORKERS,
+                        help="Task comment requests in flight across all lists.")
+    parser.add_argument("--full", action="store_true", help="Ignore the cursors and back up every comment.")
+    args = parser.parse_args()
+    set_rate_priority("low")
+
+    totals = run_comment_backup(get_clickup_api_key(), args.out, args.format, args.workers,
+                                args.comment_workers, args.full)
+    print(f"Comment backup finished: {totals['comments']} new comments from {totals['tasks']} changed tasks.")
+    if totals["failed"]:
+        print(f"{len(totals['failed'])} lists had failures and will be rescanned next run: "
+              f"{', '.join(totals['failed'])}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Back up ClickUp docs into a content-addressed store.
+
+Every page's Markdown is hashed (SHA-256) and stored once as
+<out>/docs/blobs/<hash[:2]>/<hash>.md.gz; <out>/docs/index.json maps each
+doc and page to its blob. Docs whose date_updated has not moved since the
+previous run are not downloaded at all, and pages whose content is unchanged
+are not rewritten, so a run over mostly static docs touches almost nothing:
+
+    python backup_docs.py --out backup/
+    python backup_docs.py --out backup/ --workers 8 --full   # re-download every doc
+
+Blobs of deleted or edited pages are kept; the index only points at the current versions.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backup import DEFAULT_BACKUP_DIR, get_json
+from clickup_client import get_client, set_rate_priority
+from credentials import get_clickup_api_key
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DOC_WORKERS = 4
+PAGE_WORKERS = 8
+DOCS_PAGE_LIMIT = 100
+CONTENT_FORMAT = "text/md"
+
+# ------------------------------
+# CONTENT-ADDRESSED STORE
+# ------------------------------
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class BlobStore:
+    """
+    Page contents keyed by their SHA-256. Writing a blob that already exists is a no-op.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.written = 0
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.md.gz")
+
+    def put(self, content):
+        digest = content_hash(content)
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self.written += 1
+        return digest
+
+    def get(self, digest):
+        with gzip.open(self.path(digest), "rt", encoding="utf-8") as f:
+            return f.read()
+
+class DocsIndex:
+    """
+    {doc_id: {"name", "date_updated", "pages": {page_id: {"name", "parent_id", "hash"}}}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.docs = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.docs = json.load(f).get("docs", {})
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"docs": self.docs}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+# ------------------------------
+# DOCS API (v3)
+# ------------------------------
+
+def v3_path(client, path):
+    """
+    Docs live under ClickUp's v3 API; derive its URL from the client's v2 base URL.
+    """
+    base = client.base_url
+    if base.endswith("/v2"):
+        base = base[:-len("/v2")] + "/v3"
+    return f"{base}/{path}"
+
+def iter_docs(client, workspace_id):
+    params = {"limit": DOCS_PAGE_LIMIT}
+    while True:
+        data = get_json(client, v3_path(client, f"workspaces/{workspace_id}/docs"), params)
+        yield from data.get("docs", [])
+        if not data.get("next_cursor"):
+            return
+        params = {"limit": DOCS_PAGE_LIMIT, "cursor": data["next_cursor"]}
+
+def flatten_pages(pages, parent_id=None):
+    """
+    Yield (page, parent_id) for a nested page listing, depth first.
+    """
+    for page in pages:
+        yield page, parent_id
+        yield from flatten_pages(page.get("pages") or [], page.get("id"))
+
+def list_doc_pages(client, workspace_id, doc_id):
+    listing = get_json(client, v3_path(client, f"workspaces/{workspace_id}/docs/{doc_id}/page_listing"),
+                       {"max_page_depth": -1})
+    if isinstance(listing, dict):
+        listing = listing.get("pages", [])
+    return list(flatten_pages(listing))
+
+def get_page_content(client, workspace_id, doc_id, page_id):
+    page = get_json(client, v3_path(client, f"workspaces/{workspace_id}/docs/{doc_id}/pages/{page_id}"),
+                    {"content_format": CONTENT_FORMAT})
+    return page.get("content") or ""
+
+# ------------------------------
+# BACKUP
+# ------------------------------
+
+def backup_doc(client, workspace_id, doc, store, page_pool):
+    """
+    Store the contents of every page of one doc; returns its index entry.
+    """
+    pages = list_doc_pages(client, workspace_id, doc["id"])
+    futures = [
+        (page, parent_id, page_pool.submit(get_page_content, client, workspace_id, doc["id"], page["id"]))
+        for page, parent_id in pages
+    ]
+    entry = {"name": doc.get("name"), "date_updated": doc.get("date_updated"), "pages": {}}
+    for page, parent_id, future in futures:
+        entry["pages"][page["id"]] = {
+            "name": page.get("name"),
+            "parent_id": parent_id,
+            "hash": store.put(future.result()),
+        }
+    return entry
+
+def run_docs_backup(access_token, out_dir=DEFAULT_BACKUP_DIR, workers=DOC_WORKERS, page_workers=PAGE_WORKERS,
+                    full=False):
+    """
+    Back up every doc of every workspace. Returns
+    {"docs": n, "changed": docs downloaded, "pages": n, "blobs": new blobs, "failed": [doc ids]}.
+    """
+    client = get_client(access_token)
+    docs_dir = os.path.join(out_dir, "docs")
+    os.makedirs(docs_dir, exist_ok=True)
+    store = BlobStore(os.path.join(docs_dir, "blobs"))
+    index = DocsIndex(os.path.join(docs_dir, "index.json"))
+
+    docs = []
+    for team in get_json(client, "team").get("teams", []):
+        docs.extend((team["id"], doc) for doc in iter_docs(client, team["id"]) if not doc.get("deleted"))
+
+    current = {}
+    changed = []
+    for workspace_id, doc in docs:
+        previous = index.docs.get(doc["id"])
+        if not full and previous and doc.get("date_updated") and previous.get("date_updated") == doc.get("date_updated"):
+            current[doc["id"]] = previous
+        else:
+            changed.append((workspace_id, doc))
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=page_workers) as page_pool, \
+            ThreadPoolExecutor(max_workers=workers) as doc_pool:
+        futures = [(doc, doc_pool.submit(backup_doc, client, workspace_id, doc, store, page_pool))
+                   for workspace_id, doc in changed]
+        for doc, future in futures:
+            try:
+                current[doc["id"]] = future.result()
+            except Exception as e:
+                print(f"Failed to back up doc {doc.get('name')} ({doc['id']}): {e}")
+                failed.append(doc["id"])
+                # Keep the previous version in the index; the doc is retried next run.
+                if doc["id"] in index.docs:
+                    current[doc["id"]] = {**index.docs[doc["id"]], "date_updated": None}
+
+    index.docs = current
+    index.save()
+    return {
+        "docs": len(current),
+        "changed": len(changed) - len(failed),
+        "pages": sum(len(entry["pages"]) for entry in current.values()),
+        "blobs": store.written,
+        "failed": failed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up ClickUp docs into a content-addressed store.")
+    parser.add_argument("--out", default=DEFAULT_BACKUP_DIR, help="Backup directory (docs go under <out>/docs).")
+    parser.add_argument("--workers", type=int, default=DOC_WORKERS, help="Docs backed up in parallel.")
+    parser.add_argument("--page-workers", type=int, default=PAGE_WORKERS,
+                        help="Page content requests in flight across all docs.")
+    parser.add_argument("--full", action="store_true", help="Download every doc, even if unchanged.")
+    args = parser.parse_args()
+    set_rate_priority("low")
+
+    totals = run_docs_backup(get_clickup_api_key(), args.out, args.workers, args.page_workers, args.full)
+    print(f"Docs backup finished: {totals['docs']} docs ({totals['changed']} changed), "
+          f"{totals['pages']} pages, {totals['blobs']} new blobs.")
+    if totals["failed"]:
+        print(f"{len(totals['failed'])} docs failed and will be retried on the next run: {', '.join(totals['failed'])}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Microbenchmarks for the pure billing logic: projecting tasks, grouping and
+validating brands, building the reports and titling invoices. No network or
+credentials needed; the Brands Basket payloads are synthetic
+(fake_clickup.generate_brands) with 10–60 custom fields per task and several
+mother-brand fan-out profiles.
+
+    python benchmarks.py --save                     # record benchmark_baseline.json on this machine
+    python benchmarks.py                            # compare against it; exits 1 on a regression
+    python benchmarks.py --sizes 1000,10000 --fanout wide --stages group,validation_report
+
+Each stage is timed as the median of --repeat runs and its peak allocation is
+measured in a separate tracemalloc run. A stage regresses when it is more than
+--threshold slower (or --memory-threshold bigger) than its baseline. With at
+least three sizes, the scaling exponent of every stage is fitted across all of
+them and printed (1.0 is linear); a stage fails when it grows faster than
+--max-exponent and its largest size is also more than MIN_TIME_DELTA slower
+than linear growth from the smallest would give.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+from billing_calendar import clamp_day
+from brand_hierarchy import format_cycles_report
+from brand_records import project_tasks
+from brand_validation import BrandValidation
+from fake_clickup import generate_brands
+from main import (
+    BRAND_FIELD_INDEX, STATUS_ID, compute_invoice_task_details, group_tasks, plan_invoice_jobs,
+)
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_SIZES = [1000, 10000, 100000]
+EXTRA_FIELDS = (7, 57)            # plus the 3 billing fields: 10–60 custom fields per task
+TARGET_DATE = date(2026, 11, 1)
+REPEAT = 7
+TIME_THRESHOLD = 0.25             # fail when a stage is 25% slower than its baseline...
+MIN_TIME_DELTA = 0.005            # ...and at least 5 ms slower, so tiny stages do not flap
+MEMORY_THRESHOLD = 0.10
+MAX_SCALING_EXPONENT = 1.3
+MIN_SCALING_SIZES = 3             # a two-point fit is too noisy to fail on
+
+# name -> (mother_ratio, mother_pool): the share of brands with a mother brand,
+# and how many brands the mothers are drawn from (None: any earlier brand).
+FANOUT_PROFILES = {
+    "none": (0.0, None),
+    "sparse": (0.1, None),          # today's list: a few small families
+    "wide": (0.5, 50),              # half the brands under 50 mother brands
+}
+
+# ------------------------------
+# STAGES
+# ------------------------------
+
+def stage_project(data):
+    tasks = [task for task in data["tasks"] if task["status"]["id"] == STATUS_ID]
+    return project_tasks(tasks, BRAND_FIELD_INDEX)
+
+def stage_group(data):
+    validation = BrandValidation()
+    return group_tasks(data["brands"], validation), validation
+
+def stage_validation_report(data):
+    return data["validation"].format_report()
+
+def stage_cycles_report(data):
+    return format_cycles_report(data["groups"][5], {brand.id: brand.name for brand in data["brands"]})
+
+def stage_titles(data):
+    independent, _, parent, parent_children_names, _, _ = data["groups"]
+    titles = []
+    for brand in independent + parent:
+        if brand.id in data["validation"].blocked_ids:
+            continue
+        titles.append(compute_invoice_task_details(brand.billing_day, brand.payment_term, brand.name,
+                                                   parent_children_names.get(brand.id, []),
+                                                   clamp_day(TARGET_DATE, brand.billing_day)))
+    return titles
+
+def stage_plan(data):
+    independent, _, parent, parent_children_names, parent_children_ids, _ = data["groups"]
+    end_date = clamp_day(TARGET_DATE, 31)
+    return plan_invoice_jobs(independent, parent, parent_children_names, parent_children_ids, TARGET_DATE, end_date,
+                             data["validation"].blocked_ids)
+
+STAGES = {
+    "project": stage_project,
+    "group": stage_group,
+    "validation_report": stage_validation_report,
+    "cycles_report": stage_cycles_report,
+    "titles": stage_titles,
+    "plan": stage_plan,
+}
+
+# ------------------------------
+# MEASUREMENT
+# ------------------------------
+
+def build_data(size, fanout):
+    mother_ratio, mother_pool = FANOUT_PROFILES[fanout]
+    tasks = generate_brands(size, extra_fields=EXTRA_FIELDS, mother_ratio=mother_ratio, mother_pool=mother_pool,
+                            shared_extras=True)
+    data = {"tasks": tasks}
+    data["brands"] = stage_project(data)
+    data["groups"], data["validation"] = stage_group(data)
+    return data
+
+def measure(stage, data, repeat):
+    """
+    Return (median seconds, peak bytes allocated) of one stage. Its printing is discarded.
+    """
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            stage(data)
+            timings.append(time.perf_counter() - started)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage(data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return statistics.median(timings), peak
+
+def run_benchmarks(sizes, fanouts, stages, repeat=REPEAT):
+    """
+    Returns {"<fanout>/<size>/<stage>": {"seconds", "peak_kb", "brands"}}.
+    """
+    results = {}
+    for fanout in fanouts:
+        for size in sizes:
+            data = build_data(size, fanout)
+            for name in stages:
+                seconds, peak = measure(STAGES[name], data, repeat)
+                results[f"{fanout}/{size}/{name}"] = {
+                    "seconds": round(seconds, 6),
+                    "peak_kb": round(peak / 1024, 1),
+                    "brands": len(data["brands"]),
+                }
+                print(f"{fanout:>7} {size:>7} {name:<18} {seconds * 1000:10.2f} ms {peak / 1024:12.1f} KB "
+                      f"{seconds * 1e6 / max(size, 1):8.3f} us/task")
+            del data
+    return results
+
+def scaling_exponents(results, sizes, fanouts, stages):
+    """
+    Least-squares slope of log(time) against log(size) over every size: 1.0 means linear.
+    """
+    exponents = {}
+    sizes = sorted(set(sizes))
+    if len(sizes) < 2:
+        return exponents
+    xs = [math.log(size) for size in sizes]
+    mean_x = sum(xs) / len(xs)
+    for fanout in fanouts:
+        for name in stages:
+            timings = [results[f"{fanout}/{size}/{name}"]["seconds"] for size in sizes]
+            if min(timings) <= 0:
+                continue
+            ys = [math.log(seconds) for seconds in timings]
+            mean_y = sum(ys) / len(ys)
+            exponents[f"{fanout}/{name}"] = (
+                sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+            )
+    return exponents
+
+def superlinear_excess(results, sizes, key):
+    """
+    Seconds by which the largest size is slower than linear growth from the smallest would make it.
+    """
+    fanout, name = key.split("/")
+    small, large = min(sizes), max(sizes)
+    t_small = results[f"{fanout}/{small}/{name}"]["seconds"]
+    t_large = results[f"{fanout}/{large}/{name}"]["seconds"]
+    return t_large - t_small * large / small
+
+# ------------------------------
+# BASELINES
+# ------------------------------
+
+def save_baseline(path, results, args):
+    baseline = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def compare(results, baseline, time_threshold=TIME_THRESHOLD, memory_threshold=MEMORY_THRESHOLD):
+    """
+    Return a description of every stage that is slower or bigger than its baseline allows.
+    """
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        seconds, base_seconds = current["seconds"], previous["seconds"]
+        if seconds > base_seconds * (1 + time_threshold) and seconds - base_seconds > MIN_TIME_DELTA:
+            regressions.append(f"{key}: {seconds * 1000:.2f} ms vs baseline {base_seconds * 1000:.2f} ms "
+                               f"(+{(seconds / base_seconds - 1) * 100:.0f}%)")
+        peak, base_peak = current["peak_kb"], previous["peak_kb"]
+        if base_peak and peak > base_peak * (1 + memory_threshold):
+            regressions.append(f"{key}: peak {peak:.1f} KB vs baseline {base_peak:.1f} KB "
+                               f"(+{(peak / base_peak - 1) * 100:.0f}%)")
+    return regressions
+
+def csv_arg(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the billing logic on synthetic brand lists.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated brand counts.")
+    parser.add_argument("--fanout", default=",".join(FANOUT_PROFILES),
+                        help=f"Comma-separated mother-brand profiles ({', '.join(FANOUT_PROFILES)}).")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages ({', '.join(STAGES)}).")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Timed runs per stage; the median counts.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=TIME_THRESHOLD, help="Allowed slowdown, e.g. 0.25 for 25%%.")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD, help="Allowed peak memory growth.")
+    parser.add_argument("--max-exponent", type=float, default=MAX_SCALING_EXPONENT,
+                        help="Largest allowed scaling exponent fitted across the sizes (needs at least three).")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in csv_arg(args.sizes)]
+    fanouts = csv_arg(args.fanout)
+    stages = csv_arg(args.stages)
+    unknown = [name for name in fanouts if name not in FANOUT_PROFILES] + [name for name in stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown fan-out profiles or stages: {', '.join(unknown)}")
+
+    results = run_benchmarks(sizes, fanouts, stages, args.repeat)
+    failures = []
+    exponents = scaling_exponents(results, sizes, fanouts, stages)
+    if exponents:
+        checked = len(set(sizes)) >= MIN_SCALING_SIZES
+        print(f"\nScaling exponent from {min(sizes)} to {max(sizes)} brands (1.0 = linear):")
+        for key, exponent in sorted(exponents.items()):
+            superlinear = (checked and exponent > args.max_exponent
+                           and superlinear_excess(results, sizes, key) > MIN_TIME_DELTA)
+            flag = "  <- superlinear" if superlinear else ""
+            print(f"  {key:<24} {exponent:5.2f}{flag}")
+            if superlinear:
+                failures.append(f"{key}: scaling exponent {exponent:.2f} > {args.max_exponent}")
+        if not checked:
+            print(f"  (not checked: needs at least {MIN_SCALING_SIZES} sizes)")
+
+    if args.save:
+        save_baseline(args.baseline, results, args)
+        print(f"\nSaved baseline to {args.baseline}.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures.extend(compare(results, baseline.get("results", {}), args.threshold, args.memory_threshold))
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one.")
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
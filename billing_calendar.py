@@ -0,0 +1,69 @@
+import calendar
+from datetime import date, timedelta
+
+# ------------------------------
+# DATE HELPERS
+# ------------------------------
+
+def last_day_of_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+def clamp_day(d, day):
+    """
+    Return d with its day set to `day`, or to the month's last day if the month is shorter.
+    """
+    return d.replace(day=min(day, last_day_of_month(d.year, d.month)))
+
+def date_range(start_date, end_date):
+    days = (end_date - start_date).days
+    return [start_date + timedelta(days=offset) for offset in range(days + 1)]
+
+def parse_date(value):
+    return date.fromisoformat(value)
+
+# ------------------------------
+# SCHEDULE
+# ------------------------------
+
+def index_by_billing_day(brands):
+    """
+    Bucket brands by billing day (1–31) in one pass, preserving input order.
+    Brands without a valid billing day are left out.
+    """
+    buckets = {}
+    for brand in brands:
+        day = brand.billing_day
+        if day is not None and 1 <= day <= 31:
+            buckets.setdefault(day, []).append(brand)
+    return buckets
+
+def billing_days_in_range(start_date, end_date):
+    """
+    Return the set of billing days (1–31) that fall due somewhere in [start_date, end_date].
+    """
+    days = set()
+    for d in date_range(start_date, end_date):
+        days.add(d.day)
+        if d.day == last_day_of_month(d.year, d.month):
+            days.update(range(d.day + 1, 32))
+    return days
+
+def build_schedule(brands, start_date, end_date):
+    """
+    Map every date in [start_date, end_date] to the brands that bill on it.
+
+    Billing days past the end of a short month (29–31) fall on that month's
+    last day, so every brand bills exactly once per month. Brands are bucketed
+    once, so the cost is O(brands + days) however long the range is.
+    Dates with no billing brands are omitted.
+    """
+    buckets = index_by_billing_day(brands)
+    schedule = {}
+    for d in date_range(start_date, end_date):
+        due = list(buckets.get(d.day, ()))
+        if d.day == last_day_of_month(d.year, d.month):
+            for day in range(d.day + 1, 32):
+                due.extend(buckets.get(day, ()))
+        if due:
+            schedule[d] = due
+    return schedule
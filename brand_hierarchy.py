@@ -0,0 +1,98 @@
+# ------------------------------
+# HIERARCHY RESOLUTION
+# ------------------------------
+
+class BrandHierarchy:
+    """
+    Result of resolving mother-brand links to root billing brands.
+
+      - roots: brand id -> id of the root brand it is billed under (itself for
+        roots), or None if the brand is on or below a mother-brand cycle.
+      - descendants: root id -> ids of every brand billed under it, at any depth,
+        in input order.
+      - cycles: lists of brand ids forming a mother-brand cycle.
+    """
+    __slots__ = ("roots", "descendants", "cycles")
+
+    def __init__(self, roots, descendants, cycles):
+        self.roots = roots
+        self.descendants = descendants
+        self.cycles = cycles
+
+def resolve_hierarchy(ids, mother_of, active=None):
+    """
+    Resolve every brand in `ids` (input order) to its root billing brand.
+
+    `mother_of` maps brand id -> mother brand id. Links to brands that are not
+    active (in `active`, which defaults to `ids`) are ignored, so such brands
+    are roots. Each brand is visited once and every chain is compressed as it
+    is walked, so the cost is linear in the number of brands whatever the depth.
+    """
+    order = list(ids)
+    if active is None:
+        active = set(order)
+    roots = {}
+    cycles = []
+    for start in order:
+        if start in roots:
+            continue
+        path = []
+        on_path = {}
+        node = start
+        while True:
+            if node in roots:
+                root = roots[node]
+                break
+            if node in on_path:
+                cycle = path[on_path[node]:]
+                cycles.append(cycle)
+                for member in cycle:
+                    roots[member] = None
+                path = path[:on_path[node]]
+                root = None
+                break
+            mother = mother_of.get(node)
+            if not mother or mother not in active:
+                roots[node] = node
+                root = node
+                break
+            on_path[node] = len(path)
+            path.append(node)
+            node = mother
+        for member in path:
+            roots[member] = root
+
+    descendants = {}
+    for brand_id in order:
+        root = roots[brand_id]
+        if root is not None and root != brand_id:
+            descendants.setdefault(root, []).append(brand_id)
+    return BrandHierarchy(roots, descendants, cycles)
+
+CYCLES_REPORT_TITLE = "The following brands could not be resolved to a billing brand and were not invoiced:"
+
+def cycle_report_entries(hierarchy, names):
+    """
+    Return one report line per mother-brand cycle and per brand stranded under one.
+    """
+    lines = []
+    in_cycle = set()
+    for cycle in hierarchy.cycles:
+        in_cycle.update(cycle)
+        chain = " -> ".join(f"'{names.get(brand_id, brand_id)}' (ID: {brand_id})" for brand_id in cycle + cycle[:1])
+        lines.append(f"Mother brand cycle: {chain}")
+    if hierarchy.cycles:
+        for brand_id, root in hierarchy.roots.items():
+            if root is None and brand_id not in in_cycle:
+                lines.append(f"Brand '{names.get(brand_id, brand_id)}' (ID: {brand_id}) has a mother brand inside a cycle.")
+    return lines
+
+def format_cycles_report(hierarchy, names):
+    """
+    Return a report section describing mother-brand cycles and the brands
+    stranded under them, or None if there are none.
+    """
+    lines = cycle_report_entries(hierarchy, names)
+    if not lines:
+        return None
+    return CYCLES_REPORT_TITLE + "\n\n" + "\n".join(lines)
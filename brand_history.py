@@ -0,0 +1,343 @@
+"""
+Columnar history of the daily brand snapshots, for billing analytics without API calls.
+
+Each run of main.py appends the BrandRecords it projected (every status) as
+that day's snapshot. Columns are dictionary-encoded integers in raw native
+binary files, partitioned by list and month:
+
+    brand_history/<list id>/dictionary.json          brand ids/names and status ids -> codes
+    brand_history/<list id>/<YYYY-MM>/days.json      [{"day", "start", "count"}] row ranges per day
+    brand_history/<list id>/<YYYY-MM>/<column>.bin   brand, mother, billing_day, payment_term, status
+
+Appending needs only the standard library; the queries memory-map the
+columns with numpy and aggregate them vectorised:
+
+    python brand_history.py days
+    python brand_history.py volume --from 2025-10-01 --to 2026-09-30
+    python brand_history.py changes --brand 86c0abcde --column payment_term
+    python brand_history.py count --column payment_term --value 1
+"""
+import argparse
+import calendar
+import json
+import os
+from array import array
+from datetime import date
+
+from billing_calendar import parse_date
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_HISTORY_DIR = "brand_history"
+MISSING = -1
+
+# column -> array typecode; numpy reads the same bytes with the matching dtype.
+COLUMNS = {
+    "brand": "i",
+    "mother": "i",
+    "billing_day": "b",
+    "payment_term": "b",
+    "status": "h",
+}
+NUMPY_DTYPES = {"i": "=i4", "b": "=i1", "h": "=i2"}
+
+def _encode_small(value):
+    return value if value is not None and -128 <= value <= 127 else MISSING
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("brand_history queries need numpy: pip install numpy") from None
+    return numpy
+
+# ------------------------------
+# STORE
+# ------------------------------
+
+class BrandHistory:
+    """
+    Daily snapshots of one list's brands. append() adds or replaces a day;
+    the other methods are the query API and need numpy.
+    """
+
+    def __init__(self, root, list_id):
+        self.root = os.path.join(root, str(list_id))
+        self.brands = []      # code -> brand id
+        self.names = []       # code -> latest name
+        self.statuses = []    # code -> status id
+        path = os.path.join(self.root, "dictionary.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.brands, self.names, self.statuses = data["brands"], data["names"], data["statuses"]
+        self._brand_codes = {brand_id: code for code, brand_id in enumerate(self.brands)}
+        self._status_codes = {status_id: code for code, status_id in enumerate(self.statuses)}
+
+    def _brand_code(self, brand_id, name=None):
+        code = self._brand_codes.get(brand_id)
+        if code is None:
+            code = self._brand_codes[brand_id] = len(self.brands)
+            self.brands.append(brand_id)
+            self.names.append(name)
+        elif name is not None:
+            self.names[code] = name
+        return code
+
+    def _status_code(self, status_id):
+        if status_id is None:
+            return MISSING
+        code = self._status_codes.get(status_id)
+        if code is None:
+            code = self._status_codes[status_id] = len(self.statuses)
+            self.statuses.append(status_id)
+        return code
+
+    def _partition(self, day):
+        return os.path.join(self.root, day.strftime("%Y-%m"))
+
+    def _read_days(self, partition):
+        path = os.path.join(partition, "days.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def append(self, day, records):
+        """
+        Store `records` (BrandRecords) as the snapshot of `day`, replacing an earlier snapshot of that day.
+        """
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        for record in records:
+            columns["brand"].append(self._brand_code(record.id, record.name))
+            columns["mother"].append(self._brand_code(record.mother_id) if record.mother_id else MISSING)
+            columns["billing_day"].append(_encode_small(record.billing_day))
+            columns["payment_term"].append(_encode_small(record.payment_term))
+            columns["status"].append(self._status_code(record.status_id))
+
+        partition = self._partition(day)
+        os.makedirs(partition, exist_ok=True)
+        days = self._read_days(partition)
+        rows = sum(entry["count"] for entry in days)
+        if any(entry["day"] == day.isoformat() for entry in days):
+            # Reruns replace the day: keep every other day's rows and append this one again.
+            kept = [entry for entry in days if entry["day"] != day.isoformat()]
+            existing = self._read_partition_arrays(partition, days)
+            for name, typecode in COLUMNS.items():
+                rebuilt = array(typecode)
+                for entry in kept:
+                    rebuilt.extend(existing[name][entry["start"]:entry["start"] + entry["count"]])
+                with open(os.path.join(partition, f"{name}.bin"), "wb") as f:
+                    rebuilt.tofile(f)
+            offset = 0
+            for entry in kept:
+                entry["start"], offset = offset, offset + entry["count"]
+            days, rows = kept, offset
+
+        for name, values in columns.items():
+            with open(os.path.join(partition, f"{name}.bin"), "ab") as f:
+                # Drop rows left behind by an append that crashed before days.json was written.
+                f.truncate(rows * values.itemsize)
+                values.tofile(f)
+        days.append({"day": day.isoformat(), "start": rows, "count": len(columns["brand"])})
+        days.sort(key=lambda entry: entry["day"])
+        _write_json(os.path.join(partition, "days.json"), days)
+        _write_json(os.path.join(self.root, "dictionary.json"),
+                    {"brands": self.brands, "names": self.names, "statuses": self.statuses})
+
+    def _read_partition_arrays(self, partition, days):
+        rows = sum(entry["count"] for entry in days)
+        arrays = {}
+        for name, typecode in COLUMNS.items():
+            values = array(typecode)
+            with open(os.path.join(partition, f"{name}.bin"), "rb") as f:
+                values.fromfile(f, rows)
+            arrays[name] = values
+        return arrays
+
+    def days(self):
+        """
+        Return the dates of every stored snapshot, oldest first.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for partition in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, partition)
+            if os.path.isdir(path):
+                found.extend(date.fromisoformat(entry["day"]) for entry in self._read_days(path))
+        return sorted(found)
+
+    def load(self, start=None, end=None):
+        """
+        Return the rows of the snapshots in [start, end], oldest day first, as a
+        dict of numpy arrays: "day" (date ordinal) plus every column of COLUMNS.
+        """
+        rows, _, _ = self._load(start, end)
+        return rows
+
+    def _load(self, start, end):
+        """
+        Return (rows, day ordinals, rows per day); rows are grouped by day in that order.
+        """
+        np = _import_numpy()
+        parts = {name: [] for name in COLUMNS}
+        ordinals, counts = [], []
+        if os.path.isdir(self.root):
+            for partition in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, partition)
+                if not os.path.isdir(path):
+                    continue
+                days = self._read_days(path)
+                selected = [entry for entry in days
+                            if (start is None or entry["day"] >= start.isoformat())
+                            and (end is None or entry["day"] <= end.isoformat())]
+                rows = sum(entry["count"] for entry in days)
+                if not selected or not rows:
+                    continue
+                mapped = {name: np.memmap(os.path.join(path, f"{name}.bin"), dtype=NUMPY_DTYPES[typecode],
+                                          mode="r", shape=(rows,))
+                          for name, typecode in COLUMNS.items()}
+                for entry in selected:
+                    window = slice(entry["start"], entry["start"] + entry["count"])
+                    for name in COLUMNS:
+                        parts[name].append(mapped[name][window])
+                    ordinals.append(date.fromisoformat(entry["day"]).toordinal())
+                    counts.append(entry["count"])
+        rows = {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=NUMPY_DTYPES[COLUMNS[name]])
+                for name, chunks in parts.items()}
+        ordinals = np.array(ordinals, dtype=np.int32)
+        counts = np.array(counts, dtype=np.int64)
+        rows["day"] = np.repeat(ordinals, counts)
+        return rows, ordinals, counts
+
+    def brand_code(self, brand_id):
+        return self._brand_codes.get(brand_id)
+
+    def status_code(self, status_id):
+        return self._status_codes.get(status_id)
+
+    def count_by_day(self, column, value, start=None, end=None, status_id=None):
+        """
+        Return [(date, brands whose `column` equals `value`)] per snapshot, e.g.
+        count_by_day("payment_term", 1) for the number of post-paid brands.
+        """
+        np = _import_numpy()
+        rows, ordinals, counts = self._load(start, end)
+        mask = rows[column] == value
+        if status_id is not None:
+            mask &= rows["status"] == self._status_codes.get(status_id, MISSING - 1)
+        day_index = np.repeat(np.arange(len(ordinals)), counts)
+        totals = np.bincount(day_index[mask], minlength=len(ordinals))
+        return [(date.fromordinal(int(day)), int(total)) for day, total in zip(ordinals, totals)]
+
+    def changes(self, brand_id, column):
+        """
+        Return [(date, old value, new value)] for every snapshot where a brand's column changed.
+        Mother brand codes are turned back into ids.
+        """
+        np = _import_numpy()
+        code = self._brand_codes.get(brand_id)
+        if code is None:
+            return []
+        rows = self.load()
+        selected = rows["brand"] == code
+        days = rows["day"][selected]
+        values = rows[column][selected]
+        changed = np.flatnonzero(values[1:] != values[:-1]) + 1
+        decode = self._decoder(column)
+        return [(date.fromordinal(int(days[i])), decode(values[i - 1]), decode(values[i])) for i in changed]
+
+    def _decoder(self, column):
+        if column in ("brand", "mother"):
+            return lambda code: self.brands[code] if code != MISSING else None
+        if column == "status":
+            return lambda code: self.statuses[code] if code != MISSING else None
+        return lambda value: int(value) if value != MISSING else None
+
+    def monthly_invoice_volume(self, status_id, start=None, end=None):
+        """
+        Return [("YYYY-MM", invoices)]: on each snapshot day, the billing brands
+        (in status_id, valid billing day and payment terms, no mother brand in
+        status_id that day) whose billing day falls due that day, summed per month.
+        Months need a snapshot every day to be complete.
+        """
+        np = _import_numpy()
+        rows, ordinals, counts = self._load(start, end)
+        status = self._status_codes.get(status_id)
+        if status is None or not len(ordinals):
+            return []
+
+        dates = [date.fromordinal(int(day)) for day in ordinals]
+        day_index = np.repeat(np.arange(len(dates), dtype=np.int32), counts)
+        day_of_month = np.array([d.day for d in dates], dtype=np.int8)[day_index]
+        month_end = np.array([calendar.monthrange(d.year, d.month)[1] for d in dates], dtype=np.int8)[day_index]
+
+        active = rows["status"] == status
+        # A brand is billed under its mother only if the mother was active that same day.
+        # active_by_day has a slot per (day, brand code) after a spare slot 0 per day
+        # that is never set, which is where a missing mother (-1) lands.
+        width = len(self.brands) + 1
+        key_type = np.int32 if len(dates) * width < 2 ** 31 else np.int64
+        base = np.repeat(np.arange(len(dates), dtype=key_type) * width + 1, counts)
+        active_by_day = np.zeros(len(dates) * width, dtype=bool)
+        active_by_day[(base + rows["brand"])[active]] = True
+        has_active_mother = active_by_day[base + rows["mother"]]
+
+        billing_day = rows["billing_day"]
+        due = (billing_day == day_of_month) | ((day_of_month == month_end) & (billing_day > day_of_month))
+        invoiced = (active & ~has_active_mother & due & (billing_day >= 1) & (billing_day <= 31)
+                    & ((rows["payment_term"] == 0) | (rows["payment_term"] == 1)))
+
+        months = sorted({d.strftime("%Y-%m") for d in dates})
+        month_index = np.array([months.index(d.strftime("%Y-%m")) for d in dates])[day_index]
+        totals = np.bincount(month_index[invoiced], minlength=len(months))
+        return list(zip(months, (int(total) for total in totals)))
+
+# ------------------------------
+# COMMAND LINE
+# ------------------------------
+
+def main(argv=None):
+    from main import LIST_ID, STATUS_ID   # the brands list main.py bills from
+    parser = argparse.ArgumentParser(description="Query the daily brand snapshots recorded by main.py.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_DIR)
+    parser.add_argument("--list-id", default=LIST_ID)
+    parser.add_argument("--status-id", default=STATUS_ID, help="Billing status for volume and count.")
+    parser.add_argument("--from", dest="start", type=parse_date)
+    parser.add_argument("--to", dest="end", type=parse_date)
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+    commands.add_parser("days", help="List the stored snapshot days.")
+    commands.add_parser("volume", help="Invoices due per month.")
+    command = commands.add_parser("changes", help="When a brand's column changed.")
+    command.add_argument("--brand", required=True, help="Brand task id.")
+    command.add_argument("--column", choices=["billing_day", "payment_term", "mother", "status"], required=True)
+    command = commands.add_parser("count", help="Brands per day whose column equals a value.")
+    command.add_argument("--column", choices=["billing_day", "payment_term"], required=True)
+    command.add_argument("--value", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    history = BrandHistory(args.history, args.list_id)
+    if args.command == "days":
+        days = history.days()
+        print(f"{len(days)} snapshots" + (f" from {days[0]} to {days[-1]}." if days else "."))
+    elif args.command == "volume":
+        for month, invoices in history.monthly_invoice_volume(args.status_id, args.start, args.end):
+            print(f"{month}: {invoices} invoices")
+    elif args.command == "changes":
+        for day, old, new in history.changes(args.brand, args.column):
+            print(f"{day}: {old} -> {new}")
+    elif args.command == "count":
+        for day, count in history.count_by_day(args.column, args.value, args.start, args.end, args.status_id):
+            print(f"{day}: {count}")
+
+if __name__ == "__main__":
+    main()
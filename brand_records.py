@@ -0,0 +1,70 @@
+class BrandRecord:
+    """
+    Compact projection of a Brands Basket task: only what billing needs.
+    """
+    __slots__ = ("id", "name", "status_id", "billing_day", "payment_term", "mother_id")
+
+    def __init__(self, id, name, status_id, billing_day=None, payment_term=None, mother_id=None):
+        self.id = id
+        self.name = name
+        self.status_id = status_id
+        self.billing_day = billing_day
+        self.payment_term = payment_term
+        self.mother_id = mother_id
+
+    def __repr__(self):
+        return (f"BrandRecord(id={self.id!r}, name={self.name!r}, billing_day={self.billing_day!r}, "
+                f"payment_term={self.payment_term!r}, mother_id={self.mother_id!r})")
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _decode_billing_day(value):
+    return _to_int(value) if value else None
+
+def _decode_payment_term(value):
+    return _to_int(value) if value is not None else None
+
+def _decode_mother_id(value):
+    # Relationship fields hold a list of {"id": ...} dicts; the first one is the mother brand.
+    if value and isinstance(value, list) and isinstance(value[0], dict):
+        return value[0].get("id")
+    return None
+
+DECODERS = {
+    "billing_day": _decode_billing_day,
+    "payment_term": _decode_payment_term,
+    "mother_id": _decode_mother_id,
+}
+
+def build_field_index(billing_day_field_id, payment_terms_field_id, mother_brand_field_id):
+    """
+    Map custom field ids to the BrandRecord attribute they decode into.
+    """
+    return {
+        billing_day_field_id: "billing_day",
+        payment_terms_field_id: "payment_term",
+        mother_brand_field_id: "mother_id",
+    }
+
+def project_task(task, field_index):
+    """
+    Project a raw ClickUp task dict into a BrandRecord in a single pass over its custom fields.
+    """
+    record = BrandRecord(task["id"], task.get("name"), task.get("status", {}).get("id"))
+    remaining = len(field_index)
+    for field in task.get("custom_fields", ()):
+        attr = field_index.get(field.get("id"))
+        if attr is None:
+            continue
+        setattr(record, attr, DECODERS[attr](field.get("value")))
+        remaining -= 1
+        if not remaining:
+            break
+    return record
+
+def project_tasks(tasks, field_index):
+    return [project_task(task, field_index) for task in tasks]
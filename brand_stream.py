@@ -0,0 +1,85 @@
+from billing_calendar import billing_days_in_range
+from brand_hierarchy import resolve_hierarchy
+from brand_records import BrandRecord, project_task
+from clickup_client import iter_pages
+
+# ------------------------------
+# STREAMING FETCH
+# ------------------------------
+
+def stream_brands(client, list_id, status_id, field_index):
+    """
+    Yield BrandRecords for tasks of list_id in status_id as each page arrives.
+    Raw task dicts are dropped as soon as they are projected.
+    """
+    params = {"include_custom_fields": "true", "limit": 100}
+    for page_tasks in iter_pages(client, f"list/{list_id}/task", params=params):
+        for task in page_tasks:
+            if task.get("status", {}).get("id") == status_id:
+                yield project_task(task, field_index)
+
+# ------------------------------
+# INCREMENTAL GROUPING
+# ------------------------------
+
+class StreamingGrouper:
+    """
+    Incremental counterpart of group_tasks() for a stream of BrandRecords.
+
+    Only minimal indexes stay resident: the set of active ids, the mother link
+    and name of brands that have a mother, and the full records of brands that
+    bill somewhere in [start_date, end_date]. Every other record is dropped
+    once it has been seen. With a BrandValidation, each brand's own fields are
+    validated as it arrives and its mother link once every brand has been seen.
+    """
+
+    def __init__(self, start_date, end_date, validation=None):
+        self.billing_days = billing_days_in_range(start_date, end_date)
+        self.active_ids = set()
+        self.linked_ids = []   # ids of brands with a mother link, in arrival order
+        self.mother_of = {}    # child_id -> mother_id
+        self.names = {}        # child_id -> name
+        self.candidates = []   # records billing within the range
+        self.count = 0
+        self.validation = validation
+
+    def add(self, brand):
+        self.count += 1
+        self.active_ids.add(brand.id)
+        if self.validation is not None:
+            self.validation.check(brand)
+        if brand.mother_id:
+            self.linked_ids.append(brand.id)
+            self.mother_of[brand.id] = brand.mother_id
+            self.names[brand.id] = brand.name
+        if brand.billing_day in self.billing_days and brand.payment_term is not None:
+            self.candidates.append(brand)
+
+    def finish(self):
+        """
+        Resolve the groups once every brand has been seen.
+        Returns (independent, parent, parent_children_names, parent_children_ids, hierarchy),
+        restricted to brands billing within the range.
+        """
+        if self.validation is not None:
+            for brand_id in self.linked_ids:
+                link = BrandRecord(brand_id, self.names[brand_id], None, mother_id=self.mother_of[brand_id])
+                self.validation.check_links(link, self.active_ids)
+        hierarchy = resolve_hierarchy(self.linked_ids, self.mother_of, active=self.active_ids)
+        parent_children_ids = hierarchy.descendants
+        parent_children_names = {
+            root_id: [self.names[brand_id] for brand_id in descendant_ids]
+            for root_id, descendant_ids in parent_children_ids.items()
+        }
+
+        independent = []
+        parent = []
+        for brand in self.candidates:
+            root = hierarchy.roots.get(brand.id, brand.id)
+            if root != brand.id:
+                continue  # billed on its root brand's invoice, or stranded by a cycle
+            if brand.id in parent_children_ids:
+                parent.append(brand)
+            else:
+                independent.append(brand)
+        return independent, parent, parent_children_names, parent_children_ids, hierarchy
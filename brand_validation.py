@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+from collections import namedtuple
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+ERROR = "error"        # the brand is not invoiced until it is fixed
+WARNING = "warning"    # the brand is invoiced, but probably not as intended
+SEVERITY_ORDER = {WARNING: 1, ERROR: 2}
+
+VALIDATION_REPORT_TITLE = "The following brands failed validation:"
+VALIDATION_COLUMNS = ["brand_id", "brand_name", "severity", "rule", "message"]
+
+ValidationRule = namedtuple("ValidationRule", ["name", "severity", "check"])
+ValidationIssue = namedtuple("ValidationIssue", ["brand_id", "brand_name", "rule", "severity", "message"])
+
+# ------------------------------
+# RULES
+# ------------------------------
+# A rule's check(brand, active_ids) returns a message when the BrandRecord breaks it, else None.
+# FIELD_RULES only look at the brand itself; LINK_RULES need the ids of every active brand.
+
+def _billing_day_missing(brand, active_ids):
+    if brand.billing_day is None:
+        return "Billing Day is missing"
+
+def _billing_day_range(brand, active_ids):
+    if brand.billing_day is not None and not 1 <= brand.billing_day <= 31:
+        return f"Billing Day {brand.billing_day} is not between 1 and 31"
+
+def _payment_terms_missing(brand, active_ids):
+    if brand.payment_term is None:
+        return "Payment Terms is missing"
+
+def _payment_terms_value(brand, active_ids):
+    if brand.payment_term is not None and brand.payment_term not in (0, 1):
+        return f"Payment Terms {brand.payment_term} is neither pre-paid (0) nor post-paid (1)"
+
+def _mother_inactive(brand, active_ids):
+    if brand.mother_id and brand.mother_id != brand.id and brand.mother_id not in active_ids:
+        return f"Mother Brand {brand.mother_id} is not an active brand, so this brand is invoiced on its own"
+
+FIELD_RULES = [
+    ValidationRule("billing_day_missing", ERROR, _billing_day_missing),
+    ValidationRule("billing_day_range", ERROR, _billing_day_range),
+    ValidationRule("payment_terms_missing", ERROR, _payment_terms_missing),
+    ValidationRule("payment_terms_value", ERROR, _payment_terms_value),
+]
+LINK_RULES = [
+    ValidationRule("mother_inactive", WARNING, _mother_inactive),
+]
+RULES = FIELD_RULES + LINK_RULES
+
+# ------------------------------
+# RESULT
+# ------------------------------
+
+class BrandValidation:
+    """
+    Issues found while brands are grouped, in the order the brands were seen.
+
+    check() is called from the grouping loop (group_tasks() or StreamingGrouper),
+    so validation costs no pass of its own. Brands with an ERROR are in
+    `blocked_ids` and are left out of the invoice plan.
+    """
+
+    def __init__(self):
+        self.issues = []
+        self.blocked_ids = set()
+        self.checked = 0
+
+    def check(self, brand, active_ids=None):
+        """
+        Apply every rule to one brand, or only FIELD_RULES when active_ids is not known yet.
+        """
+        self.checked += 1
+        self._apply(RULES if active_ids is not None else FIELD_RULES, brand, active_ids)
+
+    def check_links(self, brand, active_ids):
+        """
+        Apply LINK_RULES to a brand already passed to check() without active_ids.
+        """
+        self._apply(LINK_RULES, brand, active_ids)
+
+    def _apply(self, rules, brand, active_ids):
+        for rule in rules:
+            message = rule.check(brand, active_ids)
+            if message:
+                self.issues.append(ValidationIssue(brand.id, brand.name, rule.name, rule.severity, message))
+                if rule.severity == ERROR:
+                    self.blocked_ids.add(brand.id)
+
+    def by_brand(self):
+        """
+        Return [(brand_id, brand_name, severity, [issues])], worst severity per brand.
+        """
+        grouped = {}
+        for issue in self.issues:
+            grouped.setdefault(issue.brand_id, []).append(issue)
+        return [
+            (brand_id, issues[0].brand_name, max((issue.severity for issue in issues), key=SEVERITY_ORDER.get), issues)
+            for brand_id, issues in grouped.items()
+        ]
+
+    def counts(self):
+        counts = {ERROR: 0, WARNING: 0}
+        for _, _, severity, _ in self.by_brand():
+            counts[severity] += 1
+        return counts
+
+    def report_entries(self):
+        """
+        One email line per brand with issues.
+        """
+        return [
+            f"[{severity}] Brand '{name}' (ID: {brand_id}): {'; '.join(issue.message for issue in issues)}"
+            for brand_id, name, severity, issues in self.by_brand()
+        ]
+
+    def format_report(self):
+        entries = self.report_entries()
+        if not entries:
+            return None
+        return VALIDATION_REPORT_TITLE + "\n\n" + "\n".join(entries)
+
+    def write(self, path):
+        """
+        Write every issue to `path`: JSON if it ends in .json, CSV otherwise.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", newline="") as f:
+            if path.endswith(".json"):
+                brands = [
+                    {"brand_id": brand_id, "brand_name": name, "severity": severity,
+                     "issues": [{"rule": issue.rule, "severity": issue.severity, "message": issue.message}
+                                for issue in issues]}
+                    for brand_id, name, severity, issues in self.by_brand()
+                ]
+                json.dump({"checked": self.checked, "counts": self.counts(), "brands": brands}, f, indent=1)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(VALIDATION_COLUMNS)
+                writer.writerows((issue.brand_id, issue.brand_name, issue.severity, issue.rule, issue.message)
+                                 for issue in self.issues)
+        os.replace(tmp_path, path)
@@ -0,0 +1,96 @@
+"""
+Single entry point for the ClickUp scripts.
+
+    python cli.py run-invoices [main.py options]
+    python cli.py backfill --from 2026-10-01 --to 2026-10-05 [main.py options]
+    python cli.py list-statuses [--list-id ID]
+    python cli.py list-fields [--list-id ID]
+    python cli.py list-users
+    python cli.py show-groups
+    python cli.py history volume [brand_history.py options]
+
+Each subcommand imports only the modules it needs, so e.g. list-users never
+loads the invoice pipeline, SQLite or the mailer. Credentials come from
+credentials.py (CLICKUP_API_KEY / credentials.json) for every subcommand.
+"""
+import argparse
+import sys
+
+# ------------------------------
+# SUBCOMMANDS
+# ------------------------------
+
+def run_invoices(args):
+    import main
+    return main.main(args.options)
+
+def backfill(args):
+    import main
+    return main.main(["--from", args.from_date, "--to", args.to_date] + args.options)
+
+def list_statuses(args):
+    import statuses
+    statuses.main(args.list_id or statuses.LIST_ID)
+
+def list_fields(args):
+    import custom_field_ids
+    custom_field_ids.main(args.list_id or custom_field_ids.LIST_ID)
+
+def list_users(args):
+    import get_team_members
+    get_team_members.main()
+
+def show_groups(args):
+    import test_grouping
+    test_grouping.main()
+
+def history(args):
+    import brand_history
+    brand_history.main(args.options)
+
+# ------------------------------
+# ARGUMENTS
+# ------------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ClickUp billing automation and workspace tools.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    # run-invoices and backfill pass any options they do not know on to main.py.
+    command = commands.add_parser("run-invoices", help="Create today's invoices (same options as main.py).")
+    command.set_defaults(handler=run_invoices, passes_options=True)
+
+    command = commands.add_parser("backfill", help="Create or plan the invoices of a range of run dates.")
+    command.add_argument("--from", dest="from_date", required=True, help="First run date (YYYY-MM-DD).")
+    command.add_argument("--to", dest="to_date", required=True, help="Last run date (YYYY-MM-DD).")
+    command.set_defaults(handler=backfill, passes_options=True)
+
+    command = commands.add_parser("list-statuses", help="Print the statuses of a list.")
+    command.add_argument("--list-id", help="Defaults to the Brands Basket list.")
+    command.set_defaults(handler=list_statuses)
+
+    command = commands.add_parser("list-fields", help="Print the custom fields of a list.")
+    command.add_argument("--list-id")
+    command.set_defaults(handler=list_fields)
+
+    command = commands.add_parser("list-users", help="Print the members of every workspace.")
+    command.set_defaults(handler=list_users)
+
+    command = commands.add_parser("show-groups", help="Print the independent, dependent and parent brands.")
+    command.set_defaults(handler=show_groups)
+
+    command = commands.add_parser("history", help="Query the daily brand snapshots (same options as brand_history.py).")
+    command.set_defaults(handler=history, passes_options=True)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args, options = parser.parse_known_args(argv)
+    if options and not getattr(args, "passes_options", False):
+        parser.error(f"unrecognized arguments: {' '.join(options)}")
+    args.options = options
+    return args.handler(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
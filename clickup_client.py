@@ -0,0 +1,338 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from run_metrics import endpoint_template, get_metrics
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+API_BASE_URL = "https://api.clickup.com/api/v2"
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5   # seconds
+BACKOFF_MAX = 30.0   # seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A POST may have created something even if its response was lost or was a 5xx,
+# so it is only re-sent when the server certainly did not act on it.
+NON_IDEMPOTENT_METHODS = {"POST"}
+NON_IDEMPOTENT_RETRY_STATUSES = {429}
+POOL_SIZE = 16
+PAGE_CONCURRENCY = 4
+REQUEST_TIMEOUT = 30  # seconds
+
+# ------------------------------
+# RATE BUDGET
+# ------------------------------
+
+class RateBudget:
+    """
+    Token bucket shared by every request of the process: at most `per_minute`
+    requests per rolling minute, with bursts up to the same size.
+    """
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.per_minute, self.tokens + (now - self._updated) * self.per_minute / 60.0)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) * 60.0 / self.per_minute
+            time.sleep(delay)
+
+# ------------------------------
+# CLIENT
+# ------------------------------
+
+def _not_sent(error):
+    """
+    True if a requests exception was raised before the request reached the server.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+class ClickUpClient:
+    """
+    Thin wrapper around a pooled requests.Session for the ClickUp API.
+
+    Connections are kept alive between calls, and 429/5xx responses are
+    retried with jittered exponential backoff. POSTs are only retried on 429
+    and on connection errors raised before the request was sent, so a create
+    that reached ClickUp is never sent twice. When ClickUp reports that the
+    rate limit is exhausted (X-RateLimit-Remaining: 0) the client waits until
+    X-RateLimit-Reset before sending the next request. With a RateBudget every
+    attempt first takes a token from it, and with a SharedRateBudget (see
+    shared_rate_budget.py) also from the budget shared with other processes.
+    """
+
+    def __init__(self, access_token, base_url=None, max_retries=MAX_RETRIES, budget=None, shared_budget=None):
+        self.access_token = access_token
+        self.budget = budget
+        self.shared_budget = shared_budget
+        # CLICKUP_API_BASE_URL can point at a local stand-in (see fake_clickup.py) to run offline.
+        base_url = base_url or os.getenv("CLICKUP_API_BASE_URL") or API_BASE_URL
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": access_token,
+            "Content-Type": "application/json",
+            "accept": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._resume_at = 0.0  # epoch seconds before which no request is sent
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _wait_for_rate_limit(self):
+        with self._lock:
+            delay = self._resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _note_rate_limit(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+        limit = response.headers.get("X-RateLimit-Limit")
+        get_metrics().record_rate_limit(remaining, int(limit) if limit and limit.isdigit() else None)
+        if remaining <= 0:
+            with self._lock:
+                self._resume_at = max(self._resume_at, reset)
+            if self.shared_budget is not None:
+                self.shared_budget.pause_until(reset)
+
+    def _backoff_delay(self, attempt, response):
+        if response is not None and response.status_code == 429:
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset:
+                try:
+                    return max(0.0, float(reset) - time.time()) + random.uniform(0, BACKOFF_BASE)
+                except ValueError:
+                    pass
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request and return the final response.
+        Retries 429/5xx responses and connection errors up to max_retries times
+        (POSTs only on 429 and unsent requests); the last response (or
+        exception) is returned (or raised) to the caller.
+        """
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        url = self.url(path)
+        endpoint = endpoint_template(url)
+        idempotent = method.upper() not in NON_IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else NON_IDEMPOTENT_RETRY_STATUSES
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            if self.budget is not None:
+                self.budget.acquire()
+            if self.shared_budget is not None:
+                self.shared_budget.acquire()
+            self._wait_for_rate_limit()
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or _not_sent(e)):
+                    get_metrics().record_call("clickup", method, endpoint, time.perf_counter() - started,
+                                              ok=False, retries=attempt)
+                    raise
+            if response is not None:
+                self._note_rate_limit(response)
+                if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                    body = response.request.body
+                    get_metrics().record_call(
+                        "clickup", method, endpoint, time.perf_counter() - started,
+                        ok=response.status_code < 400, retries=attempt,
+                        bytes_sent=len(body) if body else 0, bytes_received=len(response.content),
+                    )
+                    return response
+            delay = self._backoff_delay(attempt, response)
+            status = response.status_code if response is not None else "connection error"
+            print(f"Retrying {method} {url} after {status} (attempt {attempt + 1}/{self.max_retries}) in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+        if self.shared_budget is not None:
+            self.shared_budget.close()
+
+# ------------------------------
+# PAGINATION
+# ------------------------------
+
+class ClickUpError(Exception):
+    pass
+
+class PaginationError(ClickUpError):
+    pass
+
+def iter_pages(client, path, params=None, items_key="tasks", concurrency=PAGE_CONCURRENCY):
+    """
+    Yield the items of a page-numbered ClickUp collection one page at a time, in page order.
+
+    Page 0 is requested on its own, so a single-page collection costs one
+    request. Each page that reports more to follow widens the read-ahead by one,
+    up to `concurrency` pages ahead of the one being consumed, so short
+    collections do not pay for pages past their end. Fetching stops at the first page
+    that reports `last_page` (or comes back empty). Raises PaginationError if a
+    page cannot be retrieved.
+    """
+    params = dict(params or {})
+
+    def fetch(page):
+        response = client.get(path, params={**params, "page": page})
+        if response.status_code != 200:
+            print(f"Failed to retrieve {path} page {page}: {response.status_code}")
+            return None
+        return response.json()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        in_flight = {0: pool.submit(fetch, 0)}
+        try:
+            next_page = 1
+            page = 0
+            while page in in_flight:
+                data = in_flight.pop(page).result()
+                if data is None:
+                    raise PaginationError(f"Failed to retrieve {path} page {page}")
+                page_items = data.get(items_key, [])
+                last = not page_items or data.get("last_page", False)
+                if not last:
+                    while next_page <= page + min(page + 1, max(1, concurrency)):
+                        in_flight[next_page] = pool.submit(fetch, next_page)
+                        next_page += 1
+                yield page_items
+                if last:
+                    break
+                page += 1
+        finally:
+            for future in in_flight.values():
+                future.cancel()
+
+def fetch_pages(client, path, params=None, items_key="tasks", concurrency=PAGE_CONCURRENCY):
+    """
+    Fetch every page of a collection (see iter_pages).
+    Returns (items, ok) where ok is False if any page failed.
+    """
+    items = []
+    try:
+        for page_items in iter_pages(client, path, params, items_key, concurrency):
+            items.extend(page_items)
+    except PaginationError:
+        return items, False
+    return items, True
+
+# ------------------------------
+# SHARED INSTANCE
+# ------------------------------
+
+_clients = {}
+_clients_lock = threading.Lock()
+_shared_budget = None
+_rate_priority = None
+
+def cross_process_budget(access_token):
+    """
+    Return a SharedRateBudget for the token if CLICKUP_RATE_LIMIT (requests per minute) is set, else None.
+    CLICKUP_RATE_BURST, CLICKUP_RATE_BUDGET_PATH and CLICKUP_RATE_PRIORITY tune it.
+    """
+    per_minute = os.getenv("CLICKUP_RATE_LIMIT")
+    if not per_minute:
+        return None
+    from shared_rate_budget import DEFAULT_BUDGET_PATH, DEFAULT_PRIORITY, SharedRateBudget
+    burst = os.getenv("CLICKUP_RATE_BURST")
+    priority = os.getenv("CLICKUP_RATE_PRIORITY") or _rate_priority or DEFAULT_PRIORITY
+    return SharedRateBudget(access_token, int(per_minute), priority,
+                            os.getenv("CLICKUP_RATE_BUDGET_PATH") or DEFAULT_BUDGET_PATH,
+                            int(burst) if burst else None)
+
+def get_client(access_token):
+    """
+    Return the shared ClickUpClient for this access token, creating it on first use.
+    """
+    with _clients_lock:
+        client = _clients.get(access_token)
+        if client is None:
+            client = ClickUpClient(access_token, budget=_shared_budget,
+                                   shared_budget=cross_process_budget(access_token))
+            _clients[access_token] = client
+        return client
+
+def set_rate_priority(priority):
+    """
+    Set this process's priority ("high", "normal" or "low") in the cross-process
+    budget; CLICKUP_RATE_PRIORITY overrides it.
+    """
+    global _rate_priority
+    with _clients_lock:
+        _rate_priority = priority
+        priority = os.getenv("CLICKUP_RATE_PRIORITY") or priority
+        for client in _clients.values():
+            if client.shared_budget is not None:
+                client.shared_budget.priority = priority
+
+def set_rate_budget(per_minute):
+    """
+    Cap every shared client at `per_minute` requests per minute in total (None removes the cap).
+    """
+    global _shared_budget
+    with _clients_lock:
+        _shared_budget = RateBudget(per_minute) if per_minute else None
+        for client in _clients.values():
+            client.budget = _shared_budget
+
+def reset_clients():
+    """
+    Close and forget all shared clients, e.g. after changing CLICKUP_API_BASE_URL.
+    """
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,45 @@
+"""
+Credentials shared by every script: environment variables first, then credentials.json.
+"""
+import json
+import os
+
+CREDENTIALS_PATH = "credentials.json"
+
+def load_credentials_file(path=CREDENTIALS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+def get_clickup_api_key():
+    access_token = os.getenv('CLICKUP_API_KEY')
+    if not access_token:
+        try:
+            access_token = load_credentials_file().get('CLICKUP_API_KEY')
+        except Exception as e:
+            print("Error loading API key:", e)
+            exit(1)
+    return access_token
+
+def get_smtp_settings():
+    """
+    Retrieve SMTP settings from environment variables.
+    If not available, fallback to reading from credentials.json.
+    Raises RuntimeError when the settings cannot be found.
+    """
+    smtp_server = os.getenv("SMTP_SERVER")
+    smtp_port = os.getenv("SMTP_PORT")
+    smtp_user = os.getenv("SMTP_USER")
+    smtp_password = os.getenv("SMTP_PASSWORD")
+    if not (smtp_server and smtp_port and smtp_user and smtp_password):
+        try:
+            creds = load_credentials_file()
+            smtp_server = smtp_server or creds.get("SMTP_SERVER")
+            smtp_port = smtp_port or creds.get("SMTP_PORT")
+            smtp_user = smtp_user or creds.get("SMTP_USER")
+            smtp_password = smtp_password or creds.get("SMTP_PASSWORD")
+        except Exception as e:
+            raise RuntimeError(f"Error loading SMTP settings: {e}") from e
+    if not (smtp_server and smtp_port and smtp_user and smtp_password):
+        raise RuntimeError("Error loading SMTP settings: SMTP_SERVER, SMTP_PORT, SMTP_USER "
+                           "and SMTP_PASSWORD are required")
+    return smtp_server, int(smtp_port), smtp_user, smtp_password
@@ -1,15 +1,10 @@
-import requests
-import os
-import json
+from clickup_client import get_client
+from credentials import get_clickup_api_key
 
-def get_custom_fields(list_id, access_token):
-    url = f"https://api.clickup.com/api/v2/list/{list_id}/field"
-    headers = {
-        'Authorization': access_token,
-        'Content-Type': 'application/json'
-    }
+LIST_ID = "901200839358"
 
-    response = requests.get(url, headers=headers)
+def get_custom_fields(list_id, access_token):
+    response = get_client(access_token).get(f"list/{list_id}/field")
     if response.status_code == 200:
         fields = response.json()
         return fields
@@ -17,14 +12,16 @@ def get_custom_fields(list_id, access_token):
         print(f"Failed to retrieve custom fields: {response.status_code}")
         return None
 
-# Replace 'YOUR_ACCESS_TOKEN' with your actual ClickUp API token
-access_token = os.getenv('CLICKUP_API_KEY') or json.load(open('credentials.json'))['CLICKUP_API_KEY']
-list_id = "901200839358"
+def print_custom_fields(custom_fields):
+    if custom_fields:
+        print("Custom Fields:")
+        print(custom_fields)
+    else:
+        print("No custom fields found or an error occurred.")
+
+def main(list_id=LIST_ID):
+    # Retrieve custom fields
+    print_custom_fields(get_custom_fields(list_id, get_clickup_api_key()))
 
-# Retrieve custom fields
-custom_fields = get_custom_fields(list_id, access_token)
-if custom_fields:
-    print("Custom Fields:")
-    print(custom_fields)
-else:
-    print("No custom fields found or an error occurred.")
+if __name__ == '__main__':
+    main()
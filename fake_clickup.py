@@ -0,0 +1,625 @@
+"""
+Local stand-in for the parts of the ClickUp API used by these scripts.
+
+Serves list tasks (paginated, with status, date and custom field filters),
+task creation and deletion, custom fields, watchers, list statuses and teams
+from in-memory state, with optional latency, 429 injection and a per-minute
+rate limit. It can also proxy to the real API and save every response as a
+fixture (--record), or serve only saved fixtures (--replay).
+
+    python fake_clickup.py --brands 1000 --port 8900
+    CLICKUP_API_BASE_URL=http://127.0.0.1:8900/api/v2 CLICKUP_API_KEY=test python main.py
+
+    python fake_clickup.py --benchmark 100,1000,10000
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import main as invoice_main
+from clickup_client import reset_clients
+from main import (
+    LIST_ID, DESTINATION_LIST_ID, STATUS_ID, BILLING_DAY_FIELD_ID, PAYMENT_TERMS_FIELD_ID,
+    MOTHER_BRAND_FIELD_ID, RELATIONSHIP_FIELD_ID, REMOVED_WATCHER_USER_ID, WATCHER_USER_ID,
+)
+from fake_smtp import start_smtp_server
+from task_filters import FieldPredicate, predicate_matches
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+UPSTREAM_URL = "https://api.clickup.com"
+PAGE_SIZE = 100
+INACTIVE_STATUS_ID = "sc42370637_inactive"
+TEAM_ID = "9000000"
+
+# ------------------------------
+# SYNTHETIC DATA
+# ------------------------------
+
+def _field_value(task, field_id):
+    for field in task.get("custom_fields", ()):
+        if field.get("id") == field_id:
+            return field.get("value")
+    return None
+
+def _field(field_id, name, field_type, value=None):
+    field = {"id": field_id, "name": name, "type": field_type}
+    if value is not None:
+        field["value"] = value
+    return field
+
+def generate_brands(count, extra_fields=10, mother_ratio=0.1, inactive_ratio=0.1, missing_ratio=0.02, seed=0,
+                    mother_pool=None, shared_extras=False):
+    """
+    Build `count` synthetic Brands Basket tasks shaped like the real ones.
+
+    extra_fields is a count or a (low, high) range drawn per task. Mother
+    brands are drawn from the first `mother_pool` brands (default: any earlier
+    brand), so a small pool gives a few mothers with many children. With
+    shared_extras the unrelated fields are the same dicts in every task, which
+    keeps 100k-brand payloads in memory; do not edit them through the server.
+    """
+    rng = random.Random(seed)
+    now = int(time.time() * 1000)
+    low, high = extra_fields if isinstance(extra_fields, tuple) else (extra_fields, extra_fields)
+    extras = [_field(f"extra-{n}", f"Extra {n}", "short_text", f"value {n}") for n in range(high)]
+    tasks = []
+    for i in range(count):
+        task_id = f"brand{i}"
+        pool = min(i, mother_pool) if mother_pool else i
+        fields = [
+            _field(BILLING_DAY_FIELD_ID, "Billing Day", "number",
+                   None if rng.random() < missing_ratio else str(rng.randint(1, 31))),
+            _field(PAYMENT_TERMS_FIELD_ID, "Payment Terms", "drop_down", rng.randint(0, 1)),
+            _field(MOTHER_BRAND_FIELD_ID, "Mother Brand", "list_relationship",
+                   [{"id": f"brand{rng.randrange(pool)}"}] if pool and rng.random() < mother_ratio else None),
+        ]
+        n_extras = rng.randint(low, high) if low != high else high
+        if shared_extras:
+            fields.extend(extras[:n_extras])
+        else:
+            fields.extend(dict(field) for field in extras[:n_extras])
+        rng.shuffle(fields)
+        tasks.append({
+            "id": task_id,
+            "name": f"Brand {i}",
+            "status": {"id": INACTIVE_STATUS_ID if rng.random() < inactive_ratio else STATUS_ID, "status": "active"},
+            "date_created": str(now - 86400000 * 30),
+            "date_updated": str(now - rng.randint(0, 86400000 * 30)),
+            "archived": False,
+            "custom_fields": fields,
+        })
+    return tasks
+
+# ------------------------------
+# STATE
+# ------------------------------
+
+class FakeClickUp:
+    """
+    In-memory ClickUp workspace plus fault-injection settings.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit=None, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit   # requests per minute, None for unlimited
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.lists = {}                # list_id -> list of task dicts
+        self.fields = {}               # list_id -> list of field definitions
+        self.statuses = {}             # list_id -> list of statuses
+        self.members = [
+            {"user": {"id": int(WATCHER_USER_ID), "username": "Nadia"}},
+            {"user": {"id": int(REMOVED_WATCHER_USER_ID), "username": "Automation"}},
+        ]
+        self.spaces = []               # {"id", "name", "folders": [{"id", "name", "lists": [list_id]}], "lists": [list_id]}
+        self.list_names = {}           # list_id -> name
+        self.comments = {}             # task_id -> comments, newest first
+        self.docs = {}                 # doc_id -> {"doc": doc, "pages": nested pages with "content"}
+        self.webhooks = []             # registered webhooks
+        self.requests = []             # (method, path) of every request served
+        self._window_start = time.time()
+        self._window_count = 0
+        self._next_id = 0
+
+    def add_list(self, list_id, tasks=(), fields=None, statuses=None, name=None):
+        self.lists[list_id] = list(tasks)
+        self.list_names[list_id] = name or f"List {list_id}"
+        self.fields[list_id] = fields or []
+        self.statuses[list_id] = statuses or []
+
+    def new_task_id(self):
+        with self.lock:
+            self._next_id += 1
+            return f"new{self._next_id}"
+
+    def find_task(self, task_id):
+        for tasks in self.lists.values():
+            for task in tasks:
+                if task["id"] == task_id:
+                    return task
+        return None
+
+    def rate_limit_headers(self):
+        """
+        Count one request against the rate limit. Returns (allowed, headers).
+        """
+        with self.lock:
+            now = time.time()
+            if now - self._window_start >= 60:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self.rate_limit is None:
+                return True, {}
+            remaining = max(0, self.rate_limit - self._window_count)
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": str(int(self._window_start + 60)),
+            }
+            return self._window_count <= self.rate_limit, headers
+
+def generate_comments(task_id, count, seed=0):
+    """
+    Build `count` synthetic comments for a task, newest first.
+    """
+    rng = random.Random(f"{seed}-{task_id}")
+    now = int(time.time() * 1000)
+    dates = sorted((now - rng.randint(0, 86400000 * 365) for _ in range(count)), reverse=True)
+    return [
+        {"id": f"{task_id}-c{n}", "date": str(date), "comment_text": f"Comment {n} on {task_id}",
+         "user": {"id": 1, "username": "Automation"}}
+        for n, date in enumerate(dates)
+    ]
+
+def generate_docs(count, pages_per_doc=5, seed=0):
+    """
+    Build `count` synthetic docs, each with a page that has one sub-page.
+    """
+    rng = random.Random(seed)
+    now = int(time.time() * 1000)
+    docs = {}
+    for d in range(count):
+        doc_id = f"doc{d}"
+        pages = [
+            {"id": f"{doc_id}-p{p}", "name": f"Page {p}", "content": f"# Page {p} of {doc_id}\n\n" + "Lorem ipsum. " * 50,
+             "pages": []}
+            for p in range(pages_per_doc)
+        ]
+        if len(pages) > 1:
+            pages[0]["pages"].append(pages.pop())
+        docs[doc_id] = {
+            "doc": {"id": doc_id, "name": f"Doc {d}", "date_updated": str(now - rng.randint(0, 86400000 * 90)),
+                    "deleted": False},
+            "pages": pages,
+        }
+    return docs
+
+def build_workspace(brand_count, extra_fields=10, missing_ratio=0.02, **kwargs):
+    """
+    FakeClickUp with a Brands Basket of `brand_count` synthetic brands and an empty destination list.
+    """
+    fake = FakeClickUp(**kwargs)
+    fields = [
+        _field(BILLING_DAY_FIELD_ID, "Billing Day", "number"),
+        _field(PAYMENT_TERMS_FIELD_ID, "Payment Terms", "drop_down"),
+        _field(MOTHER_BRAND_FIELD_ID, "Mother Brand", "list_relationship"),
+    ]
+    statuses = [{"id": STATUS_ID, "status": "active"}, {"id": INACTIVE_STATUS_ID, "status": "inactive"}]
+    fake.add_list(LIST_ID, generate_brands(brand_count, extra_fields, missing_ratio=missing_ratio), fields, statuses,
+                  name="Brands Basket")
+    fake.add_list(DESTINATION_LIST_ID, [], [_field(RELATIONSHIP_FIELD_ID, "Brand", "list_relationship")],
+                  name="Retention Funnel")
+    fake.spaces = [{"id": "space1", "name": "Sales",
+                    "folders": [{"id": "folder1", "name": "Clients", "lists": [LIST_ID]}],
+                    "lists": [DESTINATION_LIST_ID]}]
+    return fake
+
+# ------------------------------
+# REQUEST HANDLING
+# ------------------------------
+
+ROUTES = [
+    ("GET", re.compile(r"^/api/v2/list/([^/]+)/task$"), "list_tasks"),
+    ("POST", re.compile(r"^/api/v2/list/([^/]+)/task$"), "create_task"),
+    ("GET", re.compile(r"^/api/v2/list/([^/]+)/field$"), "list_fields"),
+    ("GET", re.compile(r"^/api/v2/list/([^/]+)$"), "get_list"),
+    ("POST", re.compile(r"^/api/v2/task/([^/]+)/field/([^/]+)$"), "set_field"),
+    ("PUT", re.compile(r"^/api/v2/task/([^/]+)$"), "update_task"),
+    ("GET", re.compile(r"^/api/v2/task/([^/]+)$"), "get_task"),
+    ("DELETE", re.compile(r"^/api/v2/task/([^/]+)$"), "delete_task"),
+    ("GET", re.compile(r"^/api/v2/team$"), "get_teams"),
+    ("GET", re.compile(r"^/api/v2/team/([^/]+)/space$"), "get_spaces"),
+    ("POST", re.compile(r"^/api/v2/team/([^/]+)/webhook$"), "create_webhook"),
+    ("GET", re.compile(r"^/api/v2/space/([^/]+)/folder$"), "get_folders"),
+    ("GET", re.compile(r"^/api/v2/space/([^/]+)/list$"), "get_space_lists"),
+    ("GET", re.compile(r"^/api/v2/folder/([^/]+)/list$"), "get_folder_lists"),
+    ("GET", re.compile(r"^/api/v2/task/([^/]+)/comment$"), "get_comments"),
+    ("GET", re.compile(r"^/api/v3/workspaces/([^/]+)/docs$"), "list_docs"),
+    ("GET", re.compile(r"^/api/v3/workspaces/([^/]+)/docs/([^/]+)/page_listing$"), "list_doc_pages"),
+    ("GET", re.compile(r"^/api/v3/workspaces/([^/]+)/docs/([^/]+)/pages/([^/]+)$"), "get_doc_page"),
+]
+
+def fixture_key(method, path, query):
+    raw = f"{method} {path}?{'&'.join(sorted(query.split('&'))) if query else ''}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+class FakeClickUpHandler(BaseHTTPRequestHandler):
+    fake = None          # FakeClickUp
+    record_dir = None    # save upstream responses here
+    replay_dir = None    # serve only saved responses from here
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        if self.command == "GET" and status == 200:
+            etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+            headers = {**(headers or {}), "ETag": etag}
+            if self.headers.get("If-None-Match") == etag:
+                status, payload = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _handle(self, method):
+        parsed = urlparse(self.path)
+        if self.record_dir or self.replay_dir:
+            return self._record_or_replay(method, parsed)
+
+        fake = self.fake
+        fake.requests.append((method, parsed.path))
+        if fake.latency:
+            time.sleep(fake.latency)
+        allowed, headers = fake.rate_limit_headers()
+        if allowed and fake.error_rate and fake.rng.random() < fake.error_rate:
+            # Injected 429s ask the client to back off for about a second.
+            headers["X-RateLimit-Reset"] = str(int(time.time()) + 1)
+            allowed = False
+        if not allowed:
+            headers["X-RateLimit-Remaining"] = "0"
+            return self._send(429, {"err": "Rate limit reached", "ECODE": "APP_002"}, headers)
+
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(parsed.path)
+            if route_method == method and match:
+                status, body = getattr(self, name)(*match.groups(), query=parse_qs(parsed.query))
+                return self._send(status, body, headers)
+        return self._send(404, {"err": "Route not found", "ECODE": "APP_001"}, headers)
+
+    def _record_or_replay(self, method, parsed):
+        directory = self.replay_dir or self.record_dir
+        path = os.path.join(directory, fixture_key(method, parsed.path, parsed.query) + ".json")
+        if self.replay_dir:
+            if not os.path.exists(path):
+                return self._send(404, {"err": f"No fixture for {method} {self.path}"})
+            with open(path) as f:
+                fixture = json.load(f)
+            return self._send(fixture["status"], fixture["body"])
+        length = int(self.headers.get("Content-Length") or 0)
+        response = requests.request(
+            method, UPSTREAM_URL + self.path,
+            headers={"Authorization": self.headers.get("Authorization", ""), "Content-Type": "application/json"},
+            data=self.rfile.read(length) if length else None,
+        )
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"raw": response.text}
+        with open(path, "w") as f:
+            json.dump({"method": method, "path": self.path, "status": response.status_code, "body": body}, f, indent=2)
+        return self._send(response.status_code, body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    # Endpoints ------------------------------------------------------------
+
+    def list_tasks(self, list_id, query):
+        tasks = self.fake.lists.get(list_id)
+        if tasks is None:
+            return 404, {"err": "List not found", "ECODE": "ITEM_013"}
+        archived = query.get("archived", ["false"])[0] == "true"
+        selected = [task for task in tasks if bool(task.get("archived")) == archived]
+        if "date_updated_gt" in query:
+            since = int(query["date_updated_gt"][0])
+            selected = [task for task in selected if int(task.get("date_updated") or 0) > since]
+        if "date_created_gt" in query:
+            since = int(query["date_created_gt"][0])
+            selected = [task for task in selected if int(task.get("date_created") or 0) > since]
+        statuses = query.get("statuses[]")
+        if statuses:
+            selected = [task for task in selected if task["status"].get("status") in statuses]
+        if "custom_fields" in query:
+            try:
+                predicates = [FieldPredicate(entry["field_id"], entry["operator"], entry.get("value"))
+                              for entry in json.loads(query["custom_fields"][0])]
+            except (ValueError, KeyError, TypeError):
+                return 400, {"err": "Invalid custom_fields filter", "ECODE": "FIELD_026"}
+            selected = [task for task in selected if all(
+                predicate_matches(predicate, _field_value(task, predicate.field_id)) for predicate in predicates)]
+        page = int(query.get("page", ["0"])[0])
+        chunk = selected[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        if query.get("include_custom_fields", ["true"])[0] == "false":
+            chunk = [{key: value for key, value in task.items() if key != "custom_fields"} for task in chunk]
+        return 200, {"tasks": chunk, "last_page": (page + 1) * PAGE_SIZE >= len(selected)}
+
+    def create_task(self, list_id, query):
+        tasks = self.fake.lists.get(list_id)
+        if tasks is None:
+            return 404, {"err": "List not found", "ECODE": "ITEM_013"}
+        body = self._body()
+        now = str(int(time.time() * 1000))
+        custom_fields = []
+        for field in body.get("custom_fields", []):
+            value = field.get("value")
+            if isinstance(value, dict):
+                value = [{"id": task_id} for task_id in value.get("add", [])]
+            custom_fields.append({"id": field["id"], "value": value})
+        task = {
+            "id": self.fake.new_task_id(),
+            "name": body.get("name"),
+            "description": body.get("description"),
+            "due_date": str(body.get("due_date")) if body.get("due_date") else None,
+            "status": {"id": f"sc{list_id}_open", "status": "to do"},
+            "date_created": now,
+            "date_updated": now,
+            "archived": False,
+            "custom_fields": custom_fields,
+            "watchers": [{"id": int(REMOVED_WATCHER_USER_ID)}],
+        }
+        with self.fake.lock:
+            tasks.append(task)
+        return 200, task
+
+    def list_fields(self, list_id, query):
+        return 200, {"fields": self.fake.fields.get(list_id, [])}
+
+    def get_list(self, list_id, query):
+        if list_id not in self.fake.lists:
+            return 404, {"err": "List not found", "ECODE": "ITEM_013"}
+        return 200, {"id": list_id, "statuses": self.fake.statuses.get(list_id, [])}
+
+    def get_task(self, task_id, query):
+        for list_id, tasks in self.fake.lists.items():
+            for task in tasks:
+                if task["id"] == task_id:
+                    return 200, {**task, "list": {"id": list_id}}
+        return 404, {"err": "Task not found", "ECODE": "ITEM_015"}
+
+    def delete_task(self, task_id, query):
+        with self.fake.lock:
+            for tasks in self.fake.lists.values():
+                for position, task in enumerate(tasks):
+                    if task["id"] == task_id:
+                        del tasks[position]
+                        return 200, {}
+        return 404, {"err": "Task not found", "ECODE": "ITEM_015"}
+
+    def create_webhook(self, team_id, query):
+        body = self._body()
+        webhook = {"id": f"webhook{len(self.fake.webhooks) + 1}", "secret": "fake-webhook-secret", **body}
+        self.fake.webhooks.append(webhook)
+        return 200, {"id": webhook["id"], "webhook": webhook}
+
+    def set_field(self, task_id, field_id, query):
+        task = self.fake.find_task(task_id)
+        if task is None:
+            return 404, {"err": "Task not found", "ECODE": "ITEM_015"}
+        value = self._body().get("value")
+        with self.fake.lock:
+            field = next((f for f in task["custom_fields"] if f["id"] == field_id), None)
+            if field is None:
+                field = {"id": field_id, "value": []}
+                task["custom_fields"].append(field)
+            if isinstance(value, dict):
+                ids = [item["id"] for item in field.get("value") or []]
+                ids = [i for i in ids if i not in value.get("rem", [])] + [i for i in value.get("add", []) if i not in ids]
+                field["value"] = [{"id": i} for i in ids]
+            else:
+                field["value"] = value
+        return 200, {}
+
+    def update_task(self, task_id, query):
+        task = self.fake.find_task(task_id)
+        if task is None:
+            return 404, {"err": "Task not found", "ECODE": "ITEM_015"}
+        body = self._body()
+        with self.fake.lock:
+            watchers = body.pop("watchers", None)
+            if watchers:
+                ids = [w["id"] for w in task.get("watchers", [])]
+                rem = {int(i) for i in watchers.get("rem", [])}
+                ids = [i for i in ids if i not in rem] + [int(i) for i in watchers.get("add", []) if int(i) not in ids]
+                task["watchers"] = [{"id": i} for i in ids]
+            task.update(body)
+            task["date_updated"] = str(int(time.time() * 1000))
+        return 200, task
+
+    def get_teams(self, query):
+        return 200, {"teams": [{"id": TEAM_ID, "name": "Workspace", "members": self.fake.members}]}
+
+    def _list_summary(self, list_id):
+        return {"id": list_id, "name": self.fake.list_names.get(list_id), "task_count": len(self.fake.lists[list_id])}
+
+    def _space(self, space_id):
+        return next((space for space in self.fake.spaces if space["id"] == space_id), None)
+
+    def get_spaces(self, team_id, query):
+        return 200, {"spaces": [{"id": space["id"], "name": space["name"]} for space in self.fake.spaces]}
+
+    def get_folders(self, space_id, query):
+        space = self._space(space_id)
+        if space is None:
+            return 404, {"err": "Space not found", "ECODE": "ITEM_015"}
+        return 200, {"folders": [
+            {"id": folder["id"], "name": folder["name"], "lists": [self._list_summary(i) for i in folder["lists"]]}
+            for folder in space["folders"]
+        ]}
+
+    def get_space_lists(self, space_id, query):
+        space = self._space(space_id)
+        if space is None:
+            return 404, {"err": "Space not found", "ECODE": "ITEM_015"}
+        return 200, {"lists": [self._list_summary(i) for i in space["lists"]]}
+
+    def get_folder_lists(self, folder_id, query):
+        for space in self.fake.spaces:
+            for folder in space["folders"]:
+                if folder["id"] == folder_id:
+                    return 200, {"lists": [self._list_summary(i) for i in folder["lists"]]}
+        return 404, {"err": "Folder not found", "ECODE": "ITEM_015"}
+
+    def list_docs(self, workspace_id, query):
+        docs = [entry["doc"] for entry in self.fake.docs.values()]
+        limit = int(query.get("limit", ["50"])[0])
+        start = int(query.get("cursor", ["0"])[0])
+        chunk = docs[start:start + limit]
+        next_cursor = str(start + limit) if start + limit < len(docs) else None
+        return 200, {"docs": chunk, "next_cursor": next_cursor}
+
+    def _doc_pages(self, doc_id):
+        entry = self.fake.docs.get(doc_id)
+        return entry["pages"] if entry else None
+
+    def list_doc_pages(self, workspace_id, doc_id, query):
+        pages = self._doc_pages(doc_id)
+        if pages is None:
+            return 404, {"err": "Doc not found", "ECODE": "DOC_001"}
+
+        def listing(page):
+            return {"id": page["id"], "doc_id": doc_id, "name": page["name"],
+                    "pages": [listing(child) for child in page["pages"]]}
+        return 200, [listing(page) for page in pages]
+
+    def get_doc_page(self, workspace_id, doc_id, page_id, query):
+        stack = list(self._doc_pages(doc_id) or [])
+        while stack:
+            page = stack.pop()
+            if page["id"] == page_id:
+                return 200, {"id": page_id, "doc_id": doc_id, "name": page["name"], "content": page["content"]}
+            stack.extend(page["pages"])
+        return 404, {"err": "Page not found", "ECODE": "DOC_002"}
+
+    def get_comments(self, task_id, query):
+        comments = self.fake.comments.get(task_id, [])
+        if "start_id" in query:
+            start_id = query["start_id"][0]
+            position = next((i for i, comment in enumerate(comments) if comment["id"] == start_id), len(comments))
+            comments = comments[position + 1:]
+        return 200, {"comments": comments[:25]}
+
+# ------------------------------
+# SERVER
+# ------------------------------
+
+def start_server(fake=None, port=0, record_dir=None, replay_dir=None):
+    """
+    Start the stand-in on a background thread. Returns (server, base_url).
+    """
+    handler = type("Handler", (FakeClickUpHandler,), {
+        "fake": fake or FakeClickUp(), "record_dir": record_dir, "replay_dir": replay_dir,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/v2"
+
+def run_benchmark(sizes, latency=0.0, extra_fields=10):
+    """
+    Run main() end to end against the stand-in for each brand count and print timings.
+    """
+    # Validation warnings and mother-brand cycles are still reported, so the
+    # report email goes to a local SMTP stand-in rather than a real server.
+    smtp_server, _, _ = start_smtp_server()
+    os.environ.update({
+        "CLICKUP_API_KEY": "benchmark", "SMTP_SERVER": "127.0.0.1", "SMTP_PORT": str(smtp_server.server_address[1]),
+        "SMTP_USER": "benchmark@example.com", "SMTP_PASSWORD": "benchmark", "SMTP_STARTTLS": "0",
+    })
+    results = []
+    for size in sizes:
+        fake = build_workspace(size, extra_fields=extra_fields, missing_ratio=0, latency=latency)
+        server, base_url = start_server(fake)
+        os.environ["CLICKUP_API_BASE_URL"] = base_url
+        reset_clients()
+        with tempfile.TemporaryDirectory() as tmp:
+            # Every file the run writes goes to the temporary directory, not the production defaults.
+            started = time.perf_counter()
+            invoice_main.main([
+                "--snapshot", os.path.join(tmp, "snapshot.db"),
+                "--history", os.path.join(tmp, "brand_history"),
+                "--fingerprints", os.path.join(tmp, "report_fingerprints.json"),
+                "--metadata", os.path.join(tmp, "workspace_metadata.json"),
+                "--journal", os.path.join(tmp, "invoice_journal.jsonl"),
+                "--metrics-dir", "",   # metrics are written at exit, after the directory is gone
+            ])
+            elapsed = time.perf_counter() - started
+        server.shutdown()
+        results.append({"brands": size, "seconds": round(elapsed, 3), "requests": len(fake.requests)})
+    smtp_server.shutdown()
+    for result in results:
+        print(f"{result['brands']:>7} brands: {result['seconds']:.3f}s, {result['requests']} requests")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ClickUp stand-in server.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--brands", type=int, default=100, help="Number of synthetic brands in the Brands Basket list.")
+    parser.add_argument("--extra-fields", type=int, default=10, help="Unrelated custom fields per brand task.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--rate-limit", type=int, help="Requests per minute before answering 429.")
+    parser.add_argument("--record", metavar="DIR", help="Proxy to the real API and save responses as fixtures.")
+    parser.add_argument("--replay", metavar="DIR", help="Serve only fixtures saved with --record.")
+    parser.add_argument("--benchmark", metavar="SIZES", help="Comma-separated brand counts to run main() against, e.g. 100,1000,10000.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark([int(size) for size in args.benchmark.split(",")], args.latency, args.extra_fields)
+        return
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    fake = build_workspace(args.brands, extra_fields=args.extra_fields, latency=args.latency,
+                           error_rate=args.error_rate, rate_limit=args.rate_limit)
+    server, base_url = start_server(fake, args.port, args.record, args.replay)
+    print(f"Fake ClickUp listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Minimal local SMTP stand-in for testing the report mailer without a mail server.
+
+Accepts any login (AUTH PLAIN/LOGIN), does not offer STARTTLS and keeps every
+message in memory (and prints it when run as a script).
+
+    python fake_smtp.py --port 8025
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=8025 SMTP_USER=bot@example.com SMTP_PASSWORD=x SMTP_STARTTLS=0 python main.py
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    messages = None      # list of (sender, recipients, data)
+    connections = None   # list, one entry per accepted connection
+    verbose = False
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.connections.append(self.client_address)
+        self.reply("220 fake-smtp ready")
+        sender, recipients = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250-fake-smtp")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command == "HELO":
+                self.reply("250 fake-smtp")
+            elif command == "AUTH":
+                parts = line.split()
+                if parts[1].upper() == "LOGIN":
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif len(parts) < 3:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif command == "MAIL":
+                sender, recipients = line.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip())
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline().decode("utf-8", "replace")
+                    if chunk in (".\r\n", ".\n", ""):
+                        break
+                    data.append(chunk[1:] if chunk.startswith("..") else chunk)
+                self.messages.append((sender, recipients, "".join(data)))
+                if self.verbose:
+                    print(f"--- message from {sender} to {', '.join(recipients)} ---\n{''.join(data)}")
+                self.reply("250 OK: queued")
+            elif command in ("NOOP", "RSET"):
+                if command == "RSET":
+                    sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+def start_smtp_server(port=0, verbose=False):
+    """
+    Start the stand-in on a background thread. Returns (server, messages, connections).
+    """
+    messages, connections = [], []
+    handler = type("Handler", (FakeSMTPHandler,), {
+        "messages": messages, "connections": connections, "verbose": verbose,
+    })
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, messages, connections
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in server.")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+    server, _, _ = start_smtp_server(args.port, verbose=True)
+    print(f"Fake SMTP listening on 127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
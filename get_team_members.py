@@ -1,15 +1,12 @@
-import os
-import json
-import requests
+from clickup_client import get_client
+from credentials import get_clickup_api_key
 
 def get_all_users(access_token):
     """
     Retrieve all teams and their members from ClickUp, and return a dictionary
     mapping user IDs to a display name (username or email).
     """
-    url = "https://api.clickup.com/api/v2/team"
-    headers = {"Authorization": access_token}
-    response = requests.get(url, headers=headers)
+    response = get_client(access_token).get("team")
     if response.status_code != 200:
         print(f"Failed to retrieve teams: {response.status_code} {response.text}")
         return {}
@@ -25,17 +22,7 @@ def get_all_users(access_token):
     return users
 
 def main():
-    # Retrieve the ClickUp API key from environment variable or credentials.json
-    access_token = os.getenv("CLICKUP_API_KEY")
-    if not access_token:
-        try:
-            with open("credentials.json") as f:
-                access_token = json.load(f).get("CLICKUP_API_KEY")
-        except Exception as e:
-            print("Error loading API key:", e)
-            return
-
-    users = get_all_users(access_token)
+    users = get_all_users(get_clickup_api_key())
     if not users:
         print("No users found.")
         return
@@ -0,0 +1,86 @@
+import re
+import threading
+import time
+
+from clickup_client import fetch_pages
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+INVOICE_LOOKBACK_DAYS = 40  # invoice titles carry their period, so only recent tasks can collide
+# Titles start with their billing period: "MM.YY" or "DD.MM.YY - DD.MM.YY".
+PERIOD_PATTERN = re.compile(r"^(\d{2}\.\d{2}\.\d{2} - \d{2}\.\d{2}\.\d{2}|\d{2}\.\d{2})(?:\s|$)")
+
+def normalize_title(title):
+    return " ".join((title or "").split()).casefold()
+
+def billing_period(title):
+    match = PERIOD_PATTERN.match(normalize_title(title))
+    return match.group(1) if match else None
+
+# ------------------------------
+# INVOICE INDEX
+# ------------------------------
+
+class InvoiceIndex:
+    """
+    Hash index of invoice tasks already present in the destination list,
+    by normalized title and by billing period. An invoice counts as existing
+    for a brand if its relationship field covers the brand in the same period,
+    so a brand family that changed between runs is not billed twice.
+    """
+
+    def __init__(self):
+        self.titles = {}   # normalized title -> task id
+        self.periods = {}  # billing period -> {brand id -> task id}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title, task_id, related_ids=()):
+        key = normalize_title(title)
+        period = billing_period(title)
+        with self._lock:
+            self.titles[key] = task_id
+            if period:
+                covered = self.periods.setdefault(period, {})
+                for brand_id in related_ids:
+                    covered.setdefault(brand_id, task_id)
+
+    def find(self, title, brand_id=None):
+        """
+        Return the id of an existing invoice with this title, or of one for the
+        same billing period whose related brands include brand_id; else None.
+        """
+        task_id = self.titles.get(normalize_title(title))
+        if task_id or brand_id is None:
+            return task_id
+        return self.periods.get(billing_period(title), {}).get(brand_id)
+
+def load_invoice_index(client, list_id, relationship_field_id, lookback_days=INVOICE_LOOKBACK_DAYS):
+    """
+    Fetch the destination list's recent tasks once and index them by title.
+    Returns None if the list could not be read, so callers can decide whether to proceed.
+    """
+    since_ms = int((time.time() - lookback_days * 24 * 60 * 60) * 1000)
+    params = {
+        "include_closed": "true",
+        "include_custom_fields": "true",
+        "date_created_gt": since_ms,
+        "limit": 100,
+    }
+    tasks, ok = fetch_pages(client, f"list/{list_id}/task", params=params)
+    if not ok:
+        print(f"Failed to load existing invoices from list {list_id}.")
+        return None
+    index = InvoiceIndex()
+    for task in tasks:
+        related_ids = ()
+        for field in task.get("custom_fields", []):
+            if field.get("id") == relationship_field_id:
+                related_ids = [item.get("id") for item in field.get("value") or [] if isinstance(item, dict)]
+                break
+        index.add(task.get("name"), task.get("id"), related_ids)
+    print(f"Indexed {len(index)} existing invoices in list {list_id}.")
+    return index
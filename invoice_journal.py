@@ -0,0 +1,216 @@
+"""
+Append-only write-ahead journal of invoice writes.
+
+Before an invoice is created, its planned writes (create, relationship,
+watchers) are appended to the journal as one intent record; each write is
+marked done (or failed) as soon as its response is in. An invoice whose
+steps are not all done is pending, and resume_pending() replays only its
+missing steps on the next run. Each line is one JSON record:
+
+    {"op": "intent", "key": ..., "list_id": ..., "title": ..., "data": {...}, "steps": [...], "ts": ...}
+    {"op": "done", "key": ..., "step": "create", "task_id": ...}
+    {"op": "failed", "key": ..., "step": "relationship", "error": ...}
+
+Records are flushed and fsynced before the write they describe is sent.
+Loading the journal drops finished invoices from the file.
+"""
+import json
+import os
+import random
+import threading
+import time
+
+from billing_calendar import parse_date
+from clickup_client import BACKOFF_BASE, BACKOFF_MAX
+from invoice_index import load_invoice_index
+from invoice_pipeline import InvoiceJob, create_invoice, fix_watchers, set_relationship
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_JOURNAL_PATH = "invoice_journal.jsonl"
+INVOICE_STEPS = ("create", "relationship", "watchers")
+RESUME_ATTEMPTS = 4
+
+class JournalEntry:
+    """
+    One journaled invoice: its intent and the steps done so far.
+    """
+    __slots__ = ("key", "intent", "done", "task_id", "errors")
+
+    def __init__(self, intent):
+        self.key = intent["key"]
+        self.intent = intent
+        self.done = set()
+        self.task_id = None
+        self.errors = []
+
+    @property
+    def remaining(self):
+        return [step for step in self.intent["steps"] if step not in self.done]
+
+# ------------------------------
+# JOURNAL
+# ------------------------------
+
+class InvoiceJournal:
+    """
+    Thread-safe append-only journal; `pending` maps key -> JournalEntry for unfinished invoices.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self.pending = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+            self._compact()
+        self._file = open(path, "a")
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue   # torn last line from a crash mid-write
+                self._apply(record)
+
+    def _apply(self, record):
+        op = record.get("op")
+        if op == "intent":
+            self.pending[record["key"]] = JournalEntry(record)
+            return
+        entry = self.pending.get(record.get("key"))
+        if entry is None:
+            return
+        if op == "done":
+            entry.done.add(record["step"])
+            entry.task_id = record.get("task_id") or entry.task_id
+            if not entry.remaining:
+                del self.pending[entry.key]
+        elif op == "failed":
+            entry.errors.append(f"{record['step']}: {record.get('error')}")
+
+    def _compact(self):
+        """
+        Rewrite the file with only the records of pending invoices.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in self.pending.values():
+                f.write(json.dumps(entry.intent) + "\n")
+                for step in entry.intent["steps"]:
+                    if step in entry.done:
+                        f.write(json.dumps({"op": "done", "key": entry.key, "step": step,
+                                            "task_id": entry.task_id}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(record)
+
+    def begin(self, list_id, title, data, steps=INVOICE_STEPS):
+        """
+        Record an invoice's planned writes before the first one is sent. Returns its key.
+        """
+        key = f"{list_id}:{title}"
+        self._append({"op": "intent", "key": key, "list_id": list_id, "title": title, "data": data,
+                      "steps": list(steps), "ts": int(time.time())})
+        return key
+
+    def done(self, key, step, task_id=None):
+        self._append({"op": "done", "key": key, "step": step, "task_id": task_id})
+
+    def failed(self, key, step, error):
+        self._append({"op": "failed", "key": key, "step": step, "error": str(error)[:500]})
+
+    def pending_for(self, list_id):
+        with self._lock:
+            return [entry for entry in self.pending.values() if entry.intent["list_id"] == list_id]
+
+    def close(self):
+        self._file.close()
+        if not self.pending:
+            open(self.path, "w").close()
+
+# ------------------------------
+# RESUME
+# ------------------------------
+
+def resume_follow_ups(client, journal, entry):
+    """
+    Send the relationship and watcher writes of an invoice whose task exists but that are not done yet.
+    """
+    data = entry.intent["data"]
+    if "relationship" in entry.remaining:
+        ok, error = set_relationship(client, entry.task_id, data["relationship_field_id"], data["related_ids"])
+        if ok:
+            journal.done(entry.key, "relationship", entry.task_id)
+        else:
+            journal.failed(entry.key, "relationship", error)
+    if "watchers" in entry.remaining:
+        ok, error = fix_watchers(client, entry.task_id, data["add_watchers"], data["remove_watchers"])
+        if ok:
+            journal.done(entry.key, "watchers", entry.task_id)
+        else:
+            journal.failed(entry.key, "watchers", error)
+
+def resume_pending(client, journal, list_id, attempts=RESUME_ATTEMPTS):
+    """
+    Replay the missing steps of every pending invoice for list_id, retrying
+    with backoff between passes. Returns (resumed, still_pending).
+    """
+    entries = journal.pending_for(list_id)
+    if not entries:
+        return 0, 0
+    total = len(entries)
+    print(f"Resuming {total} pending invoices from {journal.path}.")
+
+    for attempt in range(attempts):
+        index = None
+        if any("create" in entry.remaining for entry in entries):
+            # A create that was sent but never confirmed may still have gone through, including
+            # one re-sent by the previous attempt, so the index is reloaded before every attempt.
+            oldest = min(entry.intent["ts"] for entry in entries)
+            lookback_days = int((time.time() - oldest) / 86400) + 2
+            data = entries[0].intent["data"]
+            index = load_invoice_index(client, list_id, data["relationship_field_id"], lookback_days)
+            if index is None:
+                print("Cannot check for existing invoices; leaving pending creates for the next run.")
+        for entry in entries:
+            data = entry.intent["data"]
+            if "create" in entry.remaining:
+                existing_id = index.find(entry.intent["title"], data["brand_id"]) if index is not None else None
+                if existing_id:
+                    journal.done(entry.key, "create", existing_id)
+                elif index is not None:
+                    billing_date = data.get("billing_date")
+                    job = InvoiceJob(data["brand_id"], data["brand_name"], entry.intent["title"],
+                                     data["related_ids"], parse_date(billing_date) if billing_date else None)
+                    try:
+                        create_invoice(client, job, list_id, data["relationship_field_id"], data["due_timestamp"],
+                                       data["add_watchers"], data["remove_watchers"], journal=journal)
+                    except Exception as e:
+                        print(f"Failed to create task '{job.title}': {e}")
+                    continue
+                else:
+                    continue
+            try:
+                resume_follow_ups(client, journal, entry)
+            except Exception as e:
+                print(f"Failed to resume invoice '{entry.intent['title']}': {e}")
+        # create_invoice() starts a fresh entry for a re-sent create, so look entries up again.
+        entries = [journal.pending[entry.key] for entry in entries if entry.key in journal.pending]
+        if not entries or attempt == attempts - 1:
+            break
+        time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))))
+
+    still_pending = len(entries)
+    print(f"Resumed {total - still_pending} pending invoices; {still_pending} still pending.")
+    return total - still_pending, still_pending
@@ -0,0 +1,214 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+INVOICE_WORKERS = 8
+INVOICE_DESCRIPTION = "Automatically created invoice task for billing period."
+
+InvoiceJob = namedtuple("InvoiceJob", ["brand_id", "brand_name", "title", "related_ids", "billing_date"],
+                        defaults=[None])
+
+class InvoiceResult:
+    __slots__ = ("job", "task_id", "status", "requests", "errors")
+
+    def __init__(self, job):
+        self.job = job
+        self.task_id = None
+        self.status = "pending"   # created | partial | failed | skipped
+        self.requests = 0
+        self.errors = []
+
+    def as_dict(self):
+        return {
+            "brand_id": self.job.brand_id,
+            "brand_name": self.job.brand_name,
+            "title": self.job.title,
+            "task_id": self.task_id,
+            "status": self.status,
+            "requests": self.requests,
+            "errors": list(self.errors),
+        }
+
+# ------------------------------
+# SINGLE INVOICE
+# ------------------------------
+
+def _relationship_ids(task, field_id):
+    for field in task.get("custom_fields", []):
+        if field.get("id") == field_id:
+            return {item.get("id") for item in field.get("value") or [] if isinstance(item, dict)}
+    return set()
+
+def _watcher_ids(task):
+    watchers = task.get("watchers")
+    if watchers is None:
+        return None
+    return {str(watcher.get("id")) for watcher in watchers if isinstance(watcher, dict)}
+
+def set_relationship(client, task_id, relationship_field_id, related_ids):
+    """
+    Add related_ids to the task's relationship field. Returns (ok, error).
+    """
+    response = client.post(f"task/{task_id}/field/{relationship_field_id}", json={"value": {"add": list(related_ids)}})
+    if response.status_code in [200, 201]:
+        return True, None
+    return False, f"{response.status_code} {response.text}"
+
+def fix_watchers(client, task_id, add=(), rem=()):
+    """
+    Add and remove watchers in a single update. Returns (ok, error).
+    """
+    watchers = {}
+    if add:
+        watchers["add"] = list(add)
+    if rem:
+        watchers["rem"] = list(rem)
+    response = client.put(f"task/{task_id}", json={"watchers": watchers})
+    if response.status_code in [200, 201]:
+        return True, None
+    return False, f"{response.status_code} {response.text}"
+
+def create_invoice(client, job, list_id, relationship_field_id, due_timestamp,
+                   add_watchers=(), remove_watchers=(), journal=None):
+    """
+    Create one invoice task with its relationship field set in the create body.
+
+    Follow-up calls are only made for what the create response shows is still
+    missing: the relationship field (if ClickUp did not accept it inline) and a
+    single combined watcher update. With an InvoiceJournal every step is
+    journaled before it is sent and marked done once it succeeded.
+    """
+    result = InvoiceResult(job)
+    key = None
+    if journal is not None:
+        key = journal.begin(list_id, job.title, {
+            "brand_id": job.brand_id, "brand_name": job.brand_name, "related_ids": list(job.related_ids),
+            "billing_date": job.billing_date.isoformat() if job.billing_date else None,
+            "relationship_field_id": relationship_field_id, "due_timestamp": due_timestamp,
+            "add_watchers": list(add_watchers), "remove_watchers": list(remove_watchers),
+        })
+    data = {
+        "name": job.title,
+        "description": INVOICE_DESCRIPTION,
+        "due_date": due_timestamp,
+        "custom_fields": [{"id": relationship_field_id, "value": {"add": list(job.related_ids)}}],
+    }
+    response = client.post(f"list/{list_id}/task", json=data)
+    result.requests += 1
+    if response.status_code == 400:
+        # Fall back to creating the task plainly and setting the relationship afterwards.
+        data.pop("custom_fields")
+        response = client.post(f"list/{list_id}/task", json=data)
+        result.requests += 1
+    if response.status_code not in [200, 201]:
+        result.status = "failed"
+        result.errors.append(f"create: {response.status_code} {response.text}")
+        print(f"Failed to create task '{job.title}': {response.status_code} {response.text}")
+        if journal is not None:
+            journal.failed(key, "create", result.errors[-1])
+        return result
+
+    task = response.json()
+    result.task_id = task.get("id")
+    result.status = "created"
+    print(f"Task created: '{job.title}', ID: {result.task_id}")
+    if journal is not None:
+        journal.done(key, "create", result.task_id)
+
+    missing = [task_id for task_id in job.related_ids if task_id not in _relationship_ids(task, relationship_field_id)]
+    ok = True
+    if missing:
+        ok, error = set_relationship(client, result.task_id, relationship_field_id, missing)
+        result.requests += 1
+        if not ok:
+            result.status = "partial"
+            result.errors.append(f"relationship: {error}")
+            print(f"Failed to update task relationship: {error}")
+    if journal is not None:
+        if ok:
+            journal.done(key, "relationship", result.task_id)
+        else:
+            journal.failed(key, "relationship", error)
+
+    current = _watcher_ids(task)
+    add = [user_id for user_id in add_watchers if current is None or str(user_id) not in current]
+    rem = [user_id for user_id in remove_watchers if current is None or str(user_id) in current]
+    ok = True
+    if add or rem:
+        ok, error = fix_watchers(client, result.task_id, add, rem)
+        result.requests += 1
+        if not ok:
+            result.status = "partial"
+            result.errors.append(f"watchers: {error}")
+            print(f"Failed to update watchers of task {result.task_id}: {error}")
+    if journal is not None:
+        if ok:
+            journal.done(key, "watchers", result.task_id)
+        else:
+            journal.failed(key, "watchers", error)
+    return result
+
+# ------------------------------
+# PIPELINE
+# ------------------------------
+
+def run_invoice_jobs(client, jobs, list_id, relationship_field_id, due_timestamp,
+                     add_watchers=(), remove_watchers=(), max_workers=INVOICE_WORKERS, index=None, journal=None):
+    """
+    Create invoices for all jobs on a bounded worker pool.
+    Jobs that already have an invoice in `index` (an InvoiceIndex), by title or by
+    brand and billing period, are skipped without any write, and newly created invoices are added to it. Writes are journaled
+    in `journal` (an InvoiceJournal) if given.
+    Returns the InvoiceResults in the same order as jobs.
+    """
+    if not jobs:
+        return []
+
+    def run(job):
+        if index is not None:
+            existing_id = index.find(job.title, job.brand_id)
+            if existing_id:
+                result = InvoiceResult(job)
+                result.task_id = existing_id
+                result.status = "skipped"
+                print(f"Invoice '{job.title}' already exists (ID: {existing_id}), skipping.")
+                return result
+        try:
+            result = create_invoice(client, job, list_id, relationship_field_id, due_timestamp,
+                                    add_watchers, remove_watchers, journal)
+        except Exception as e:
+            result = InvoiceResult(job)
+            result.status = "failed"
+            result.errors.append(f"exception: {e}")
+            print(f"Failed to create task '{job.title}': {e}")
+            return result
+        if index is not None and result.task_id:
+            index.add(job.title, result.task_id, job.related_ids)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        return list(pool.map(run, jobs))
+
+def summarize_results(results):
+    """
+    Build a structured summary of an invoice run.
+    """
+    summary = {"total": len(results), "created": 0, "partial": 0, "failed": 0, "skipped": 0,
+               "requests": 0, "results": []}
+    for result in results:
+        summary[result.status] = summary.get(result.status, 0) + 1
+        summary["requests"] += result.requests
+        summary["results"].append(result.as_dict())
+    return summary
+
+def combine_summaries(summaries):
+    """
+    Merge the summaries of several runs (e.g. one per shard) into one.
+    """
+    combined = {"total": 0, "created": 0, "partial": 0, "failed": 0, "skipped": 0, "requests": 0, "results": []}
+    for summary in summaries:
+        for key, value in summary.items():
+            combined[key] = combined.get(key, 0 if not isinstance(value, list) else []) + value
+    return combined
@@ -1,11 +1,28 @@
 import os
-import json
-import requests
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import argparse
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from dateutil.relativedelta import relativedelta
+
+from clickup_client import (
+    PAGE_CONCURRENCY, PaginationError, fetch_pages, get_client, set_rate_budget, set_rate_priority,
+)
+from credentials import get_clickup_api_key, get_smtp_settings
+from snapshot_store import SnapshotStore, DEFAULT_SNAPSHOT_PATH
+from brand_records import build_field_index, project_task, project_tasks
+from brand_hierarchy import CYCLES_REPORT_TITLE, cycle_report_entries, resolve_hierarchy
+from brand_stream import StreamingGrouper, stream_brands
+from brand_validation import VALIDATION_REPORT_TITLE, BrandValidation
+from brand_history import DEFAULT_HISTORY_DIR, BrandHistory
+from billing_calendar import billing_days_in_range, build_schedule, clamp_day, parse_date
+from invoice_index import INVOICE_LOOKBACK_DAYS, load_invoice_index
+from invoice_journal import DEFAULT_JOURNAL_PATH, InvoiceJournal, resume_pending
+from report_mailer import DEFAULT_FINGERPRINT_PATH, FingerprintCache, ReportMailer
+from run_metrics import get_metrics
+from invoice_pipeline import InvoiceJob, combine_summaries, run_invoice_jobs, summarize_results
+from workspace_metadata import DEFAULT_METADATA_PATH, MetadataCache, MetadataError, MetadataResolver, WorkspaceIds
+from task_filters import FieldPredicate, TaskFilter, contiguous_runs, fetch_filtered_tasks
+from shards import SHARD_WORKERS, ShardConfig, load_shard_config, run_shards
 
 # ------------------------------
 # CONFIGURATION / CONSTANTS
@@ -20,130 +37,194 @@ MOTHER_BRAND_FIELD_ID = "65152352-2245-4e01-a375-06f7094abc53"
 RELATIONSHIP_FIELD_ID = "29aafb0f-2e62-4425-b409-5f21538b3c3c"
 
 WATCHER_USER_ID = "81800000"  # Nadia
+REMOVED_WATCHER_USER_ID = "6830798"
+
+# The ids above are checked at startup (see workspace_metadata.py); these names are only
+# used to find a replacement when an id no longer exists (a recreated field, say), and
+# the hardcoded id is kept when no name matches. None means there is no name to look up.
+BRAND_STATUS_NAME = "active"
+BILLING_DAY_FIELD_NAME = "Billing Day"
+PAYMENT_TERMS_FIELD_NAME = "Payment Terms"
+MOTHER_BRAND_FIELD_NAME = "Mother Brand"
+RELATIONSHIP_FIELD_NAME = "Brand"
+WATCHER_USER_NAME = "Nadia"
+REMOVED_WATCHER_USER_NAME = None
+
+MAX_MOTHER_FETCHES = 50  # --pushdown: more missing mother brands than this are found with one list query
+
+INVOICE_LEAD_DAYS = 10  # invoices are created this many days before the billing day
+
+METRICS_DIR = "metrics"
+
+BRAND_FIELD_INDEX = build_field_index(BILLING_DAY_FIELD_ID, PAYMENT_TERMS_FIELD_ID, MOTHER_BRAND_FIELD_ID)
+
+# The Brands Basket -> Retention Funnel pair; also the defaults for every shard in a --config file.
+DEFAULT_SHARD = ShardConfig(
+    name="brands", list_id=LIST_ID, destination_list_id=DESTINATION_LIST_ID,
+    status_name=BRAND_STATUS_NAME, status_id=STATUS_ID,
+    billing_day_field_name=BILLING_DAY_FIELD_NAME, billing_day_field_id=BILLING_DAY_FIELD_ID,
+    payment_terms_field_name=PAYMENT_TERMS_FIELD_NAME, payment_terms_field_id=PAYMENT_TERMS_FIELD_ID,
+    mother_brand_field_name=MOTHER_BRAND_FIELD_NAME, mother_brand_field_id=MOTHER_BRAND_FIELD_ID,
+    relationship_field_name=RELATIONSHIP_FIELD_NAME, relationship_field_id=RELATIONSHIP_FIELD_ID,
+    watcher_user_name=WATCHER_USER_NAME, watcher_user_id=WATCHER_USER_ID,
+    removed_watcher_user_name=REMOVED_WATCHER_USER_NAME, removed_watcher_user_id=REMOVED_WATCHER_USER_ID,
+)
 
 # ------------------------------
 # API HELPER FUNCTIONS
 # ------------------------------
 
-def get_clickup_api_key():
-    access_token = os.getenv('CLICKUP_API_KEY')
-    if not access_token:
-        try:
-            with open('credentials.json') as f:
-                access_token = json.load(f).get('CLICKUP_API_KEY')
-        except Exception as e:
-            print("Error loading API key:", e)
-            exit(1)
-    return access_token
-
-def get_all_brand_tasks(list_id, status_id, access_token):
-    tasks = []
-    page = 0
-    while True:
-        url = f"https://api.clickup.com/api/v2/list/{list_id}/task?include_custom_fields=true&page={page}&limit=100"
-        headers = {'Authorization': access_token, 'Content-Type': 'application/json'}
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            print(f"Failed to retrieve tasks on page {page}: {response.status_code}")
-            break
-        data = response.json()
-        page_tasks = data.get('tasks', [])
-        if not page_tasks:
-            break
-        tasks.extend(page_tasks)
-        page += 1
+def resolve_workspace_ids(resolver, shard=DEFAULT_SHARD):
+    """
+    Look up a shard's status, custom field and user ids by name through the metadata resolver.
+    Returns a WorkspaceIds, or None if one of them cannot be resolved.
+    """
+    try:
+        return WorkspaceIds(
+            status_id=resolver.status_id(shard.list_id, shard.status_name, shard.status_id),
+            billing_day_field_id=resolver.field_id(
+                shard.list_id, shard.billing_day_field_name, shard.billing_day_field_id),
+            payment_terms_field_id=resolver.field_id(
+                shard.list_id, shard.payment_terms_field_name, shard.payment_terms_field_id),
+            mother_brand_field_id=resolver.field_id(
+                shard.list_id, shard.mother_brand_field_name, shard.mother_brand_field_id),
+            relationship_field_id=resolver.field_id(
+                shard.destination_list_id, shard.relationship_field_name, shard.relationship_field_id),
+            watcher_user_id=resolver.user_id(shard.watcher_user_name, shard.watcher_user_id),
+            removed_watcher_user_id=resolve_removed_watcher(resolver, shard),
+        )
+    except MetadataError as e:
+        print(f"[{shard.name}] Cannot resolve workspace metadata: {e}")
+        return None
+
+def resolve_removed_watcher(resolver, shard=DEFAULT_SHARD):
+    """
+    The watcher removed from new invoices is only cleanup, so a user that is not
+    in the workspace any more is skipped (None) instead of failing the shard.
+    """
+    if not (shard.removed_watcher_user_name or shard.removed_watcher_user_id):
+        return None
+    try:
+        return resolver.user_id(shard.removed_watcher_user_name, shard.removed_watcher_user_id, trust_fallback=False)
+    except MetadataError as e:
+        print(f"[{shard.name}] Warning: not removing a watcher from new invoices: {e}")
+        return None
+
+def get_all_brand_tasks(list_id, status_id, access_token, store=None, full_refresh=False,
+                        field_index=BRAND_FIELD_INDEX, history=None):
+    """
+    Return the brands of list_id that are in status_id, projected into BrandRecords.
+    With a SnapshotStore the list is synced incrementally and read from the store;
+    without one every task is downloaded. With a BrandHistory every task of the
+    list, whatever its status, is recorded as today's snapshot, unless the sync
+    or download failed and the tasks may be incomplete.
+    """
+    client = get_client(access_token)
+    if store is not None:
+        ok = store.sync(client, list_id, full=full_refresh) is not None
+        tasks = store.load_tasks(list_id)
+    else:
+        tasks, ok = fetch_pages(client, f"list/{list_id}/task", params={"include_custom_fields": "true", "limit": 100})
+    if history is not None and not ok:
+        print(f"Not recording today's brand history for list {list_id}: the task list may be incomplete.")
+    elif history is not None:
+        brands = project_tasks(tasks, field_index)
+        history.append(datetime.now(timezone.utc).date(), brands)
+        return [brand for brand in brands if brand.status_id == status_id]
     tasks = [task for task in tasks if task.get('status', {}).get('id') == status_id]
-    return tasks
+    return project_tasks(tasks, field_index)
+
+def get_billing_brand_tasks(list_id, status_id, status_name, access_token, start_date, end_date,
+                            field_index=BRAND_FIELD_INDEX):
+    """
+    Return the brands of list_id in status_id that billing between start_date and
+    end_date needs, fetched with filters ClickUp applies server-side: every brand
+    with a mother link (so whole families are known), the brands billing in the
+    range, and the brands whose billing fields would fail validation. Mother
+    brands not in any of those are then fetched by id, or with one query for
+    brands without a mother when there are more than MAX_MOTHER_FETCHES.
+    """
+    client = get_client(access_token)
+    ids = {attr: field_id for field_id, attr in field_index.items()}
+    billing_day, payment_term, mother = ids["billing_day"], ids["payment_term"], ids["mother_id"]
+    status = {"status_ids": [status_id], "status_names": [status_name]}
+    # Brands with a mother link come first, in list order, so families list their brands as a full fetch does.
+    queries = [[FieldPredicate(mother, "IS NOT NULL")]]
+    for low, high in contiguous_runs(billing_days_in_range(start_date, end_date)):
+        queries.append([FieldPredicate(billing_day, "IN", range(low, high + 1))])
+    # Custom field filters are ANDed, so each validation failure is its own (short) query.
+    for predicate in (FieldPredicate(billing_day, "IS NULL"), FieldPredicate(billing_day, "<", 1),
+                      FieldPredicate(billing_day, ">", 31), FieldPredicate(payment_term, "IS NULL"),
+                      FieldPredicate(payment_term, "<", 0), FieldPredicate(payment_term, ">", 1)):
+        queries.append([predicate])
+    brands = {}
+    for fields in queries:
+        for task in fetch_filtered_tasks(client, list_id, TaskFilter(fields=fields, **status)):
+            if task["id"] not in brands:
+                brands[task["id"]] = project_task(task, field_index)
+
+    # Every linked brand is fetched already, so the missing mothers are brands without a mother link.
+    mother_ids = {brand.mother_id for brand in brands.values() if brand.mother_id and brand.mother_id not in brands}
+    if len(mother_ids) > MAX_MOTHER_FETCHES:
+        for task in fetch_filtered_tasks(client, list_id, TaskFilter(fields=[FieldPredicate(mother, "IS NULL")],
+                                                                     **status)):
+            if task["id"] in mother_ids:
+                brands[task["id"]] = project_task(task, field_index)
+        return list(brands.values())
+
+    def fetch_task(task_id):
+        return client.get(f"task/{task_id}", params={"include_subtasks": "false"})
 
-def group_tasks(tasks, mother_brand_field_id):
-    active_ids = {task['id'] for task in tasks}
+    mother_ids = sorted(mother_ids)
+    with ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY) as pool:
+        responses = list(pool.map(fetch_task, mother_ids))
+    for mother_id, response in zip(mother_ids, responses):
+        if response.status_code == 404:
+            continue
+        if response.status_code != 200:
+            raise PaginationError(f"Failed to retrieve mother brand {mother_id}: {response.status_code}")
+        task = response.json()
+        if (task.get("list") or {}).get("id") == list_id and not task.get("archived") \
+                and (task.get("status") or {}).get("id") == status_id:
+            brands[mother_id] = project_task(task, field_index)
+    return list(brands.values())
+
+def group_tasks(brands, validation=None):
+    """
+    Group brands by billing brand, resolving mother-brand links at any depth.
+    Returns (independent, dependent, parent, parent_children_names, parent_children_ids, hierarchy);
+    brands on or under a mother-brand cycle are in none of the groups (see hierarchy.cycles).
+    With a BrandValidation, every brand is validated in the same loop.
+    """
+    hierarchy = resolve_hierarchy([brand.id for brand in brands],
+                                  {brand.id: brand.mother_id for brand in brands if brand.mother_id})
+    names = {brand.id: brand.name for brand in brands}
     dependent_tasks = []
-    tentative_independent_tasks = []
-    parent_ids = set()
-    parent_children_names = {}  # parent_id -> list of child names
-    parent_children_ids = {}    # parent_id -> list of child IDs
-
-    for task in tasks:
-        mother_id = None
-        for field in task.get('custom_fields', []):
-            if field['id'] == mother_brand_field_id and field.get('value'):
-                mother_id = field['value'][0]['id']
-                break
-        if mother_id and mother_id in active_ids:
-            dependent_tasks.append(task)
-            parent_ids.add(mother_id)
-            parent_children_names.setdefault(mother_id, []).append(task['name'])
-            parent_children_ids.setdefault(mother_id, []).append(task['id'])
-        else:
-            tentative_independent_tasks.append(task)
-    
     parent_tasks = []
     independent_tasks = []
-    for task in tentative_independent_tasks:
-        if task['id'] in parent_ids:
-            parent_tasks.append(task)
+    for brand in brands:
+        if validation is not None:
+            validation.check(brand, hierarchy.roots)
+        root = hierarchy.roots[brand.id]
+        if root is None:
+            continue
+        if root != brand.id:
+            dependent_tasks.append(brand)
+        elif brand.id in hierarchy.descendants:
+            parent_tasks.append(brand)
         else:
-            independent_tasks.append(task)
-    
-    return independent_tasks, dependent_tasks, parent_tasks, parent_children_names, parent_children_ids
+            independent_tasks.append(brand)
 
-def create_task(title, list_id, access_token, due_date):
-    url = f"https://api.clickup.com/api/v2/list/{list_id}/task"
-    headers = {'Authorization': access_token, 'Content-Type': 'application/json'}
-    moscow_time = timezone(timedelta(hours=3))
-    due_date = datetime.now(moscow_time)
-    due_timestamp = int(due_date.timestamp() * 1000)
+    parent_children_names = {}  # root_id -> names of every brand billed under it
+    parent_children_ids = {}    # root_id -> IDs of every brand billed under it
+    for root_id, descendant_ids in hierarchy.descendants.items():
+        parent_children_ids[root_id] = descendant_ids
+        parent_children_names[root_id] = [names[brand_id] for brand_id in descendant_ids]
     
-    data = {
-        "name": title,
-        "description": "Automatically created invoice task for billing period.",
-        "due_date": due_timestamp
-    }
-    response = requests.post(url, headers=headers, json=data)
-    if response.status_code in [200, 201]:
-        new_task_id = response.json().get('id')
-        print(f"Task created: '{title}', ID: {new_task_id}")
-        return new_task_id
-    else:
-        print(f"Failed to create task: {response.status_code} {response.text}")
-        return None
-
-def set_relationship_field(task_id, field_id, access_token, add_ids=None, remove_ids=None):
-    url = f"https://api.clickup.com/api/v2/task/{task_id}/field/{field_id}"
-    headers = {"Content-Type": "application/json", "Authorization": access_token}
-    value_payload = {}
-    if add_ids:
-        value_payload['add'] = add_ids
-    if remove_ids:
-        value_payload['rem'] = remove_ids
-    payload = {"value": value_payload}
-    response = requests.post(url, json=payload, headers=headers)
-    if response.status_code in [200, 201]:
-        print("Task relationship updated successfully.")
-    else:
-        print(f"Failed to update task relationship: {response.status_code} {response.text}")
-
-def add_watcher(task_id, user_id, access_token):
-    url = f"https://api.clickup.com/api/v2/task/{task_id}"
-    headers = {"Authorization": access_token, "accept": "application/json", "content-type": "application/json"}
-    payload = {"watchers": {"add": [user_id]}}
-    response = requests.put(url, headers=headers, json=payload)
-    if response.status_code in [200, 201]:
-        print(f"Watcher {user_id} added to task {task_id}.")
-    else:
-        print(f"Failed to add watcher {user_id} to task {task_id}: {response.status_code} {response.text}")
-
-def remove_watcher(task_id, user_id, access_token):
-    url = f"https://api.clickup.com/api/v2/task/{task_id}"
-    headers = {"Authorization": access_token, "accept": "application/json", "content-type": "application/json"}
-    payload = {"watchers": {"rem": [user_id]}}
-    response = requests.put(url, headers=headers, json=payload)
-    if response.status_code in [200, 201]:
-        print(f"Watcher {user_id} removed from task {task_id}.")
-    else:
-        print(f"Failed to remove watcher {user_id} from task {task_id}: {response.status_code} {response.text}")
+    return independent_tasks, dependent_tasks, parent_tasks, parent_children_names, parent_children_ids, hierarchy
 
 def compute_invoice_task_details(billing_day, payment_term, brand_name, dependent_names, target_date):
+    from dateutil.relativedelta import relativedelta  # only needed once there is an invoice to title
     billing_day = int(billing_day)
     
     if billing_day == 1:
@@ -155,12 +236,15 @@ def compute_invoice_task_details(billing_day, payment_term, brand_name, dependen
         title = f"{period_str} {brand_name}"
     else:
         try:
+            if not 1 <= billing_day <= 31:
+                raise ValueError("day is out of range for month")
+            # Billing days past the end of a short month fall on its last day.
             if payment_term == 0:  # Pre-paid
-                start_date = target_date.replace(day=billing_day)
-                end_date = start_date + relativedelta(months=1) - timedelta(days=1)
+                start_date = clamp_day(target_date, billing_day)
+                end_date = clamp_day(target_date + relativedelta(months=1), billing_day) - timedelta(days=1)
             elif payment_term == 1:  # Post-paid (NEW logic)
-                start_date = (target_date - relativedelta(months=1)).replace(day=billing_day)
-                end_date = target_date.replace(day=billing_day) - timedelta(days=1)
+                start_date = clamp_day(target_date - relativedelta(months=1), billing_day)
+                end_date = clamp_day(target_date, billing_day) - timedelta(days=1)
             title = f"{start_date.strftime('%d.%m.%y')} - {end_date.strftime('%d.%m.%y')} {brand_name}"
         except ValueError as e:
             print(f"Invalid billing day {billing_day} for target month: {e}")
@@ -172,148 +256,325 @@ def compute_invoice_task_details(billing_day, payment_term, brand_name, dependen
     return title
 
 # ------------------------------
-# SMTP SETTINGS & EMAIL REPORTING FUNCTIONS
+# EMAIL REPORTING FUNCTIONS
 # ------------------------------
 
-def get_smtp_settings():
+def create_report_mailer(fingerprint_path=DEFAULT_FINGERPRINT_PATH):
     """
-    Retrieve SMTP settings from environment variables.
-    If not available, fallback to reading from credentials.json.
+    Background mailer for the daily report digest to sales@prpillar.com.
+    Set SMTP_STARTTLS=0 to talk to a local stand-in without TLS (see fake_smtp.py).
     """
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = os.getenv("SMTP_PORT")
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    if not (smtp_server and smtp_port and smtp_user and smtp_password):
-        try:
-            with open("credentials.json") as f:
-                creds = json.load(f)
-                smtp_server = smtp_server or creds.get("SMTP_SERVER")
-                smtp_port = smtp_port or creds.get("SMTP_PORT")
-                smtp_user = smtp_user or creds.get("SMTP_USER")
-                smtp_password = smtp_password or creds.get("SMTP_PASSWORD")
-        except Exception as e:
-            print("Error loading SMTP settings:", e)
-            exit(1)
-    return smtp_server, int(smtp_port), smtp_user, smtp_password
-
-def send_missing_fields_report(report_body):
+    return ReportMailer(get_smtp_settings, cache=FingerprintCache(fingerprint_path),
+                        use_tls=os.getenv("SMTP_STARTTLS", "1") != "0")
+
+def submit_reports(mailer, validation_entries, cycle_entries, shard=DEFAULT_SHARD):
     """
-    Send an email with the report to sales@prpillar.com.
-    SMTP settings are loaded via environment variables or credentials.json.
+    Queue the report digest; only issues that are new or resolved since the last email go out.
+    Shards other than the default one report under their own name.
     """
-    smtp_server, smtp_port, smtp_user, smtp_password = get_smtp_settings()
-    sender_email = smtp_user
-    recipient_email = "sales@prpillar.com"
-    subject = "Missing Billing Fields Report"
-    
-    msg = MIMEMultipart()
-    msg["From"] = sender_email
-    msg["To"] = recipient_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(report_body, "plain"))
-    
-    try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(sender_email, recipient_email, msg.as_string())
-        server.quit()
-        print("Report email sent successfully.")
-    except Exception as e:
-        print("Failed to send email:", e)
-
-def generate_missing_fields_report(tasks):
+    prefix = "" if shard.name == DEFAULT_SHARD.name else f"{shard.name}:"
+    title_prefix = "" if not prefix else f"[{shard.name}] "
+    mailer.submit(prefix + "validation", title_prefix + VALIDATION_REPORT_TITLE, validation_entries)
+    mailer.submit(prefix + "hierarchy", title_prefix + CYCLES_REPORT_TITLE, cycle_entries)
+    mailer.flush()
+
+def validation_report_path(path, shard):
     """
-    Scan all tasks for missing billing day or payment term.
-    Returns a report string if any task is missing required fields.
+    Shards other than the default one write their validation results next to it, e.g. validation-agencies.csv.
     """
-    missing_entries = []
-    for task in tasks:
-        missing_fields = []
-        billing_day_found = False
-        payment_term_found = False
-        for field in task.get("custom_fields", []):
-            if field.get("id") == BILLING_DAY_FIELD_ID and field.get("value"):
-                billing_day_found = True
-            if field.get("id") == PAYMENT_TERMS_FIELD_ID and field.get("value") is not None:
-                payment_term_found = True
-        if not billing_day_found:
-            missing_fields.append("Billing Day")
-        if not payment_term_found:
-            missing_fields.append("Payment Terms")
-        if missing_fields:
-            missing_entries.append(f"Brand '{task.get('name')}' (ID: {task.get('id')}) is missing: {', '.join(missing_fields)}")
-    if missing_entries:
-        report = "The following brands are missing required fields:\n\n" + "\n".join(missing_entries)
-        return report
-    else:
-        return None
+    if shard.name == DEFAULT_SHARD.name:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{shard.name}{ext}"
+
+def plan_invoice_jobs(independent, parent, parent_children_names, parent_children_ids, start_date, end_date=None,
+                      blocked_ids=()):
+    """
+    Build the InvoiceJobs for every independent and parent brand billing between
+    start_date and end_date (inclusive; defaults to start_date), ordered by billing date.
+    Brands in blocked_ids (failed validation) are skipped.
+    """
+    end_date = end_date or start_date
+    billable = []
+    for brand in independent:
+        if brand.id in blocked_ids or brand.billing_day is None or brand.payment_term is None:
+            print(f"Skipping task '{brand.name}' due to invalid or missing billing day or payment terms.")
+            continue
+        billable.append(brand)
+    for brand in parent:
+        if brand.id in blocked_ids or brand.billing_day is None or brand.payment_term is None:
+            print(f"Skipping parent task '{brand.name}' due to invalid or missing billing day or payment terms.")
+            continue
+        billable.append(brand)
+
+    jobs = []
+    schedule = build_schedule(billable, start_date, end_date)
+    for billing_date in sorted(schedule):
+        for brand in schedule[billing_date]:
+            dependent_names = parent_children_names.get(brand.id, [])
+            dependent_ids = parent_children_ids.get(brand.id, [])
+            title = compute_invoice_task_details(brand.billing_day, brand.payment_term, brand.name, dependent_names, billing_date)
+            if title:
+                jobs.append(InvoiceJob(brand.id, brand.name, title, [brand.id] + dependent_ids, billing_date))
+    return jobs
+
+def print_invoice_plan(jobs):
+    current = None
+    for job in jobs:
+        if job.billing_date != current:
+            current = job.billing_date
+            print(f"\n{current.isoformat()}:")
+        print(f"  - {job.title}")
+    print(f"\n{len(jobs)} invoices planned.")
 
 # ------------------------------
 # MAIN EXECUTION
 # ------------------------------
 
-def main():
-    access_token = get_clickup_api_key()
-    tasks = get_all_brand_tasks(LIST_ID, STATUS_ID, access_token)
-    print(f"Retrieved {len(tasks)} tasks from source list.")
+def stream_and_group_brands(access_token, start_date, end_date, status_id=STATUS_ID, field_index=BRAND_FIELD_INDEX,
+                            list_id=LIST_ID):
+    """
+    Fetch, project, validate and group brands in one streaming pass.
+    Returns (validation, cycle_entries, independent, parent, parent_children_names, parent_children_ids),
+    or None if the list could not be read.
+    """
+    validation = BrandValidation()
+    grouper = StreamingGrouper(start_date, end_date, validation)
+    with get_metrics().phase("stream"):
+        try:
+            for brand in stream_brands(get_client(access_token), list_id, status_id, field_index):
+                grouper.add(brand)
+        except PaginationError as e:
+            print(f"Stopping: {e}")
+            return None
+        print(f"Streamed {grouper.count} tasks from source list.")
+        independent, parent, parent_children_names, parent_children_ids, hierarchy = grouper.finish()
+    cycle_entries = cycle_report_entries(hierarchy, grouper.names)
+    return validation, cycle_entries, independent, parent, parent_children_names, parent_children_ids
 
-    # Generate email report if any tasks are missing required fields.
-    report = generate_missing_fields_report(tasks)
-    if report:
-        send_missing_fields_report(report)
-    
-    independent, dependent, parent, parent_children_names, parent_children_ids = group_tasks(tasks, MOTHER_BRAND_FIELD_ID)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Create invoice tasks for brands billing in the coming days.")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH,
+                        help="Path of the local SQLite snapshot of the brands list.")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="Refetch the whole brands list instead of only tasks updated since the last run.")
+    parser.add_argument("--from", dest="from_date", type=parse_date,
+                        help="First run date (YYYY-MM-DD) to create invoices for; defaults to today.")
+    parser.add_argument("--to", dest="to_date", type=parse_date,
+                        help="Last run date (YYYY-MM-DD) to create invoices for; defaults to --from.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the invoice plan for the date range without creating anything.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Process brands page by page straight from the API, keeping only grouping indexes in memory.")
+    parser.add_argument("--pushdown", action="store_true",
+                        help="Fetch only the brands billing in the range (plus their families and invalid brands) with "
+                             "server-side filters; skips the snapshot and history.")
+    parser.add_argument("--fingerprints", default=DEFAULT_FINGERPRINT_PATH,
+                        help="Cache of issues already emailed, so only new or resolved ones are reported.")
+    parser.add_argument("--validation-report", metavar="PATH",
+                        help="Write every brand that failed validation, with its severity, to PATH (.csv or .json).")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_DIR,
+                        help="Directory of the daily brand snapshots (see brand_history.py); empty to disable. "
+                             "Not written on --dry-run.")
+    parser.add_argument("--metadata", default=DEFAULT_METADATA_PATH,
+                        help="Cache of workspace fields, statuses and users used to resolve ids by name.")
+    parser.add_argument("--config",
+                        help="JSON file of source -> destination list pairs to process in parallel (see shards.py).")
+    parser.add_argument("--shard-workers", type=int, default=SHARD_WORKERS,
+                        help="Shards processed at the same time.")
+    parser.add_argument("--rate-limit", type=int,
+                        help="Cap on ClickUp requests per minute across all shards.")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH,
+                        help="Write-ahead journal of invoice writes; unfinished invoices in it are completed first.")
+    parser.add_argument("--resume-only", action="store_true",
+                        help="Only finish the invoices left pending in the journal, without fetching brands.")
+    parser.add_argument("--metrics-dir", default=METRICS_DIR,
+                        help="Directory for run_metrics.json and run_metrics.prom, written at exit.")
+    args = parser.parse_args(argv)
+    if args.stream and args.pushdown:
+        parser.error("--stream and --pushdown cannot be combined")
+    return args
+
+def run_shard(shard, args, access_token, resolver, mailer, today, from_date, start_date, end_date, journal=None):
+    """
+    Fetch, report, plan and create the invoices of one source -> destination list pair.
+    Returns the invoice summary, or None if nothing was created (dry run or failure).
+    """
+    metrics = get_metrics()
+    with metrics.phase("metadata"):
+        ids = resolve_workspace_ids(resolver, shard)
+    if ids is None:
+        return None
+    field_index = build_field_index(ids.billing_day_field_id, ids.payment_terms_field_id, ids.mother_brand_field_id)
+
+    if args.stream:
+        grouped = stream_and_group_brands(access_token, start_date, end_date, ids.status_id, field_index, shard.list_id)
+        if grouped is None:
+            return None
+        validation, cycle_entries, independent, parent, parent_children_names, parent_children_ids = grouped
+    else:
+        if args.pushdown:
+            status_name = next((status.get("status") for status in resolver.statuses(shard.list_id)
+                                if status.get("id") == ids.status_id), shard.status_name)
+            with metrics.phase("fetch"):
+                try:
+                    tasks = get_billing_brand_tasks(shard.list_id, ids.status_id, status_name, access_token,
+                                                    start_date, end_date, field_index)
+                except PaginationError as e:
+                    print(f"Stopping: {e}")
+                    return None
+            print(f"Retrieved {len(tasks)} billing, linked or invalid tasks from source list {shard.list_id}.")
+        else:
+            store = SnapshotStore(args.snapshot)
+            try:
+                with metrics.phase("fetch"):
+                    history = BrandHistory(args.history, shard.list_id) if args.history and not args.dry_run else None
+                    tasks = get_all_brand_tasks(shard.list_id, ids.status_id, access_token, store=store,
+                                                full_refresh=args.full_refresh, field_index=field_index,
+                                                history=history)
+            finally:
+                store.close()
+            print(f"Retrieved {len(tasks)} tasks from source list {shard.list_id}.")
+
+        validation = BrandValidation()
+        with metrics.phase("group"):
+            grouped = group_tasks(tasks, validation)
+        independent, dependent, parent, parent_children_names, parent_children_ids, hierarchy = grouped
+        cycle_entries = cycle_report_entries(hierarchy, {brand.id: brand.name for brand in tasks})
+
+    counts = validation.counts()
+    print(f"Validated {validation.checked} brands: {counts['error']} with errors, {counts['warning']} with warnings.")
+    if args.validation_report:
+        validation.write(validation_report_path(args.validation_report, shard))
+
+    # Email any new or resolved issues in the background while invoices are created.
+    validation_entries = validation.report_entries()
+    if mailer is not None:
+        with metrics.phase("report"):
+            submit_reports(mailer, validation_entries, cycle_entries, shard)
+    else:
+        for entry in validation_entries + cycle_entries:
+            print(entry)
+
+    with metrics.phase("plan"):
+        jobs = plan_invoice_jobs(independent, parent, parent_children_names, parent_children_ids, start_date, end_date,
+                                 validation.blocked_ids)
+    if args.dry_run:
+        print_invoice_plan(jobs)
+        return None
+
+    with metrics.phase("create"):
+        return create_invoices(access_token, shard, ids, jobs, today, from_date, journal)
+
+def create_invoices(access_token, shard, ids, jobs, today, from_date, journal=None):
+    """
+    Create the planned invoices of a shard, skipping any that already exist. Returns the invoice summary.
+    With an InvoiceJournal, invoices left half-done by an earlier run are finished first.
+    """
+    resumed = 0
+    if journal is not None:
+        resumed, _ = resume_pending(get_client(access_token), journal, shard.destination_list_id)
+    index = None
+    if jobs:
+        # Reruns and backfills must not create duplicate invoices.
+        lookback_days = INVOICE_LOOKBACK_DAYS + max(0, (today - from_date).days)
+        index = load_invoice_index(get_client(access_token), shard.destination_list_id, ids.relationship_field_id,
+                                   lookback_days)
+        if index is None:
+            print("Cannot check for existing invoices; not creating any to avoid duplicates.")
+            jobs = []
+    moscow_time = timezone(timedelta(hours=3))
+    due_timestamp = int(datetime.now(moscow_time).timestamp() * 1000)
+    remove_watchers = [ids.removed_watcher_user_id] if ids.removed_watcher_user_id else []
+    results = run_invoice_jobs(
+        get_client(access_token), jobs, shard.destination_list_id, ids.relationship_field_id, due_timestamp,
+        add_watchers=[ids.watcher_user_id], remove_watchers=remove_watchers, index=index,
+        journal=journal,
+    )
+    summary = summarize_results(results)
+    summary["resumed"] = resumed
+    summary["pending"] = len(journal.pending_for(shard.destination_list_id)) if journal is not None else 0
+    return summary
+
+def print_summary(summary, label="Invoices"):
+    print(f"{label}: {summary['created']} created, {summary['skipped']} already existed, "
+          f"{summary['partial']} partial, {summary['failed']} failed ({summary['requests']} API requests).")
+    if summary.get("resumed") or summary.get("pending"):
+        print(f"{label} from earlier runs: {summary.get('resumed', 0)} finished, "
+              f"{summary.get('pending', 0)} still pending in the journal.")
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_rate_priority("high")   # invoices go ahead of backups in the shared rate budget
+    metrics = get_metrics()
+    if args.metrics_dir:
+        atexit.register(metrics.write, args.metrics_dir)
+    access_token = get_clickup_api_key()
     today = datetime.now(timezone.utc).date()
-    target_date = today + timedelta(days=10)
-    
-    # Process Independent brands
-    for task in independent:
-        billing_day = None
-        payment_term = None
-        for field in task.get("custom_fields", []):
-            if field.get("id") == BILLING_DAY_FIELD_ID and field.get("value"):
-                billing_day = int(field.get("value"))
-            if field.get("id") == PAYMENT_TERMS_FIELD_ID and field.get("value") is not None:
-                payment_term = int(field.get("value"))
-        if billing_day is None or payment_term is None:
-            print(f"Skipping task '{task['name']}' due to missing billing day or payment terms.")
-            continue
-        
-        if billing_day == target_date.day:
-            title = compute_invoice_task_details(billing_day, payment_term, task['name'], [], target_date)
-            if title:
-                new_task_id = create_task(title, DESTINATION_LIST_ID, access_token, today)
-                if new_task_id:
-                    set_relationship_field(new_task_id, RELATIONSHIP_FIELD_ID, access_token, add_ids=[task['id']])
-                    add_watcher(new_task_id, WATCHER_USER_ID, access_token)
-                    remove_watcher(new_task_id, "6830798", access_token)
-    
-    # Process Parent brands
-    for task in parent:
-        billing_day = None
-        payment_term = None
-        for field in task.get("custom_fields", []):
-            if field.get("id") == BILLING_DAY_FIELD_ID and field.get("value"):
-                billing_day = int(field.get("value"))
-            if field.get("id") == PAYMENT_TERMS_FIELD_ID and field.get("value") is not None:
-                payment_term = int(field.get("value"))
-        if billing_day is None or payment_term is None:
-            print(f"Skipping parent task '{task['name']}' due to missing billing day or payment terms.")
-            continue
-        
-        if billing_day == target_date.day:
-            dependent_names = parent_children_names.get(task['id'], [])
-            dependent_ids = parent_children_ids.get(task['id'], [])
-            title = compute_invoice_task_details(billing_day, payment_term, task['name'], dependent_names, target_date)
-            if title:
-                new_task_id = create_task(title, DESTINATION_LIST_ID, access_token, today)
-                if new_task_id:
-                    related_ids = [task['id']] + dependent_ids
-                    set_relationship_field(new_task_id, RELATIONSHIP_FIELD_ID, access_token, add_ids=related_ids)
-                    add_watcher(new_task_id, WATCHER_USER_ID, access_token)
-                    remove_watcher(new_task_id, "6830798", access_token)
+    from_date = args.from_date or today
+    to_date = args.to_date or from_date
+    if to_date < from_date:
+        print("--to must not be before --from.")
+        return None
+    # Each run date creates the invoices for brands billing INVOICE_LEAD_DAYS later.
+    start_date = from_date + timedelta(days=INVOICE_LEAD_DAYS)
+    end_date = to_date + timedelta(days=INVOICE_LEAD_DAYS)
+
+    shards, rate_limit = [DEFAULT_SHARD], None
+    if args.config:
+        try:
+            shards, rate_limit = load_shard_config(args.config, DEFAULT_SHARD)
+        except (OSError, ValueError) as e:
+            print(f"Cannot load shard config: {e}")
+            return None
+    rate_limit = args.rate_limit or rate_limit
+    if rate_limit:
+        set_rate_budget(rate_limit)
+
+    if args.resume_only and args.dry_run:
+        print("--resume-only sends the pending writes; it cannot be combined with --dry-run.")
+        return None
+    journal = None if args.dry_run else InvoiceJournal(args.journal)
+    if args.resume_only:
+        try:
+            for shard in shards:
+                with metrics.phase("resume"):
+                    resume_pending(get_client(access_token), journal, shard.destination_list_id)
+        finally:
+            journal.close()
+        return None
+
+    resolver = MetadataResolver(get_client(access_token), MetadataCache(args.metadata))
+    mailer = None if args.dry_run else create_report_mailer(args.fingerprints)
+
+    def run_one(shard):
+        return run_shard(shard, args, access_token, resolver, mailer, today, from_date, start_date, end_date, journal)
+
+    try:
+        if len(shards) == 1:
+            results = [(shards[0].name, run_one(shards[0]))]
+        else:
+            results = [(result.name, result.summary) for result in run_shards(shards, run_one, args.shard_workers)]
+    finally:
+        resolver.save()
+        if journal is not None:
+            journal.close()
+        if mailer is not None:
+            with metrics.phase("report_wait"):
+                mailer.close()
+
+    summaries = [summary for _, summary in results if summary is not None]
+    if not summaries:
+        return None
+    if len(shards) > 1:
+        for name, summary in results:
+            if summary is None:
+                print(f"[{name}] No invoices created.")
+            else:
+                print_summary(summary, f"[{name}] Invoices")
+    summary = combine_summaries(summaries)
+    print_summary(summary)
+    return summary
 
 if __name__ == '__main__':
     main()
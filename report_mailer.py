@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+
+from run_metrics import get_metrics
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_FINGERPRINT_PATH = "report_fingerprints.json"
+REPORT_RECIPIENT = "sales@prpillar.com"
+REPORT_SUBJECT = "Missing Billing Fields Report"
+
+def fingerprint(entry):
+    return hashlib.sha1(entry.encode("utf-8")).hexdigest()
+
+# ------------------------------
+# FINGERPRINT CACHE
+# ------------------------------
+
+class FingerprintCache:
+    """
+    On-disk record of the issues already reported, per report type:
+    {report_type: {fingerprint: entry text}}.
+    """
+
+    def __init__(self, path=DEFAULT_FINGERPRINT_PATH):
+        self.path = path
+        self.reported = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.reported = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable report fingerprint cache {path}: {e}")
+
+    def diff(self, report_type, entries):
+        """
+        Return (new_entries, resolved_entries) compared with what was last reported.
+        """
+        previous = self.reported.get(report_type, {})
+        current = {fingerprint(entry): entry for entry in entries}
+        new = [entry for key, entry in current.items() if key not in previous]
+        resolved = [entry for key, entry in previous.items() if key not in current]
+        return new, resolved
+
+    def update(self, report_type, entries):
+        self.reported[report_type] = {fingerprint(entry): entry for entry in entries}
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.reported, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+# ------------------------------
+# BACKGROUND MAILER
+# ------------------------------
+
+class ReportMailer:
+    """
+    Sends report digests from a background thread over one reused SMTP connection.
+
+    Each submit() compares a report type's entries with the fingerprint cache;
+    only new and resolved issues make it into the digest. flush() hands the
+    digest to the sender thread and returns immediately; close() waits for the
+    thread, quits the SMTP session and saves the cache once the mail went out.
+    """
+
+    def __init__(self, settings_loader, recipient=REPORT_RECIPIENT, subject=REPORT_SUBJECT,
+                 cache=None, use_tls=True):
+        self.settings_loader = settings_loader   # returns (server, port, user, password)
+        self.recipient = recipient
+        self.subject = subject
+        self.cache = cache if cache is not None else FingerprintCache()
+        self.use_tls = use_tls
+        self.sections = []       # (title, new_entries, resolved_entries)
+        self.pending = {}        # report_type -> entries, committed to the cache once sent
+        self.sent = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._server = None
+        self._settings = None
+        self._lock = threading.Lock()   # submit/flush may be called from several shards
+
+    def submit(self, report_type, title, entries):
+        """
+        Add one report type to the next digest. Returns the number of new plus resolved issues.
+        """
+        with self._lock:
+            new, resolved = self.cache.diff(report_type, entries)
+            if new or resolved:
+                self.sections.append((title, new, resolved))
+                self.pending[report_type] = list(entries)
+            return len(new) + len(resolved)
+
+    def render(self):
+        parts = []
+        for title, new, resolved in self.sections:
+            lines = [title, ""]
+            if new:
+                lines.append("New:")
+                lines.extend(new)
+            if resolved:
+                if new:
+                    lines.append("")
+                lines.append("Resolved since the last report:")
+                lines.extend(resolved)
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
+
+    def flush(self):
+        """
+        Queue the current digest for sending in the background; a no-op if nothing changed.
+        """
+        with self._lock:
+            if not self.sections:
+                return False
+            self._queue.put((self.render(), dict(self.pending)))
+            self.sections = []
+            self.pending = {}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="report-mailer", daemon=True)
+                self._thread.start()
+            return True
+
+    def close(self, timeout=60):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print("Report email still sending; giving up waiting.")
+            return
+        self.cache.save()
+
+    # smtplib and email are imported on first send, so runs that report nothing never load them.
+
+    def _connect(self):
+        import smtplib
+        server, port, user, password = self._settings
+        connection = smtplib.SMTP(server, port)
+        if self.use_tls:
+            connection.starttls()
+        connection.login(user, password)
+        return connection
+
+    def _connection(self):
+        import smtplib
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except smtplib.SMTPException:
+                pass
+        self._server = self._connect()
+        return self._server
+
+    def _send(self, body):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        sender_email = self._settings[2]
+        msg = MIMEMultipart()
+        msg["From"] = sender_email
+        msg["To"] = self.recipient
+        msg["Subject"] = self.subject
+        msg.attach(MIMEText(body, "plain"))
+        with get_metrics().timed_call("smtp", "SEND", "sendmail"):
+            self._connection().sendmail(sender_email, self.recipient, msg.as_string())
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            body, reported = item
+            try:
+                # Loaded here rather than in flush(), so missing settings fail this
+                # send instead of the run that queued it.
+                if self._settings is None:
+                    self._settings = self.settings_loader()
+                self._send(body)
+                for report_type, entries in reported.items():
+                    self.cache.update(report_type, entries)
+                self.sent += 1
+                print("Report email sent successfully.")
+            except Exception as e:
+                # The cache is left as is, so the same issues are reported again next run.
+                print("Failed to send email:", e)
+        if self._server is not None:
+            import smtplib
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+
+# Path segments that are followed by an object id in ClickUp API paths.
+# v3 uses the plural forms, e.g. "workspaces/{id}/docs/{id}/pages/{id}".
+ID_PARENTS = {"list", "task", "field", "folder", "space", "team", "view", "comment", "doc", "page", "user", "webhook",
+              "workspaces", "docs", "pages"}
+
+def endpoint_template(path):
+    """
+    Collapse ids in an API path, e.g. "list/42370637/task" -> "/list/{id}/task" or
+    "v3/workspaces/9012/docs/abc-12/pages/xyz-9" -> "/workspaces/{id}/docs/{id}/pages/{id}".
+    """
+    parts = [part for part in path.split("?")[0].split("/") if part]
+    if "v2" in parts:
+        parts = parts[parts.index("v2") + 1:]
+    elif "v3" in parts:
+        parts = parts[parts.index("v3") + 1:]
+    template = []
+    for i, part in enumerate(parts):
+        if i and parts[i - 1] in ID_PARENTS and part not in ID_PARENTS:
+            template.append("{id}")
+        else:
+            template.append(part)
+    return "/" + "/".join(template)
+
+# ------------------------------
+# METRICS REGISTRY
+# ------------------------------
+
+class _CallStats:
+    __slots__ = ("count", "errors", "retries", "bytes_sent", "bytes_received", "seconds", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "seconds": round(self.seconds, 6),
+            "latency_buckets": {str(le): n for le, n in zip(LATENCY_BUCKETS, self.buckets)},
+        }
+
+class RunMetrics:
+    """
+    Thread-safe counters for one run: per-endpoint call stats, phase timings
+    and the lowest rate-limit headroom reported by ClickUp.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.calls = {}    # (service, method, endpoint) -> _CallStats
+        self.phases = {}   # phase name -> seconds
+        self.rate_limit_min_remaining = None
+        self.rate_limit_limit = None
+
+    def record_call(self, service, method, endpoint, seconds, ok=True, retries=0, bytes_sent=0, bytes_received=0):
+        with self._lock:
+            stats = self.calls.get((service, method, endpoint))
+            if stats is None:
+                stats = self.calls[(service, method, endpoint)] = _CallStats()
+            stats.count += 1
+            stats.errors += 0 if ok else 1
+            stats.retries += retries
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.seconds += seconds
+            for i, le in enumerate(LATENCY_BUCKETS):
+                if seconds <= le:
+                    stats.buckets[i] += 1
+
+    def record_rate_limit(self, remaining, limit=None):
+        with self._lock:
+            if self.rate_limit_min_remaining is None or remaining < self.rate_limit_min_remaining:
+                self.rate_limit_min_remaining = remaining
+            if limit is not None:
+                self.rate_limit_limit = limit
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def timed_call(self, service, method, endpoint):
+        """
+        Time a non-HTTP call (e.g. SMTP); it counts as an error if it raises.
+        """
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record_call(service, method, endpoint, time.perf_counter() - started, ok=ok)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "duration_seconds": round(time.time() - self.started, 6),
+                "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                "rate_limit": {"min_remaining": self.rate_limit_min_remaining, "limit": self.rate_limit_limit},
+                "calls": [
+                    {"service": service, "method": method, "endpoint": endpoint, **stats.as_dict()}
+                    for (service, method, endpoint), stats in sorted(self.calls.items())
+                ],
+            }
+
+    def to_prometheus(self, prefix="sales_automation"):
+        data = self.as_dict()
+        lines = [
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {data['duration_seconds']}",
+            f"# TYPE {prefix}_phase_duration_seconds gauge",
+        ]
+        for name, seconds in data["phases"].items():
+            lines.append(f'{prefix}_phase_duration_seconds{{phase="{name}"}} {seconds}')
+        if data["rate_limit"]["min_remaining"] is not None:
+            lines.append(f"# TYPE {prefix}_rate_limit_min_remaining gauge")
+            lines.append(f"{prefix}_rate_limit_min_remaining {data['rate_limit']['min_remaining']}")
+
+        metrics = {
+            "calls_total": "count", "call_errors_total": "errors", "call_retries_total": "retries",
+            "bytes_sent_total": "bytes_sent", "bytes_received_total": "bytes_received",
+        }
+        for metric, key in metrics.items():
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for call in data["calls"]:
+                labels = f'service="{call["service"]}",method="{call["method"]}",endpoint="{call["endpoint"]}"'
+                lines.append(f"{prefix}_{metric}{{{labels}}} {call[key]}")
+
+        lines.append(f"# TYPE {prefix}_call_duration_seconds histogram")
+        for call in data["calls"]:
+            labels = f'service="{call["service"]}",method="{call["method"]}",endpoint="{call["endpoint"]}"'
+            for le, n in call["latency_buckets"].items():
+                lines.append(f'{prefix}_call_duration_seconds_bucket{{{labels},le="{le}"}} {n}')
+            lines.append(f'{prefix}_call_duration_seconds_bucket{{{labels},le="+Inf"}} {call["count"]}')
+            lines.append(f"{prefix}_call_duration_seconds_sum{{{labels}}} {call['seconds']}")
+            lines.append(f"{prefix}_call_duration_seconds_count{{{labels}}} {call['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory, name="run_metrics"):
+        """
+        Write <name>.json and <name>.prom (Prometheus textfile format) into directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{name}.json"), "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        # Write then rename so the node exporter never reads a partial file.
+        prom_path = os.path.join(directory, f"{name}.prom")
+        with open(prom_path + ".tmp", "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+
+# ------------------------------
+# SHARED INSTANCE
+# ------------------------------
+
+metrics = RunMetrics()
+
+def get_metrics():
+    return metrics
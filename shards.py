@@ -0,0 +1,80 @@
+"""
+Run the invoice automation for several source -> destination list pairs at once.
+
+A shard config is a JSON file:
+
+    {
+      "rate_limit_per_minute": 100,
+      "shards": [
+        {"name": "brands", "list_id": "42370637", "destination_list_id": "901201953178"},
+        {"name": "agencies", "list_id": "...", "destination_list_id": "...",
+         "status_name": "signed", "billing_day_field_name": "Invoice Day"}
+      ]
+    }
+
+Every key of ShardConfig can be set per shard; missing keys take the values of
+the default (Brands Basket) shard. Shards run on a thread pool and share one
+ClickUp client, so they share its rate budget.
+"""
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+SHARD_WORKERS = 4
+
+ShardConfig = namedtuple("ShardConfig", [
+    "name", "list_id", "destination_list_id",
+    "status_name", "status_id",
+    "billing_day_field_name", "billing_day_field_id",
+    "payment_terms_field_name", "payment_terms_field_id",
+    "mother_brand_field_name", "mother_brand_field_id",
+    "relationship_field_name", "relationship_field_id",
+    "watcher_user_name", "watcher_user_id",
+    "removed_watcher_user_name", "removed_watcher_user_id",
+])
+
+ShardResult = namedtuple("ShardResult", ["name", "summary", "error"])
+
+class ShardConfigError(ValueError):
+    pass
+
+def load_shard_config(path, defaults):
+    """
+    Read a shard config file. Returns (shards, rate_limit_per_minute).
+    """
+    with open(path) as f:
+        data = json.load(f)
+    entries = data.get("shards") or []
+    if not entries:
+        raise ShardConfigError(f"{path} defines no shards")
+    shards = []
+    for n, entry in enumerate(entries):
+        unknown = set(entry) - set(ShardConfig._fields)
+        if unknown:
+            raise ShardConfigError(f"Shard {n} in {path} has unknown keys: {', '.join(sorted(unknown))}")
+        shard = defaults._replace(**entry)
+        if "name" not in entry:
+            shard = shard._replace(name=shard.list_id)
+        shards.append(shard)
+    names = [shard.name for shard in shards]
+    if len(set(names)) != len(names):
+        raise ShardConfigError(f"Shard names in {path} must be unique")
+    return shards, data.get("rate_limit_per_minute")
+
+def run_shards(shards, run_one, workers=SHARD_WORKERS):
+    """
+    Call run_one(shard) for every shard on a thread pool.
+    Returns a ShardResult per shard, in config order; an exception fails only its own shard.
+    """
+    def run(shard):
+        try:
+            return ShardResult(shard.name, run_one(shard), None)
+        except Exception as e:
+            print(f"[{shard.name}] Failed: {e}")
+            return ShardResult(shard.name, None, str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(shards)))) as pool:
+        return list(pool.map(run, shards))
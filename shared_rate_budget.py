@@ -0,0 +1,129 @@
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_BUDGET_PATH = os.path.join(tempfile.gettempdir(), "clickup_rate_budget.db")
+SQLITE_TIMEOUT = 30          # seconds to wait for another process's token update
+BURST_FRACTION = 0.1         # bucket size as a share of the per-minute limit
+MAX_WAIT_STEP = 5.0          # seconds; waiting callers recheck the bucket at least this often
+
+# Share of the bucket a caller must leave for higher priorities. A "low" caller
+# only takes a token while more than half the bucket is left, so whenever
+# "high" callers are busy they get the refill first; alone, any caller still
+# gets the full rate once the bucket has refilled to its floor.
+PRIORITY_RESERVES = {
+    "high": 0.0,     # invoice creation
+    "normal": 0.25,  # ad-hoc scripts
+    "low": 0.5,      # backups
+}
+DEFAULT_PRIORITY = "normal"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+def budget_key(access_token):
+    # Budgets are per API token; only a digest of it is written to disk.
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+# ------------------------------
+# SHARED TOKEN BUCKET
+# ------------------------------
+
+class SharedRateBudget:
+    """
+    Token bucket kept in a SQLite file, so every process using the same API
+    token on this machine draws from one per-minute budget.
+
+    Each acquire() refills the bucket from the elapsed time and takes a token
+    inside one BEGIN IMMEDIATE transaction, which serialises processes on the
+    file lock. A 429 or an exhausted X-RateLimit-Remaining seen by any process
+    pauses all of them until the reset time (pause_until()).
+    """
+
+    def __init__(self, access_token, per_minute, priority=DEFAULT_PRIORITY, path=DEFAULT_BUDGET_PATH,
+                 burst=None):
+        if priority not in PRIORITY_RESERVES:
+            raise ValueError(f"Unknown rate priority {priority!r}; expected one of {', '.join(PRIORITY_RESERVES)}")
+        self.key = budget_key(access_token)
+        self.per_minute = per_minute
+        self.capacity = float(burst or max(1, int(per_minute * BURST_FRACTION)))
+        self.priority = priority
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")   # losing the bucket on a crash only costs a refill
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def floor(self):
+        return self.capacity * PRIORITY_RESERVES[self.priority]
+
+    def _take(self):
+        """
+        Try to take one token. Returns 0 on success, else the seconds to wait before trying again.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self.conn.execute("SELECT tokens, updated, paused_until FROM buckets WHERE key = ?",
+                                        (self.key,)).fetchone()
+                if row is None:
+                    tokens, paused_until = self.capacity, 0.0
+                else:
+                    tokens, updated, paused_until = row
+                    tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.per_minute / 60.0)
+                if now < paused_until:
+                    delay = paused_until - now
+                elif tokens - 1 >= self.floor:
+                    tokens -= 1
+                    delay = 0.0
+                else:
+                    delay = (self.floor + 1 - tokens) * 60.0 / self.per_minute
+                self.conn.execute(
+                    "INSERT INTO buckets (key, tokens, updated, paused_until) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (self.key, tokens, now, paused_until),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return delay
+
+    def acquire(self):
+        while True:
+            delay = self._take()
+            if not delay:
+                return
+            # Jitter so processes waiting on the same refill do not all wake at once.
+            time.sleep(min(MAX_WAIT_STEP, delay + random.uniform(0, 60.0 / self.per_minute)))
+
+    def pause_until(self, resume_at):
+        """
+        Hold every process's requests until resume_at (epoch seconds).
+        """
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO buckets (key, tokens, updated, paused_until) VALUES (?, 0, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET paused_until = MAX(paused_until, excluded.paused_until)",
+                (self.key, time.time(), resume_at),
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+import time
+
+from clickup_client import fetch_pages
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_SNAPSHOT_PATH = "brands_snapshot.db"
+STALE_AFTER_MS = 7 * 24 * 60 * 60 * 1000   # force a full refetch weekly
+SYNC_OVERLAP_MS = 5 * 60 * 1000             # re-read a small window to absorb clock skew
+SQLITE_TIMEOUT = 60                         # seconds to wait while another shard writes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    list_id TEXT NOT NULL,
+    name TEXT,
+    status_id TEXT,
+    date_updated INTEGER,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_list ON tasks (list_id, deleted);
+CREATE TABLE IF NOT EXISTS sync_state (
+    list_id TEXT PRIMARY KEY,
+    last_sync_ms INTEGER NOT NULL,
+    last_full_sync_ms INTEGER NOT NULL
+);
+"""
+SCHEMA_VERSION = 1   # PRAGMA user_version; 1 dropped the unused field_values table
+
+def now_ms():
+    return int(time.time() * 1000)
+
+# ------------------------------
+# SNAPSHOT STORE
+# ------------------------------
+
+class SnapshotStore:
+    """
+    Local SQLite copy of a ClickUp list's tasks (with their custom fields).
+
+    The first sync (or one requested with full=True, or one run after the
+    snapshot is older than STALE_AFTER_MS) downloads the whole list; later syncs
+    only ask ClickUp for tasks with date_updated_gt the previous sync. Tasks that
+    are archived, that disappear from a full refetch, or that the webhook daemon
+    hears were deleted are kept as tombstones (deleted=1) and are no longer
+    returned by load_tasks().
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS field_values")
+        if version < SCHEMA_VERSION:
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def get_sync_state(self, list_id):
+        row = self.conn.execute(
+            "SELECT last_sync_ms, last_full_sync_ms FROM sync_state WHERE list_id = ?", (list_id,)
+        ).fetchone()
+        return row
+
+    def is_stale(self, list_id, now=None):
+        state = self.get_sync_state(list_id)
+        if state is None:
+            return True
+        now = now if now is not None else now_ms()
+        return now - state[1] > STALE_AFTER_MS
+
+    def upsert_tasks(self, list_id, tasks):
+        with self.conn:
+            for task in tasks:
+                self.conn.execute(
+                    "INSERT INTO tasks (id, list_id, name, status_id, date_updated, deleted, payload) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET list_id = excluded.list_id, name = excluded.name, "
+                    "status_id = excluded.status_id, date_updated = excluded.date_updated, deleted = 0, "
+                    "payload = excluded.payload",
+                    (
+                        task["id"],
+                        list_id,
+                        task.get("name"),
+                        task.get("status", {}).get("id"),
+                        int(task.get("date_updated") or 0),
+                        json.dumps(task),
+                    ),
+                )
+
+    def tombstone(self, task_ids):
+        with self.conn:
+            self.conn.executemany("UPDATE tasks SET deleted = 1 WHERE id = ?", [(task_id,) for task_id in task_ids])
+
+    def live_task_ids(self, list_id):
+        rows = self.conn.execute("SELECT id FROM tasks WHERE list_id = ? AND deleted = 0", (list_id,))
+        return {row[0] for row in rows}
+
+    def load_tasks(self, list_id):
+        """
+        Return the live (non-tombstoned) tasks of a list as ClickUp task dicts.
+        """
+        rows = self.conn.execute(
+            "SELECT payload FROM tasks WHERE list_id = ? AND deleted = 0 ORDER BY rowid", (list_id,)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def _set_sync_state(self, list_id, sync_ms, full):
+        with self.conn:
+            if full:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (list_id, last_sync_ms, last_full_sync_ms) VALUES (?, ?, ?)",
+                    (list_id, sync_ms, sync_ms),
+                )
+            else:
+                self.conn.execute("UPDATE sync_state SET last_sync_ms = ? WHERE list_id = ?", (sync_ms, list_id))
+
+    def sync(self, client, list_id, full=False):
+        """
+        Bring the snapshot of list_id up to date. Returns the number of tasks downloaded,
+        or None if the refresh failed (the previous snapshot is left untouched).
+        """
+        started = now_ms()
+        full = full or self.is_stale(list_id, started)
+        params = {"include_custom_fields": "true", "include_closed": "true", "limit": 100}
+
+        if full:
+            tasks, ok = fetch_pages(client, f"list/{list_id}/task", params=params)
+            if not ok:
+                print(f"Full snapshot refresh of list {list_id} failed; keeping previous snapshot.")
+                return None
+            seen = {task["id"] for task in tasks}
+            self.upsert_tasks(list_id, tasks)
+            self.tombstone(self.live_task_ids(list_id) - seen)
+            self._set_sync_state(list_id, started, full=True)
+            print(f"Snapshot of list {list_id} fully refreshed: {len(tasks)} tasks.")
+            return len(tasks)
+
+        since = self.get_sync_state(list_id)[0] - SYNC_OVERLAP_MS
+        updated, ok = fetch_pages(client, f"list/{list_id}/task", params={**params, "date_updated_gt": since})
+        archived, archived_ok = fetch_pages(
+            client, f"list/{list_id}/task", params={**params, "archived": "true", "date_updated_gt": since}
+        )
+        # Deleted tasks and tasks moved to another list do not show up here; they are
+        # tombstoned by the next full refresh, or right away by webhook_daemon.py.
+        if not (ok and archived_ok):
+            print(f"Incremental snapshot refresh of list {list_id} failed; keeping previous snapshot.")
+            return None
+        archived_ids = {task["id"] for task in archived}
+        self.upsert_tasks(list_id, [task for task in updated if task["id"] not in archived_ids])
+        self.tombstone(archived_ids)
+        self._set_sync_state(list_id, started, full=False)
+        print(f"Snapshot of list {list_id} refreshed: {len(updated)} updated, {len(archived_ids)} archived.")
+        return len(updated) + len(archived)
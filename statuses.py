@@ -1,15 +1,10 @@
-import requests
-import os
-import json
+from clickup_client import get_client
+from credentials import get_clickup_api_key
+
+LIST_ID = "42370637"
 
 def get_list_statuses(list_id, access_token):
-    url = f"https://api.clickup.com/api/v2/list/{list_id}"
-    headers = {
-        'Authorization': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    response = requests.get(url, headers=headers)
+    response = get_client(access_token).get(f"list/{list_id}")
     if response.status_code == 200:
         list_details = response.json()
         statuses = list_details.get('statuses', [])
@@ -18,15 +13,17 @@ def get_list_statuses(list_id, access_token):
         print(f"Failed to retrieve list statuses: {response.status_code}")
         return None
 
-# Replace 'YOUR_ACCESS_TOKEN' with your actual ClickUp API token
-access_token = os.getenv('CLICKUP_API_KEY') or json.load(open('credentials.json'))['CLICKUP_API_KEY']
-list_id = "42370637"
+def print_statuses(statuses):
+    if statuses:
+        print("List statuses:")
+        for status in statuses:
+            print(f"Status ID: {status['id']}, Name: {status['status']}")
+    else:
+        print("No statuses found or an error occurred.")
+
+def main(list_id=LIST_ID):
+    # Retrieve statuses for the list
+    print_statuses(get_list_statuses(list_id, get_clickup_api_key()))
 
-# Retrieve statuses for the list
-statuses = get_list_statuses(list_id, access_token)
-if statuses:
-    print("List statuses:")
-    for status in statuses:
-        print(f"Status ID: {status['id']}, Name: {status['status']}")
-else:
-    print("No statuses found or an error occurred.")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Filter specs for ClickUp task listings, pushed down to the API where it can express them.
+
+    spec = TaskFilter(status_ids=[STATUS_ID], status_names=["active"],
+                      fields=[FieldPredicate(BILLING_DAY_FIELD_ID, "IN", [14, 15])],
+                      updated_since=1760000000000)
+    tasks = fetch_filtered_tasks(client, list_id, spec)
+
+compile() turns the spec into `statuses[]`, `custom_fields` (JSON) and
+`date_updated_gt` query parameters. What the API cannot express exactly is
+widened (a set of numbers becomes the range that covers it; status ids
+become their names, which several statuses may share), and every returned
+task is checked against the full spec with matches(), so the result is the
+same whether or not the server applied a filter.
+"""
+import json
+from collections import namedtuple
+
+from clickup_client import PAGE_CONCURRENCY, iter_pages
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+PUSHDOWN_OPERATORS = {"=", "!=", "<", "<=", ">", ">=", "IS NULL", "IS NOT NULL"}
+CLIENT_OPERATORS = {"IN"}    # value: collection of numbers; pushed down as the range covering them
+
+FieldPredicate = namedtuple("FieldPredicate", ["field_id", "operator", "value"], defaults=(None,))
+
+def _is_null(value):
+    return value is None or value == "" or value == []
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def predicate_matches(predicate, value):
+    """
+    Evaluate a FieldPredicate against a raw custom field value.
+    """
+    operator = predicate.operator
+    if operator == "IS NULL":
+        return _is_null(value)
+    if operator == "IS NOT NULL":
+        return not _is_null(value)
+    if _is_null(value):
+        return False
+    if operator == "IN":
+        return _number(value) in {float(item) for item in predicate.value}
+    if operator in ("=", "!="):
+        expected = _number(predicate.value)
+        equal = _number(value) == expected if expected is not None else value == predicate.value
+        return equal if operator == "=" else not equal
+    actual, expected = _number(value), _number(predicate.value)
+    if actual is None or expected is None:
+        return False
+    return {"<": actual < expected, "<=": actual <= expected,
+            ">": actual > expected, ">=": actual >= expected}[operator]
+
+def contiguous_runs(values):
+    """
+    Split integers into runs of consecutive values: {30, 31, 1, 2} -> [(1, 2), (30, 31)].
+    An IN predicate over one run is pushed down exactly; callers can issue one query per run.
+    """
+    runs = []
+    for value in sorted(set(values)):
+        if runs and value == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], value)
+        else:
+            runs.append((value, value))
+    return runs
+
+def compile_predicate(predicate):
+    """
+    Return the custom_fields filters that cover a predicate (possibly more loosely).
+    """
+    if predicate.operator in PUSHDOWN_OPERATORS:
+        entry = {"field_id": predicate.field_id, "operator": predicate.operator}
+        if predicate.value is not None:
+            entry["value"] = predicate.value
+        return [entry]
+    if predicate.operator == "IN":
+        values = sorted(predicate.value)
+        if not values:
+            return []
+        if values[0] == values[-1]:
+            return [{"field_id": predicate.field_id, "operator": "=", "value": values[0]}]
+        return [{"field_id": predicate.field_id, "operator": ">=", "value": values[0]},
+                {"field_id": predicate.field_id, "operator": "<=", "value": values[-1]}]
+    raise ValueError(f"Unsupported field operator {predicate.operator!r}")
+
+# ------------------------------
+# FILTER SPEC
+# ------------------------------
+
+class TaskFilter:
+    """
+    Tasks in any of status_ids (with status_names pushed down as statuses[]),
+    whose custom fields satisfy every FieldPredicate, updated after
+    updated_since (ms). Unset parts do not filter.
+    """
+
+    def __init__(self, status_ids=None, status_names=None, fields=(), updated_since=None):
+        self.status_ids = set(status_ids) if status_ids else None
+        self.status_names = [name for name in status_names or () if name]
+        self.fields = list(fields)
+        self.updated_since = updated_since
+        for predicate in self.fields:
+            if predicate.operator not in PUSHDOWN_OPERATORS | CLIENT_OPERATORS:
+                raise ValueError(f"Unsupported field operator {predicate.operator!r}")
+
+    def compile(self):
+        """
+        Return the query parameters for the parts of the spec ClickUp can evaluate.
+        """
+        params = {}
+        if self.status_names:
+            params["statuses[]"] = self.status_names
+        custom_fields = [entry for predicate in self.fields for entry in compile_predicate(predicate)]
+        if custom_fields:
+            params["custom_fields"] = json.dumps(custom_fields)
+        if self.updated_since is not None:
+            params["date_updated_gt"] = self.updated_since
+        return params
+
+    def matches(self, task):
+        if self.status_ids is not None and (task.get("status") or {}).get("id") not in self.status_ids:
+            return False
+        if self.updated_since is not None and int(task.get("date_updated") or 0) <= self.updated_since:
+            return False
+        if self.fields:
+            values = {field.get("id"): field.get("value") for field in task.get("custom_fields", ())}
+            for predicate in self.fields:
+                if not predicate_matches(predicate, values.get(predicate.field_id)):
+                    return False
+        return True
+
+# ------------------------------
+# FETCH
+# ------------------------------
+
+def iter_filtered_tasks(client, list_id, task_filter, params=None, concurrency=PAGE_CONCURRENCY):
+    """
+    Yield the list's tasks that match task_filter, one page at a time.
+    """
+    query = {"include_custom_fields": "true", "limit": 100, **(params or {}), **task_filter.compile()}
+    for page_tasks in iter_pages(client, f"list/{list_id}/task", params=query, concurrency=concurrency):
+        yield [task for task in page_tasks if task_filter.matches(task)]
+
+def fetch_filtered_tasks(client, list_id, task_filter, params=None, concurrency=PAGE_CONCURRENCY):
+    """
+    Return every task of the list that matches task_filter. Raises PaginationError if a page fails.
+    """
+    tasks = []
+    for page_tasks in iter_filtered_tasks(client, list_id, task_filter, params, concurrency):
+        tasks.extend(page_tasks)
+    return tasks
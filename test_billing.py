@@ -0,0 +1,105 @@
+import os
+import tempfile
+from collections import namedtuple
+from datetime import date
+
+from billing_calendar import billing_days_in_range, build_schedule, clamp_day
+from clickup_client import ClickUpClient
+from fake_clickup import (
+    DESTINATION_LIST_ID, RELATIONSHIP_FIELD_ID, REMOVED_WATCHER_USER_ID, WATCHER_USER_ID,
+    build_workspace, start_server,
+)
+from invoice_journal import InvoiceJournal, resume_pending
+
+Brand = namedtuple("Brand", ["name", "billing_day"])
+
+def check_february_clamping():
+    """
+    Billing days 29–31 fall on Feb 29 in a leap year and on Feb 28 otherwise,
+    once per month and never spilling into March.
+    """
+    brands = [Brand(f"Day {day}", day) for day in (28, 29, 30, 31)]
+    for year, last_day in ((2026, 28), (2027, 28), (2028, 29)):
+        for day in (29, 30, 31):
+            assert clamp_day(date(year, 2, 1), day) == date(year, 2, last_day), (year, day)
+            assert clamp_day(date(year, 3, 1), day) == date(year, 3, day), (year, day)
+
+        schedule = build_schedule(brands, date(year, 2, 1), date(year, 3, 31))
+        due = {d: [brand.name for brand in due_brands] for d, due_brands in schedule.items()}
+        if last_day == 28:
+            assert due[date(year, 2, 28)] == ["Day 28", "Day 29", "Day 30", "Day 31"], due
+        else:
+            assert due[date(year, 2, 28)] == ["Day 28"], due
+            assert due[date(year, 2, 29)] == ["Day 29", "Day 30", "Day 31"], due
+        assert due[date(year, 3, 29)] == ["Day 29"], due
+        assert due[date(year, 3, 30)] == ["Day 30"], due
+        assert due[date(year, 3, 31)] == ["Day 31"], due
+        assert date(year, 3, 1) not in due, due
+        for brand in brands:
+            assert sum(brand.name in names for names in due.values()) == 2, (year, brand)
+
+        assert billing_days_in_range(date(year, 2, last_day), date(year, 2, last_day)) == set(range(last_day, 32))
+        assert billing_days_in_range(date(year, 2, 27), date(year, 2, 27)) == {27}
+    print("February clamping: ok")
+
+def _begin(journal, title, brand_ids):
+    return journal.begin(DESTINATION_LIST_ID, title, {
+        "brand_id": brand_ids[0], "brand_name": title.split(" ", 3)[-1], "related_ids": brand_ids,
+        "billing_date": "2026-03-15", "relationship_field_id": RELATIONSHIP_FIELD_ID, "due_timestamp": None,
+        "add_watchers": [WATCHER_USER_ID], "remove_watchers": [REMOVED_WATCHER_USER_ID],
+    })
+
+def _task_posts(fake):
+    return sum(method == "POST" and request_path.endswith("/task") for method, request_path in fake.requests)
+
+def check_journal_resume():
+    """
+    A create that was sent but never confirmed is matched to the task it made
+    instead of being sent again; one that never reached ClickUp is sent once.
+    """
+    fake = build_workspace(0)
+    server, url = start_server(fake)
+    client = ClickUpClient("test", base_url=url)
+    invoices = fake.lists[DESTINATION_LIST_ID]
+    path = os.path.join(tempfile.mkdtemp(), "invoice_journal.jsonl")
+    try:
+        journal = InvoiceJournal(path)
+        _begin(journal, "15.02.26 - 14.03.26 Sent Brand", ["brand1", "brand2"])
+        response = client.post(f"list/{DESTINATION_LIST_ID}/task", json={"name": "15.02.26 - 14.03.26 Sent Brand"})
+        sent_id = response.json()["id"]   # the response is lost before journal.done() is written
+        _begin(journal, "15.02.26 - 14.03.26 Unsent Brand", ["brand3"])
+        journal.close()
+
+        journal = InvoiceJournal(path)
+        pending = journal.pending_for(DESTINATION_LIST_ID)
+        assert [entry.remaining for entry in pending] == [["create", "relationship", "watchers"]] * 2, pending
+        posts_before = _task_posts(fake)
+        resumed, still_pending = resume_pending(client, journal, DESTINATION_LIST_ID)
+        posts = _task_posts(fake) - posts_before
+        assert (resumed, still_pending) == (2, 0), (resumed, still_pending)
+        assert posts == 1, posts
+        assert not journal.pending_for(DESTINATION_LIST_ID)
+
+        by_name = {task["name"]: task for task in invoices}
+        assert len(invoices) == 2 and set(by_name) == {"15.02.26 - 14.03.26 Sent Brand",
+                                                      "15.02.26 - 14.03.26 Unsent Brand"}, by_name
+        sent = by_name["15.02.26 - 14.03.26 Sent Brand"]
+        unsent = by_name["15.02.26 - 14.03.26 Unsent Brand"]
+        assert sent["id"] == sent_id
+        for task, brand_ids in ((sent, ["brand1", "brand2"]), (unsent, ["brand3"])):
+            related = [field for field in task["custom_fields"] if field["id"] == RELATIONSHIP_FIELD_ID]
+            assert [item["id"] for item in related[0]["value"]] == brand_ids, task
+            watchers = {watcher["id"] for watcher in task["watchers"]}
+            assert watchers == {int(WATCHER_USER_ID)}, watchers
+        journal.close()
+        assert os.path.getsize(path) == 0
+    finally:
+        server.shutdown()
+    print("Journal resume: ok")
+
+def main():
+    check_february_clamping()
+    check_journal_resume()
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,11 @@
-import os
-import json
-import requests
+from clickup_client import get_client
+from credentials import get_clickup_api_key
 
 def get_tasks(list_id, access_token):
     """
     Retrieve tasks from the specified ClickUp list.
     """
-    url = f"https://api.clickup.com/api/v2/list/{list_id}/task?include_custom_fields=true"
-    headers = {
-        'Authorization': access_token,
-        'Content-Type': 'application/json'
-    }
-    
-    response = requests.get(url, headers=headers)
+    response = get_client(access_token).get(f"list/{list_id}/task", params={"include_custom_fields": "true"})
     if response.status_code != 200:
         print(f"Failed to retrieve tasks: {response.status_code} {response.text}")
         return []
@@ -34,21 +27,12 @@ def print_task_details(task):
         print(f"  - Field ID: {field_id}, Name: {field_name}, Value: {field_value}")
     print("-" * 40)
 
-def main():
-    # You can hard-code the list_id here or input it manually
-    list_id = input("Enter the ClickUp list ID: ").strip()
-    
-    # Retrieve the API key from an environment variable or credentials file
-    access_token = os.getenv('CLICKUP_API_KEY')
-    if not access_token:
-        try:
-            with open('credentials.json') as f:
-                access_token = json.load(f).get('CLICKUP_API_KEY')
-        except Exception as e:
-            print("Error loading API key:", e)
-            return
+def main(list_id=None):
+    # You can pass the list_id in or input it manually
+    if not list_id:
+        list_id = input("Enter the ClickUp list ID: ").strip()
 
-    tasks = get_tasks(list_id, access_token)
+    tasks = get_tasks(list_id, get_clickup_api_key())
     if not tasks:
         print("No tasks found or error retrieving tasks.")
         return
@@ -1,32 +1,14 @@
-import os
-import json
-import requests
+from brand_hierarchy import format_cycles_report, resolve_hierarchy
+from clickup_client import get_client, fetch_pages
+from credentials import get_clickup_api_key
 
 def get_all_brand_tasks(list_id, status_id, access_token):
     """
     Retrieve all tasks from the specified ClickUp list using pagination,
     and filter them by the target status.
     """
-    tasks = []
-    page = 0
-    while True:
-        url = f"https://api.clickup.com/api/v2/list/{list_id}/task?include_custom_fields=true&page={page}&limit=100"
-        headers = {
-            'Authorization': access_token,
-            'Content-Type': 'application/json'
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            print(f"Failed to retrieve tasks on page {page}: {response.status_code}")
-            break
-
-        data = response.json()
-        page_tasks = data.get('tasks', [])
-        if not page_tasks:
-            break
-
-        tasks.extend(page_tasks)
-        page += 1
+    client = get_client(access_token)
+    tasks, _ = fetch_pages(client, f"list/{list_id}/task", params={"include_custom_fields": "true", "limit": 100})
 
     tasks = [task for task in tasks if task.get('status', {}).get('id') == status_id]
     return tasks
@@ -34,43 +16,45 @@ def get_all_brand_tasks(list_id, status_id, access_token):
 def group_tasks(tasks, parent_relationship_field_id):
     """
     Group tasks into three categories:
-      - Dependent brands: tasks that have a mother brand specified in the custom field AND that mother brand is active.
-      - Parent brands: active tasks that are referenced as a mother brand by at least one dependent brand.
+      - Dependent brands: tasks whose chain of active mother brands leads to another brand, at any depth.
+      - Parent brands: root brands that at least one dependent brand is billed under.
       - Independent brands: tasks that either have no mother brand specified, or the specified mother brand is not active.
       
-    Also builds a mapping of parent_id -> list of child brand names.
+    Also builds a mapping of parent_id -> list of child brand names (every descendant).
+    Uses the same hierarchy engine as main.py; brands in a mother-brand cycle are printed and left out.
     """
-    active_ids = {task['id'] for task in tasks}
-    
-    dependent_tasks = []
-    tentative_independent_tasks = []
-    parent_ids = set()
-    # Mapping: parent_id -> list of child brand names
-    parent_children = {}
-    
+    mother_of = {}
     for task in tasks:
-        mother_id = None
         for field in task.get('custom_fields', []):
             if field['id'] == parent_relationship_field_id and field.get('value'):
-                # Assume the field's value is a list of dictionaries; we take the first one.
-                mother_id = field['value'][0]['id']
+                mother_of[task['id']] = field['value'][0]['id']
                 break
 
-        # Classify as dependent only if the mother brand is active.
-        if mother_id and mother_id in active_ids:
-            dependent_tasks.append(task)
-            parent_ids.add(mother_id)
-            parent_children.setdefault(mother_id, []).append(task['name'])
-        else:
-            tentative_independent_tasks.append(task)
-    
+    hierarchy = resolve_hierarchy([task['id'] for task in tasks], mother_of)
+    names = {task['id']: task['name'] for task in tasks}
+    report = format_cycles_report(hierarchy, names)
+    if report:
+        print(report)
+
+    dependent_tasks = []
     parent_tasks = []
     independent_tasks = []
-    for task in tentative_independent_tasks:
-        if task['id'] in parent_ids:
+    for task in tasks:
+        root = hierarchy.roots[task['id']]
+        if root is None:
+            continue
+        if root != task['id']:
+            dependent_tasks.append(task)
+        elif task['id'] in hierarchy.descendants:
             parent_tasks.append(task)
         else:
             independent_tasks.append(task)
+
+    # Mapping: parent_id -> list of child brand names
+    parent_children = {
+        root_id: [names[child_id] for child_id in child_ids]
+        for root_id, child_ids in hierarchy.descendants.items()
+    }
     
     return independent_tasks, dependent_tasks, parent_tasks, parent_children
 
@@ -86,7 +70,7 @@ def main():
     parent_relationship_field_id = "65152352-2245-4e01-a375-06f7094abc53"
     
     # Retrieve the ClickUp API key
-    access_token = os.getenv('CLICKUP_API_KEY') or json.load(open('credentials.json'))['CLICKUP_API_KEY']
+    access_token = get_clickup_api_key()
     
     # Retrieve all tasks using pagination
     tasks = get_all_brand_tasks(list_id, status_id, access_token)
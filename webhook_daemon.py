@@ -0,0 +1,337 @@
+"""
+Long-running alternative to the daily cron: keep the brands list in memory and
+update it from ClickUp webhooks instead of rescanning the list.
+
+    python webhook_daemon.py --register https://billing.example.com/webhook   # once; prints the secret
+    CLICKUP_WEBHOOK_SECRET=... python webhook_daemon.py --port 8765 --run-at 02:00
+
+The daemon serves POST /webhook for taskCreated, taskUpdated, taskDeleted and
+taskStatusUpdated on LIST_ID. Created/updated tasks are fetched once and
+projected into the in-memory BrandIndex; deleted ones are dropped from it and
+tombstoned in the snapshot. Invoices are created every day at --run-at (UTC)
+straight from the index, and a reconciliation sweep (an incremental snapshot
+sync) replaces the index every --reconcile-hours to repair missed events.
+
+Recorded webhook payloads can be replayed against a local daemon:
+
+    python webhook_daemon.py --post payload.json --to http://127.0.0.1:8765/webhook
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from brand_hierarchy import cycle_report_entries
+from brand_records import build_field_index, project_task
+from brand_validation import BrandValidation
+from clickup_client import get_client, set_rate_priority
+from invoice_journal import DEFAULT_JOURNAL_PATH, InvoiceJournal
+from main import (
+    DEFAULT_SHARD, INVOICE_LEAD_DAYS, create_invoices, create_report_mailer, get_all_brand_tasks,
+    get_clickup_api_key, group_tasks, plan_invoice_jobs, print_summary,
+    resolve_workspace_ids, submit_reports,
+)
+from report_mailer import DEFAULT_FINGERPRINT_PATH
+from snapshot_store import DEFAULT_SNAPSHOT_PATH, SnapshotStore
+from workspace_metadata import DEFAULT_METADATA_PATH, MetadataCache, MetadataResolver
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_PORT = 8765
+DEFAULT_RUN_AT = "02:00"          # UTC, same as the GitHub Actions cron
+RECONCILE_HOURS = 6
+WEBHOOK_EVENTS = ["taskCreated", "taskUpdated", "taskDeleted", "taskStatusUpdated"]
+
+# ------------------------------
+# IN-MEMORY INDEX
+# ------------------------------
+
+class BrandIndex:
+    """
+    BrandRecords of the list's brands in the billing status, keyed by task id,
+    with the groupings recomputed lazily after a change.
+    """
+
+    def __init__(self, list_id, status_id, field_index):
+        self.list_id = list_id
+        self.status_id = status_id
+        self.field_index = field_index
+        self.brands = {}
+        self._groups = None
+        self._lock = threading.Lock()
+
+    def replace(self, brands):
+        with self._lock:
+            self.brands = {brand.id: brand for brand in brands}
+            self._groups = None
+
+    def apply_task(self, task):
+        """
+        Insert, update or drop a task fetched after a webhook. Returns "upserted", "removed" or "ignored".
+        """
+        in_list = (task.get("list") or {}).get("id") in (None, self.list_id)
+        active = in_list and not task.get("archived") and (task.get("status") or {}).get("id") == self.status_id
+        if not active:
+            return "removed" if self.remove(task["id"]) else "ignored"
+        brand = project_task(task, self.field_index)
+        with self._lock:
+            self.brands[brand.id] = brand
+            self._groups = None
+        return "upserted"
+
+    def remove(self, task_id):
+        with self._lock:
+            removed = self.brands.pop(task_id, None) is not None
+            if removed:
+                self._groups = None
+            return removed
+
+    def snapshot(self):
+        """
+        Return (brands, groups, validation) where groups is the group_tasks() tuple for those brands.
+        """
+        with self._lock:
+            brands = list(self.brands.values())
+            if self._groups is None:
+                validation = BrandValidation()
+                self._groups = (group_tasks(brands, validation), validation)
+            return (brands,) + self._groups
+
+# ------------------------------
+# WEBHOOK SERVER
+# ------------------------------
+
+def signature(secret, body):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    daemon = None   # BrandDaemon
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/webhook":
+            return self._reply(404, {"err": "Not found"})
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        secret = self.daemon.secret
+        if secret and not hmac.compare_digest(self.headers.get("X-Signature", ""), signature(secret, body)):
+            return self._reply(401, {"err": "Bad signature"})
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return self._reply(400, {"err": "Invalid JSON"})
+        return self._reply(200, {"result": self.daemon.handle_event(event)})
+
+# ------------------------------
+# DAEMON
+# ------------------------------
+
+class BrandDaemon:
+    """
+    Keeps a BrandIndex current from webhooks, reconciles it periodically and creates invoices on schedule.
+    """
+
+    def __init__(self, access_token, ids, shard=DEFAULT_SHARD, snapshot_path=DEFAULT_SNAPSHOT_PATH,
+                 fingerprint_path=DEFAULT_FINGERPRINT_PATH, secret=None, journal_path=DEFAULT_JOURNAL_PATH):
+        self.access_token = access_token
+        self.ids = ids
+        self.shard = shard
+        self.snapshot_path = snapshot_path
+        self.fingerprint_path = fingerprint_path
+        self.secret = secret
+        self.journal_path = journal_path
+        field_index = build_field_index(ids.billing_day_field_id, ids.payment_terms_field_id, ids.mother_brand_field_id)
+        self.index = BrandIndex(shard.list_id, ids.status_id, field_index)
+        self.events = 0
+        self.stopped = threading.Event()
+
+    def handle_event(self, event):
+        name = event.get("event")
+        task_id = event.get("task_id")
+        if name not in WEBHOOK_EVENTS or not task_id:
+            return "ignored"
+        self.events += 1
+        if name == "taskDeleted":
+            return self.forget(task_id)
+        response = get_client(self.access_token).get(f"task/{task_id}", params={"include_subtasks": "false"})
+        if response.status_code == 404:
+            return self.forget(task_id)
+        if response.status_code != 200:
+            # The next reconciliation sweep picks the change up.
+            print(f"Failed to fetch task {task_id} for {name}: {response.status_code}")
+            return "failed"
+        return self.index.apply_task(response.json())
+
+    def forget(self, task_id):
+        """
+        Drop a deleted task from the index and tombstone it in the snapshot, so reconcile() does not bring it back.
+        """
+        store = SnapshotStore(self.snapshot_path)
+        try:
+            store.tombstone([task_id])
+        finally:
+            store.close()
+        return "removed" if self.index.remove(task_id) else "ignored"
+
+    def reconcile(self, full_refresh=False):
+        store = SnapshotStore(self.snapshot_path)
+        try:
+            brands = get_all_brand_tasks(self.shard.list_id, self.ids.status_id, self.access_token, store=store,
+                                         full_refresh=full_refresh, field_index=self.index.field_index)
+        finally:
+            store.close()
+        self.index.replace(brands)
+        print(f"Reconciled brand index: {len(brands)} brands.")
+
+    def run_invoices(self, run_date):
+        """
+        Report and create the invoices due INVOICE_LEAD_DAYS after run_date from the in-memory index.
+        """
+        brands, groups, validation = self.index.snapshot()
+        independent, _, parent, parent_children_names, parent_children_ids, hierarchy = groups
+        mailer = create_report_mailer(self.fingerprint_path)
+        submit_reports(mailer, validation.report_entries(),
+                       cycle_report_entries(hierarchy, {brand.id: brand.name for brand in brands}), self.shard)
+        target = run_date + timedelta(days=INVOICE_LEAD_DAYS)
+        jobs = plan_invoice_jobs(independent, parent, parent_children_names, parent_children_ids, target, target,
+                                 validation.blocked_ids)
+        journal = InvoiceJournal(self.journal_path)
+        try:
+            summary = create_invoices(self.access_token, self.shard, self.ids, jobs, run_date, run_date, journal)
+        finally:
+            journal.close()
+        mailer.close()
+        print_summary(summary)
+        return summary
+
+    def serve(self, port=DEFAULT_PORT, run_at=DEFAULT_RUN_AT, reconcile_hours=RECONCILE_HOURS):
+        handler = type("Handler", (WebhookHandler,), {"daemon": self})
+        server = ThreadingHTTPServer(("0.0.0.0", port), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Listening for ClickUp webhooks on port {server.server_address[1]}.")
+
+        self.reconcile()
+        next_reconcile = datetime.now(timezone.utc) + timedelta(hours=reconcile_hours)
+        next_run = next_run_time(datetime.now(timezone.utc), run_at)
+        try:
+            while not self.stopped.is_set():
+                now = datetime.now(timezone.utc)
+                if now >= next_run:
+                    try:
+                        self.run_invoices(now.date())
+                    except Exception as e:
+                        print(f"Invoice run failed: {e}")
+                    next_run = next_run_time(now, run_at)
+                elif now >= next_reconcile:
+                    try:
+                        self.reconcile()
+                    except Exception as e:
+                        print(f"Reconciliation failed: {e}")
+                    next_reconcile = now + timedelta(hours=reconcile_hours)
+                self.stopped.wait(max(0.0, min((next_run - now).total_seconds(),
+                                               (next_reconcile - now).total_seconds(), 60.0)))
+        finally:
+            server.shutdown()
+
+def next_run_time(now, run_at):
+    hour, minute = (int(part) for part in run_at.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return run if run > now else run + timedelta(days=1)
+
+# ------------------------------
+# WEBHOOK REGISTRATION / REPLAY
+# ------------------------------
+
+def register_webhook(access_token, endpoint, list_id):
+    """
+    Register the daemon's endpoint for the brand list's task events. Returns the webhook (with its secret) or None.
+    """
+    client = get_client(access_token)
+    teams = client.get("team")
+    if teams.status_code != 200 or not teams.json().get("teams"):
+        print(f"Failed to retrieve teams: {teams.status_code} {teams.text}")
+        return None
+    team_id = teams.json()["teams"][0]["id"]
+    response = client.post(f"team/{team_id}/webhook",
+                           json={"endpoint": endpoint, "events": WEBHOOK_EVENTS, "list_id": int(list_id)})
+    if response.status_code != 200:
+        print(f"Failed to register webhook: {response.status_code} {response.text}")
+        return None
+    return response.json().get("webhook")
+
+def post_payloads(url, paths, secret=None):
+    """
+    POST recorded webhook payloads (one JSON object per file, or a JSON list) to a running daemon.
+    """
+    for path in paths:
+        with open(path) as f:
+            payloads = json.load(f)
+        for payload in payloads if isinstance(payloads, list) else [payloads]:
+            body = json.dumps(payload).encode()
+            headers = {"Content-Type": "application/json"}
+            if secret:
+                headers["X-Signature"] = signature(secret, body)
+            response = requests.post(url, data=body, headers=headers, timeout=30)
+            print(f"{payload.get('event')} {payload.get('task_id')}: {response.status_code} {response.text}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the brand list in memory from ClickUp webhooks and create invoices on schedule.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--run-at", default=DEFAULT_RUN_AT, help="Daily invoice run time, HH:MM UTC.")
+    parser.add_argument("--reconcile-hours", type=float, default=RECONCILE_HOURS,
+                        help="Hours between reconciliation sweeps of the brand list.")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH)
+    parser.add_argument("--metadata", default=DEFAULT_METADATA_PATH)
+    parser.add_argument("--fingerprints", default=DEFAULT_FINGERPRINT_PATH)
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH)
+    parser.add_argument("--register", metavar="URL", help="Register URL as the webhook endpoint and exit.")
+    parser.add_argument("--post", nargs="+", metavar="FILE", help="POST recorded webhook payloads and exit.")
+    parser.add_argument("--to", default=f"http://127.0.0.1:{DEFAULT_PORT}/webhook", help="Daemon URL for --post.")
+    args = parser.parse_args()
+    set_rate_priority("high")
+    secret = os.getenv("CLICKUP_WEBHOOK_SECRET")
+
+    if args.post:
+        post_payloads(args.to, args.post, secret)
+        return
+    access_token = get_clickup_api_key()
+    if args.register:
+        webhook = register_webhook(access_token, args.register, DEFAULT_SHARD.list_id)
+        if webhook is None:
+            exit(1)
+        print(f"Registered webhook {webhook.get('id')}; set CLICKUP_WEBHOOK_SECRET={webhook.get('secret')}")
+        return
+
+    resolver = MetadataResolver(get_client(access_token), MetadataCache(args.metadata))
+    ids = resolve_workspace_ids(resolver)
+    resolver.save()
+    if ids is None:
+        exit(1)
+    if not secret:
+        print("CLICKUP_WEBHOOK_SECRET is not set; webhook signatures are not checked.")
+    daemon = BrandDaemon(access_token, ids, snapshot_path=args.snapshot, fingerprint_path=args.fingerprints,
+                         secret=secret, journal_path=args.journal)
+    try:
+        daemon.serve(args.port, args.run_at, args.reconcile_hours)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Look up custom fields, statuses and team members by name, with an on-disk cache.
+
+Responses are cached in a JSON file for METADATA_TTL_SECONDS; a warm start
+within the TTL makes no API calls at all. Once an entry expires it is
+revalidated with If-None-Match when ClickUp sent an ETag, so an unchanged
+workspace costs a 304 instead of the full payload. If ClickUp cannot be
+reached, expired entries are used as they are.
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from clickup_client import ClickUpError
+
+# ------------------------------
+# CONFIGURATION / CONSTANTS
+# ------------------------------
+DEFAULT_METADATA_PATH = "workspace_metadata.json"
+METADATA_TTL_SECONDS = 24 * 60 * 60
+
+class MetadataError(ClickUpError):
+    pass
+
+# ------------------------------
+# CACHE
+# ------------------------------
+
+class MetadataCache:
+    """
+    {api path: {"fetched_at": epoch seconds, "etag": str or None, "data": response JSON}}
+    """
+
+    def __init__(self, path=DEFAULT_METADATA_PATH):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable metadata cache {path}: {e}")
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+# ------------------------------
+# RESOLVER
+# ------------------------------
+
+class MetadataResolver:
+    """
+    Name -> id lookups for one workspace, backed by a MetadataCache.
+    """
+
+    def __init__(self, client, cache=None, ttl=METADATA_TTL_SECONDS):
+        self.client = client
+        self.cache = cache if cache is not None else MetadataCache()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def fetch(self, path):
+        """
+        Return the JSON for a GET of `path`, from the cache while it is fresh.
+        """
+        with self._lock:
+            entry = self.cache.entries.get(path)
+            now = time.time()
+            if entry is not None and now - entry["fetched_at"] < self.ttl:
+                return entry["data"]
+
+            headers = {}
+            if entry is not None and entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            try:
+                response = self.client.get(path, headers=headers)
+            except Exception as e:
+                response, error = None, e
+            else:
+                error = f"{response.status_code} {response.text}"
+
+            if response is not None and response.status_code == 304 and entry is not None:
+                entry["fetched_at"] = now
+            elif response is not None and response.status_code == 200:
+                entry = {"fetched_at": now, "etag": response.headers.get("ETag"), "data": response.json()}
+                self.cache.entries[path] = entry
+            elif entry is not None:
+                print(f"Failed to refresh {path} ({error}); using cached metadata.")
+                return entry["data"]
+            else:
+                raise MetadataError(f"Failed to retrieve {path}: {error}")
+            self.cache.dirty = True
+            return entry["data"]
+
+    def fields(self, list_id):
+        return self.fetch(f"list/{list_id}/field").get("fields", [])
+
+    def statuses(self, list_id):
+        return self.fetch(f"list/{list_id}").get("statuses", [])
+
+    def members(self):
+        users = []
+        for team in self.fetch("team").get("teams", []):
+            users.extend(member.get("user", {}) for member in team.get("members", []))
+        return users
+
+    def field_id(self, list_id, name, fallback=None, trust_fallback=True):
+        fields = self.fields(list_id)
+        return _lookup("custom field", name, fallback,
+                       ((field.get("name"), field.get("id")) for field in fields), trust_fallback)
+
+    def status_id(self, list_id, name, fallback=None, trust_fallback=True):
+        statuses = self.statuses(list_id)
+        return _lookup("status", name, fallback,
+                       ((status.get("status"), status.get("id")) for status in statuses), trust_fallback)
+
+    def user_id(self, name, fallback=None, trust_fallback=True):
+        users = self.members()
+        return _lookup("user", name, fallback,
+                       ((user.get("username") or user.get("email"), str(user.get("id"))) for user in users),
+                       trust_fallback)
+
+    def save(self):
+        self.cache.save()
+
+def _lookup(kind, name, fallback, candidates, trust_fallback=True):
+    """
+    Return the configured id `fallback` if it is one of the candidates' ids, else
+    the id of the candidate called `name` (case-insensitive), so a name only
+    matters once the configured item was recreated. If neither is found,
+    `fallback` is still returned (with a warning) when trust_fallback is set.
+    """
+    candidates = list(candidates)
+    if fallback is not None and fallback in {item_id for _, item_id in candidates}:
+        return fallback
+    wanted = (name or "").strip().casefold()
+    matches = [item_id for item_name, item_id in candidates if name and (item_name or "").strip().casefold() == wanted]
+    if len(matches) == 1:
+        if fallback is not None:
+            print(f"No {kind} with id {fallback}; using the {kind} called '{name}' ({matches[0]}).")
+        return matches[0]
+    if len(matches) > 1:
+        problem = f"More than one {kind} is called '{name}': {', '.join(matches)}"
+    elif name:
+        problem = f"No {kind} called '{name}'" + (f" or with id {fallback}" if fallback else "")
+    else:
+        problem = f"No {kind} with id {fallback}"
+    if fallback is not None and trust_fallback:
+        print(f"{problem}; using configured id {fallback}.")
+        return fallback
+    raise MetadataError(problem)
+
+# ------------------------------
+# WORKSPACE IDS
+# ------------------------------
+
+WorkspaceIds = namedtuple("WorkspaceIds", [
+    "status_id", "billing_day_field_id", "payment_terms_field_id", "mother_brand_field_id",
+    "relationship_field_id", "watcher_user_id", "removed_watcher_user_id",
+])